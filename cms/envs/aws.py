@@ -375,6 +375,9 @@ for name, database in DATABASES.items():
         })
 
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES', COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES
+)
 
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ENV_TOKENS.get(
     'MODULESTORE_FIELD_OVERRIDE_PROVIDERS',
@@ -544,6 +544,11 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Maximum size, in bytes, of the per-process LRU cache of split modulestore
+# course structures that sits in front of the 'course_structure_cache'.
+# Set to 0 to disable it.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
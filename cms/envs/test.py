@@ -170,6 +170,9 @@ CACHES = {
     },
 }
 
+# Don't keep course structures around between tests
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 0
+
 ################################# CELERY ######################################
 
 CELERY_ALWAYS_EAGER = True
@@ -7,6 +7,7 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import numbers
 import operator
+from collections import OrderedDict
 
 import numpy
 import scipy.constants
@@ -93,6 +94,15 @@ SUFFIXES = {
 }
 
 
+# Default functions which only accept single values, so expressions using
+# them can't be evaluated by `vector_evaluator`.
+NON_VECTORIZED_FUNCTIONS = (math.factorial, functions.arccot)
+
+# The number of parsed expressions to keep, so that evaluating the same
+# expression again (e.g. with different variable values) skips the parsing.
+PARSE_CACHE_SIZE = 1024
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -100,6 +110,13 @@ class UndefinedVariable(Exception):
     pass
 
 
+class VectorizationError(Exception):
+    """
+    Indicate when an expression can't be evaluated over arrays of values at once.
+    """
+    pass
+
+
 def lower_dict(input_dict):
     """
     Convert all keys in a dictionary to lowercase; keep their original values.
@@ -278,6 +295,228 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+def vector_evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for many values of its variables at once.
+
+    Like `evaluator`, except that the variables are numpy arrays of values and
+    the expression is evaluated with numpy operations on whole arrays. Return
+    the array of results, or a single value if the expression doesn't use
+    any of the variables. The passed-in functions must accept arrays as well.
+
+    Raise `VectorizationError` if the expression can't be evaluated this way,
+    i.e. if it uses a function which only accepts single values, or hits a
+    floating point error for which `evaluator` may behave differently (e.g.
+    dividing by zero). Callers should then fall back to `evaluator`.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return float('nan')
+
+    # Parse the tree.
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    # Get our variables together.
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+
+    # ...and check them
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    # Create a recursion to evaluate the tree.
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    if any(all_functions[casify(name)] in NON_VECTORIZED_FUNCTIONS for name in math_interpreter.functions_used):
+        raise VectorizationError(u"'{}' uses functions which only accept single values".format(math_expr))
+
+    evaluate_actions = {
+        'number': eval_number,
+        'variable': lambda x: all_variables[casify(x[0])],
+        'function': lambda x: all_functions[casify(x[0])](x[1]),
+        'atom': eval_vector_atom,
+        'power': eval_vector_power,
+        'parallel': eval_vector_parallel,
+        'product': eval_product,
+        'sum': eval_sum
+    }
+
+    with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+        try:
+            return math_interpreter.reduce_tree(evaluate_actions)
+        except (ArithmeticError, TypeError, ValueError) as err:
+            raise VectorizationError(err)
+
+
+def _vector_operands(parse_result):
+    """
+    Return the operands of a parse result, i.e. its numbers and arrays without
+    the operator and parenthesis strings.
+    """
+    return [k for k in parse_result if not isinstance(k, basestring)]
+
+
+def eval_vector_atom(parse_result):
+    """
+    Like `eval_atom`, for atoms which may be arrays.
+    """
+    return _vector_operands(parse_result)[0]
+
+
+def eval_vector_power(parse_result):
+    """
+    Like `eval_power`, for operands which may be arrays.
+    """
+    return reduce(lambda a, b: b ** a, reversed(_vector_operands(parse_result)))
+
+
+def eval_vector_parallel(parse_result):
+    """
+    Like `eval_parallel`, for operands which may be arrays.
+
+    Zero inputs divide by zero, rather than giving NaN.
+    """
+    operands = _vector_operands(parse_result)
+    if len(operands) == 1:
+        return operands[0]
+    return 1. / sum(1. / operand for operand in operands)
+
+
+class ParseCache(object):
+    """
+    A bounded cache which discards its least recently used entries.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the value cached for `key`, or None if there isn't one.
+        """
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return None
+        # Reinsert the entry to mark it as the most recently used.
+        self._entries[key] = value
+        return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, discarding the least recently used entries
+        if the cache is full.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        while len(self._entries) > self.max_size:
+            try:
+                self._entries.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        self._entries.clear()
+
+
+_PARSE_CACHE = ParseCache(PARSE_CACHE_SIZE)
+_GRAMMAR = None
+
+
+def get_grammar():
+    """
+    Return the pyparsing grammar for algebraic expressions.
+
+    The grammar doesn't depend on the expression, so build it only once per
+    process.
+    """
+    global _GRAMMAR  # pylint: disable=global-statement
+    if _GRAMMAR is None:
+        _GRAMMAR = _build_grammar()
+    return _GRAMMAR
+
+
+def _build_grammar():
+    """
+    Build the pyparsing grammar for algebraic expressions.
+
+    Parsing with it gives a tree of `pyparsing.ParseResults`, named after the
+    node types handled by `ParseAugmenter.reduce_tree`.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+def _collect_names(node, variables_used, functions_used):
+    """
+    Add the names of the variables and functions used in the parse tree
+    `node` to the given sets.
+    """
+    if not isinstance(node, ParseResults):
+        return
+
+    node_name = node.getName()
+    if node_name == 'variable':
+        variables_used.add(node[0])
+    elif node_name == 'function':
+        functions_used.add(node[0])
+
+    for child in node:
+        _collect_names(child, variables_used, functions_used)
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -298,23 +537,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -326,58 +548,23 @@ class ParseAugmenter(object):
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
+
+        The tree, along with the variables and functions it uses, is shared
+        with any other `ParseAugmenter` of the same expression, so it must not
+        be modified.
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        cache_key = (self.math_expr, self.case_sensitive)
+        parsed = _PARSE_CACHE.get(cache_key)
+        if parsed is None:
+            tree = get_grammar().parseString(self.math_expr)[0]
+            variables_used, functions_used = set(), set()
+            _collect_names(tree, variables_used, functions_used)
+            parsed = (tree, frozenset(variables_used), frozenset(functions_used))
+            _PARSE_CACHE.set(cache_key, parsed)
+
+        self.tree, variables_used, functions_used = parsed
+        self.variables_used = set(variables_used)
+        self.functions_used = set(functions_used)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
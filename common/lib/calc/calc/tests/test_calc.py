@@ -3,10 +3,19 @@ Unit tests for calc.py
 """
 
 import unittest
+
+from mock import patch
 import numpy
 import calc
 from pyparsing import ParseException
 
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
 # numpy's default behavior when it evaluates a function outside its domain
 # is to raise a warning (not an exception) which is then printed to STDOUT.
 # To prevent this from polluting the output of the tests, configure numpy to
@@ -554,3 +563,113 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class VectorEvaluatorTest(unittest.TestCase):
+    """
+    Test the evaluation of expressions over arrays of values with calc.vector_evaluator
+    """
+    def test_matches_evaluator(self):
+        values = {'x': numpy.array([-2.5, 0.5, 3.0]), 'y': numpy.array([1.0, 2.0, 7.5])}
+        for expression in ("3*x - y", "x^2 / y", "x||y", "sqrt(x)", "sin(x)^2 + cos(x)^2", "e^(j*pi*y)", "5k*x + 2%"):
+            results = calc.vector_evaluator(values, {}, expression)
+            for index, result in enumerate(results):
+                expected = calc.evaluator({name: value[index] for name, value in values.items()}, {}, expression)
+                self.assertAlmostEqual(result, expected)
+
+    def test_constant(self):
+        self.assertEqual(calc.vector_evaluator({'x': numpy.array([1.0, 2.0])}, {}, "2*3"), 6)
+
+    def test_undefined_vars(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.vector_evaluator({'x': numpy.array([1.0, 2.0])}, {}, "x+z")
+
+    def test_not_vectorized(self):
+        values = {'x': numpy.array([0.0, 2.0])}
+        # functions which only accept single values
+        with self.assertRaises(calc.VectorizationError):
+            calc.vector_evaluator(values, {}, "fact(x)")
+        with self.assertRaises(calc.VectorizationError):
+            calc.vector_evaluator(values, {}, "arccot(x)")
+        # floating point errors
+        with self.assertRaises(calc.VectorizationError):
+            calc.vector_evaluator(values, {}, "1/x")
+        with self.assertRaises(calc.VectorizationError):
+            calc.vector_evaluator(values, {}, "x||3")
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Test the caching of parsed expressions
+    """
+    def setUp(self):
+        super(ParseCacheTest, self).setUp()
+        calc.calc._PARSE_CACHE.clear()  # pylint: disable=protected-access
+        self.addCleanup(calc.calc._PARSE_CACHE.clear)  # pylint: disable=protected-access
+
+    def test_lru(self):
+        cache = calc.ParseCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        # 'b' is now the least recently used entry
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_reevaluation_skips_parsing(self):
+        """
+        Evaluating an expression again, with different variables, reuses its parse
+        """
+        self.assertEqual(calc.evaluator({'x': 1, 'y': 2}, {'f': lambda y: y}, 'x+f(y)'), 3)
+        with patch('calc.calc.get_grammar') as mock_get_grammar:
+            self.assertEqual(calc.evaluator({'x': 3, 'y': 4}, {'f': lambda y: y}, 'x+f(y)'), 7)
+            with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+                calc.evaluator({'x': 3}, {'f': lambda y: y}, 'x+f(y)')
+        self.assertFalse(mock_get_grammar.called)
+
+    def test_variables_used(self):
+        parse = calc.ParseAugmenter('a*sin(b+c^2)-a')
+        parse.parse_algebra()
+        self.assertEqual(parse.variables_used, {'a', 'b', 'c'})
+        self.assertEqual(parse.functions_used, {'sin'})
+
+        # The cached parse gives its own copies of the sets
+        parse.variables_used.add('d')
+        cached_parse = calc.ParseAugmenter('a*sin(b+c^2)-a')
+        cached_parse.parse_algebra()
+        self.assertIs(cached_parse.tree, parse.tree)
+        self.assertEqual(cached_parse.variables_used, {'a', 'b', 'c'})
+
+
+# Use this attribute to skip this test on regular unittest CI runs.
+@unittest.skip
+class EvaluatorBenchmark(unittest.TestCase):
+    """
+    Measure the time taken to evaluate the expressions of these tests,
+    with and without the cache of parsed expressions.
+    """
+    perf_test = True
+    NUM_EVALUATIONS = 100
+    EXPRESSIONS = [
+        "13", "-3.14", ".618033989", "4.", "-1.6e-3", "5.4M", "17%",
+        "1+2*3-4/5", "1||2||3", "sin(2.5)", "arcsec(1.1)", "cosh(0.8)",
+        "fact(5)", "sqrt(-4)", "-x^2+y*x-0.5", "x*y/(1+z)", "k*T/q", "e^(j*pi)",
+        "10||sin(7+5)", "-1.6*10^(-3)", "r1*r3", "1/(1/x+1/y)", "sin(x)^2+cos(x)^2",
+    ]
+    VARIABLES = {'x': 9.72, 'y': 7.91, 'z': 3.3, 'r1': 2.0, 'r3': 4.0}
+
+    def test_benchmark(self):
+        if CodeBlockTimer is None:
+            raise unittest.SkipTest("CodeBlockTimer undefined.")
+
+        for cache_size in (0, calc.PARSE_CACHE_SIZE):
+            desc = "Evaluator:parse cache size {}:{} evaluations of {} expressions".format(
+                cache_size, self.NUM_EVALUATIONS, len(self.EXPRESSIONS)
+            )
+            with patch('calc.calc._PARSE_CACHE', calc.ParseCache(cache_size)):
+                with CodeBlockTimer(desc):
+                    for _ in xrange(self.NUM_EVALUATIONS):
+                        for expression in self.EXPRESSIONS:
+                            calc.evaluator(self.VARIABLES, {}, expression)
@@ -13,6 +13,7 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+import hashlib
 import logging
 import os.path
 import re
@@ -32,6 +33,7 @@ from capa.correctmap import CorrectMap
 from capa.safe_exec import safe_exec
 from capa.util import contextualize_text, convert_files_to_filenames
 from openedx.core.djangolib.markup import HTML
+from openedx.core.lib.cache_utils import LRUCache
 from xmodule.stringify import stringify_children
 
 # extra things displayed after "show answers" is pressed
@@ -48,6 +50,11 @@ ACCESSIBLE_CAPA_INPUT_TYPES = [
     'textbox',
 ]
 
+# the number of parsed problem trees to keep, so that each problem's XML only gets
+# parsed once per process rather than for each user and request
+PROBLEM_TREE_CACHE_SIZE = 512
+_PROBLEM_TREE_CACHE = LRUCache(PROBLEM_TREE_CACHE_SIZE)
+
 # these get captured as student responses
 response_properties = ["codeparam", "responseparam", "answer", "openendedparam"]
 
@@ -176,13 +183,8 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, and handle any <include file="foo"> tags
+        self._load_tree()
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -214,6 +216,31 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
+    def _load_tree(self):
+        """
+        Set `self.tree` to the element tree of the problem XML, made compatible and
+        with any <include file="foo"> tags replaced by the included files.
+
+        None of this depends on the seed or the student's state, so the resulting tree
+        is cached per process by the hash of the problem XML. Problems with the same
+        XML then only copy the cached tree, since later processing modifies it.
+        """
+        problem_text = self.problem_text
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        # the included files are read from the filestore
+        cache_key = (hashlib.sha1(problem_text).hexdigest(), repr(self.capa_system.filestore))
+
+        cached_tree = _PROBLEM_TREE_CACHE.get(cache_key)
+        if cached_tree is not None:
+            self.tree = deepcopy(cached_tree)
+            return
+
+        self.tree = etree.XML(self.problem_text)
+        self.make_xml_compatible(self.tree)
+        if self._process_includes():
+            _PROBLEM_TREE_CACHE.set(cache_key, deepcopy(self.tree))
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -608,7 +635,10 @@ class LoncapaProblem(object):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
         into our XML tree.  Fail gracefully if debugging.
+
+        Returns whether all of the included files were inserted.
         """
+        all_included = True
         includes = self.tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file').decode('utf-8')
@@ -630,6 +660,7 @@ class LoncapaProblem(object):
                     if not self.capa_system.DEBUG:
                         raise
                     else:
+                        all_included = False
                         continue
                 try:
                     # read in and convert to XML
@@ -646,6 +677,7 @@ class LoncapaProblem(object):
                     if not self.capa_system.DEBUG:
                         raise
                     else:
+                        all_included = False
                         continue
 
                 # insert new XML into tree in place of include
@@ -654,6 +686,8 @@ class LoncapaProblem(object):
                 parent.remove(inc)
                 log.debug('Included %s into %s', filename, self.problem_id)
 
+        return all_included
+
     def _extract_system_path(self, script):
         """
         Extracts and normalizes additional paths for code execution.
@@ -40,13 +40,14 @@ import capa.safe_exec as safe_exec
 import capa.xqueue_interface as xqueue_interface
 import dogstats_wrapper as dog_stats_api
 # specific library imports
-from calc import UndefinedVariable, evaluator
+from calc import UndefinedVariable, VectorizationError, evaluator, vector_evaluator
 from cmath import isnan
 from openedx.core.djangolib.markup import HTML, Text
 
 from . import correctmap
 from .registry import TagRegistry
 from .util import (
+    compare_all_with_tolerance,
     compare_with_tolerance,
     contextualize_text,
     convert_files_to_filenames,
@@ -3091,6 +3092,14 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
+        if var_dict_list:
+            try:
+                return self.tupleize_answers_vectorized(answer, var_dict_list)
+            except (VectorizationError, UndefinedVariable, ParseException) as err:
+                # Evaluate the test cases one at a time instead, which also
+                # reports any problem with the answer.
+                log.debug('formularesponse: evaluating formula=%s per sample: %s', cgi.escape(answer), err)
+
         out = []
         for var_dict in var_dict_list:
             try:
@@ -3142,6 +3151,25 @@ class FormulaResponse(LoncapaResponse):
                 )
         return out
 
+    def tupleize_answers_vectorized(self, answer, var_dict_list):
+        """
+        Like tupleize_answers, but evaluates the answer for all test cases at once,
+        as numpy operations on arrays of the variables' values.
+
+        Raises VectorizationError if the answer can't be evaluated this way, and
+        UndefinedVariable or ParseException if it isn't a valid formula, without
+        reporting it to the student.
+        """
+        variables = {
+            var: numpy.array([var_dict[var] for var_dict in var_dict_list])
+            for var in var_dict_list[0]
+        }
+        results = vector_evaluator(variables, dict(), answer, case_sensitive=self.case_sensitive)
+        if numpy.ndim(results) == 0:
+            # The answer doesn't depend on the variables.
+            results = numpy.repeat(results, len(var_dict_list))
+        return results
+
     def randomize_variables(self, samples):
         """
         Returns a list of dictionaries mapping variables to random values in range,
@@ -3174,8 +3202,7 @@ class FormulaResponse(LoncapaResponse):
         student_result = self.tupleize_answers(given, var_dict_list)
         instructor_result = self.tupleize_answers(expected, var_dict_list)
 
-        correct = all(compare_with_tolerance(student, instructor, self.tolerance)
-                      for student, instructor in zip(student_result, instructor_result))
+        correct = compare_all_with_tolerance(student_result, instructor_result, self.tolerance)
         if correct:
             return "correct"
         else:
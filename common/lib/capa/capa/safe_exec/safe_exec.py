@@ -3,11 +3,17 @@
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
+from codejail.jail_code import is_configured
 from . import lazymod
+from .worker_pool import WorkerPool
 from dogapi import dog_stats_api
+from openedx.core.lib.cache_utils import LRUCache
 from six import text_type
 
 import hashlib
+import json
+from collections import Counter
+from copy import deepcopy
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -37,6 +43,10 @@ ASSUMED_IMPORTS = [
     ("draganddrop", "verifiers.draganddrop"),
 ]
 
+# The globals that `json_safe` can send to the sandbox.
+JSON_SAFE_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+JSON_UNSAFE_NAMES = ("__builtins__",)
+
 # We'll need the code from lazymod.py for use in safe_exec, so read it now.
 lazymod_py_file = lazymod.__file__
 if lazymod_py_file.endswith("c"):
@@ -50,6 +60,45 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Results of recent executions, kept in-process in front of the shared cache
+# passed to safe_exec.  Entries are (emsg, cleaned_results), as in that cache.
+LOCAL_CACHE_SIZE = 256
+LOCAL_CACHE = LRUCache(LOCAL_CACHE_SIZE)
+
+# Digests of the string globals seen recently, keyed by the string itself.
+# Problems pass the same large strings (e.g. the submitted answers and the
+# problem's own script text) on every check, so `cache_key` doesn't need to
+# encode and hash them each time.
+STRING_DIGESTS_SIZE = 1024
+_STRING_DIGESTS = LRUCache(STRING_DIGESTS_SIZE)
+
+# How often each cache tier answered, and how often the code had to run.
+CACHE_STATS = Counter()
+
+# The pool of pre-warmed sandboxes, if one has been configured.
+WORKER_POOL = None
+
+
+def configure_worker_pool(size, max_runs=100):
+    """
+    Run sandboxed code in a pool of `size` persistent interpreters.
+
+    Each interpreter has the `ASSUMED_IMPORTS` modules already imported, and
+    is replaced after `max_runs` executions.  A `size` of 0 turns the pool off,
+    so that every execution spawns its own sandboxed process.
+
+    Returns the new pool, if any.
+
+    """
+    global WORKER_POOL  # pylint: disable=global-statement
+    if WORKER_POOL is not None:
+        WORKER_POOL.close()
+    if size:
+        WORKER_POOL = WorkerPool(size, max_runs, modules=[modname for _, modname in ASSUMED_IMPORTS])
+    else:
+        WORKER_POOL = None
+    return WORKER_POOL
+
 
 def update_hash(hasher, obj):
     """
@@ -74,6 +123,61 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def _value_digest(value):
+    """
+    Return the md5 digest of `value`'s canonical JSON text, or None if it
+    can't be serialized.
+    """
+    is_string = isinstance(value, basestring)
+    if is_string:
+        # Equal str and unicode values share an entry, which is fine since
+        # they encode to the same JSON text.
+        digest = _STRING_DIGESTS.get(value)
+        if digest is not None:
+            return digest
+    try:
+        encoded = json.dumps(value, sort_keys=True)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    digest = hashlib.md5(encoded).digest()
+    if is_string:
+        _STRING_DIGESTS.set(value, digest)
+    return digest
+
+
+def cache_key(code, globals_dict, random_seed):
+    """
+    Compute the cache key for executing `code` with `globals_dict`.
+
+    Only the JSON-safe globals are sent to the sandbox, so only they are part
+    of the key.  Each one is hashed as its canonical JSON text, which is what
+    `json_safe` would reduce it to, without building a copy of the globals.
+    The digests of string values are remembered in `_STRING_DIGESTS`.
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    for name in sorted(globals_dict):
+        value = globals_dict[name]
+        if name in JSON_UNSAFE_NAMES or not isinstance(value, JSON_SAFE_TYPES):
+            continue
+        digest = _value_digest(value)
+        if digest is None:
+            # json_safe leaves out anything that can't be serialized.
+            continue
+        md5er.update(repr(name))
+        md5er.update(digest)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _record_cache_result(result):
+    """
+    Count a cache `result`: 'local_hit', 'shared_hit' or 'miss'.
+    """
+    CACHE_STATS[result] += 1
+    dog_stats_api.increment('capa.safe_exec.cache', tags=[u'result:{}'.format(result)])
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -103,7 +207,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  Recent results are also kept in `LOCAL_CACHE`, which is
+    checked before `cache`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -111,14 +216,20 @@ def safe_exec(
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
     """
-    # Check the cache for a previous result.
+    # Check the caches for a previous result, this process's first.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = cache_key(code, globals_dict, random_seed)
+        cached = LOCAL_CACHE.get(key)
+        if cached is not None:
+            _record_cache_result('local_hit')
+            cached = deepcopy(cached)
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                _record_cache_result('shared_hit')
+                LOCAL_CACHE.set(key, deepcopy(cached))
+            else:
+                _record_cache_result('miss')
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -137,12 +248,22 @@ def safe_exec(
     else:
         exec_fn = codejail_safe_exec
 
+    # The worker pool can only run code that doesn't need files copied into
+    # the sandbox.
+    pooled = (
+        not unsafely and WORKER_POOL is not None and
+        not python_path and not extra_files and is_configured("python")
+    )
+
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        if pooled:
+            WORKER_POOL.execute(code_prolog + LAZY_IMPORTS + code, globals_dict, slug=slug)
+        else:
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = text_type(e)
     else:
@@ -153,6 +274,7 @@ def safe_exec(
     if cache:
         cleaned_results = json_safe(globals_dict)
         cache.set(key, (emsg, cleaned_results))
+        LOCAL_CACHE.set(key, deepcopy((emsg, cleaned_results)))
 
     # If an exception happened, raise it now.
     if emsg:
@@ -4,16 +4,27 @@ import hashlib
 import os
 import os.path
 import random
+import subprocess
 import textwrap
+import time
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 from six import text_type
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import configure_worker_pool, safe_exec, update_hash
+from capa.safe_exec.safe_exec import CACHE_STATS, LOCAL_CACHE, _STRING_DIGESTS, cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
 
 class TestSafeExec(unittest.TestCase):
     def test_set_values(self):
@@ -111,6 +122,11 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super(TestSafeExecCaching, self).setUp()
+        LOCAL_CACHE.clear()
+        CACHE_STATS.clear()
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -123,10 +139,12 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Fiddle with the cache, then try it again.
         cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_CACHE.clear()
 
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
+        self.assertEqual(CACHE_STATS, {'miss': 1, 'shared_hit': 1})
 
     def test_cache_large_code_chunk(self):
         # Caching used to die on memcache with more than 250 bytes of code.
@@ -154,6 +172,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change the value stored in the cache, the result should change.
         cache[cache.keys()[0]] = ("Hey there!", {})
+        LOCAL_CACHE.clear()
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
@@ -164,9 +183,58 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change it again, now no exception!
         cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_CACHE.clear()
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_local_cache_hit(self):
+        cache = {}
+        safe_exec("a = [int(math.pi)]", {}, cache=DictCache(cache))
+
+        # The second execution is answered without asking the shared cache.
+        cache.clear()
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+        self.assertEqual(cache, {})
+        self.assertEqual(CACHE_STATS, {'miss': 1, 'local_hit': 1})
+
+        # Changing the results we got back doesn't change the cached ones.
+        g['a'].append(4)
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+
+    def test_local_cache_is_bounded(self):
+        with patch.object(LOCAL_CACHE, 'max_size', 2):
+            for value in range(3):
+                safe_exec("a = 1", {'b': value}, cache=DictCache({}))
+            safe_exec("a = 1", {'b': 0}, cache=DictCache({}))
+        self.assertEqual(CACHE_STATS, {'miss': 4})
+
+    def test_cache_key(self):
+        key = cache_key("a = b", {'b': [1, (2, 3)], 'c': {'d': 'e'}}, 17)
+        self.assertTrue(key.startswith("safe_exec.17."))
+        # Globals that reach the sandbox the same way have the same key.
+        self.assertEqual(key, cache_key("a = b", {'c': {u'd': u'e'}, 'b': [1, [2, 3]]}, 17))
+        # Globals that can't be sent to the sandbox aren't part of the key.
+        self.assertEqual(key, cache_key("a = b", {'b': [1, (2, 3)], 'c': {'d': 'e'}, 'f': object()}, 17))
+        self.assertEqual(key, cache_key("a = b", {'b': [1, (2, 3)], 'c': {'d': 'e'}, 'f': [set()]}, 17))
+        self.assertNotEqual(key, cache_key("a = b", {'b': [1, (2, 3)], 'c': {'d': 'e'}}, 18))
+        self.assertNotEqual(key, cache_key("a = c", {'b': [1, (2, 3)], 'c': {'d': 'e'}}, 17))
+        self.assertNotEqual(key, cache_key("a = b", {'b': [1, (2, 4)], 'c': {'d': 'e'}}, 17))
+        self.assertNotEqual(key, cache_key("a = b", {'b': [1, (2, 3)], 'c': {'d': 'e'}, 'f': 1}, 17))
+
+    def test_cache_key_remembers_string_digests(self):
+        _STRING_DIGESTS.clear()
+        key = cache_key("a = b", {'b': "x" * 1000, 'c': [1]}, 17)
+        self.assertEqual(len(_STRING_DIGESTS), 1)
+        with patch('capa.safe_exec.safe_exec.json.dumps') as mock_dumps:
+            mock_dumps.return_value = "[1]"
+            self.assertEqual(key, cache_key("a = b", {'b': u"x" * 1000, 'c': [1]}, 17))
+        # Only the list had to be encoded again.
+        mock_dumps.assert_called_once_with([1], sort_keys=True)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -236,6 +304,130 @@ class TestUpdateHash(unittest.TestCase):
         self.assertEqual(h1, h2)
 
 
+class TestWorkerPool(unittest.TestCase):
+    """Test running code in the pool of persistent sandboxes."""
+
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        # The pool is only used when CodeJail is configured for python.
+        if not is_configured("python"):
+            raise SkipTest
+        self.pool = configure_worker_pool(2, max_runs=3)
+        self.addCleanup(configure_worker_pool, 0)
+
+    def pool_workers(self):
+        """The workers currently idle in the pool."""
+        return list(self.pool._idle.queue)  # pylint: disable=protected-access
+
+    def test_set_values(self):
+        g = {'b': 3}
+        safe_exec("a = b * 17", g)
+        self.assertEqual(g['a'], 51)
+        self.assertEqual(len(self.pool_workers()), 1)
+
+    def test_division(self):
+        g = {}
+        safe_exec("a = 1/2", g)
+        self.assertEqual(g['a'], 0.5)
+
+    def test_random_seeding(self):
+        r = random.Random(17)
+        rnums = [r.randint(0, 999) for _ in xrange(100)]
+        for _ in range(3):
+            g = {}
+            safe_exec("rnums = [random.randint(0, 999) for _ in xrange(100)]", g, random_seed=17)
+            self.assertEqual(g['rnums'], rnums)
+
+    def test_runs_are_isolated(self):
+        g = {}
+        safe_exec("import math; math.leaked = 1", g)
+        safe_exec("import math; a = hasattr(math, 'leaked')", g)
+        self.assertFalse(g['a'])
+
+    def test_runs_cant_see_earlier_requests(self):
+        safe_exec("a = secret", {'secret': "the earlier answer"})
+        g = {}
+        safe_exec(textwrap.dedent("""\
+            import __main__, sys
+            seen = [repr(vars(__main__))]
+            frame = sys._getframe()
+            while frame is not None:
+                if frame.f_code.co_name != '<module>':
+                    seen.append(repr(frame.f_locals))
+                frame = frame.f_back
+            leaked = any(("the earlier " + "answer") in text for text in seen)
+            """), g)
+        self.assertFalse(g['leaked'])
+
+    def test_runs_cant_write_to_the_pool(self):
+        g = {}
+        with self.assertRaises(SafeExecException):
+            # Only the channel for this run's own result is left open, and
+            # what the code writes to it can't forge a response.
+            safe_exec(textwrap.dedent("""\
+                import os
+                for fd in range(64):
+                    try:
+                        os.write(fd, '{"globals": {"forged": 1}}\\n')
+                    except OSError:
+                        pass
+                """), g)
+        self.assertNotIn('forged', g)
+        # The next run gets its own response.
+        safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    def test_printing_does_not_corrupt_results(self):
+        g = {}
+        safe_exec("import sys, os\nprint 'hi'\nos.write(1, 'there')\na = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", g)
+        self.assertIn("ZeroDivisionError", text_type(cm.exception))
+        # The worker is still healthy after the code failed.
+        self.assertEqual(len(self.pool_workers()), 1)
+
+    def test_workers_are_recycled(self):
+        g = {}
+        safe_exec("a = 1", g)
+        worker = self.pool_workers()[0]
+        safe_exec("a = 2", g)
+        self.assertEqual(self.pool_workers(), [worker])
+        safe_exec("a = 3", g)
+        # The worker has served max_runs executions, so it was retired.
+        self.assertEqual(self.pool_workers(), [])
+        self.assertIsNotNone(worker.process.poll())
+
+    def test_timeouts_kill_the_worker(self):
+        g = {}
+        safe_exec("a = 1", g)
+        worker = self.pool_workers()[0]
+        with patch.dict("codejail.jail_code.LIMITS", {"REALTIME": 1}):
+            with self.assertRaises(SafeExecException):
+                safe_exec("import time; time.sleep(30)", g)
+        # The worker and the child running the code were killed.
+        self.assertEqual(self.pool_workers(), [])
+        self.assertIsNotNone(worker.process.poll())
+        # Killed processes may linger briefly as zombies until they're reaped.
+        deadline = time.time() + 10
+        with open(os.devnull, "w") as devnull:
+            while subprocess.call(["pgrep", "-g", str(worker.process.pid)], stdout=devnull) != 1:
+                self.assertLess(time.time(), deadline, "The worker's processes are still running")
+                time.sleep(0.1)
+        # The pool still runs code.
+        safe_exec("a = 2", g)
+        self.assertEqual(g['a'], 2)
+
+    def test_python_path_bypasses_pool(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(self.pool_workers(), [])
+
+
 class TestRealProblems(unittest.TestCase):
     def test_802x(self):
         code = textwrap.dedent("""\
@@ -302,3 +494,33 @@ class TestRealProblems(unittest.TestCase):
         g = {}
         safe_exec(code, g)
         self.assertIn("aVAP", g)
+
+
+# Use this attribute to skip this test on regular unittest CI runs.
+@unittest.skip
+class WorkerPoolBenchmark(unittest.TestCase):
+    """
+    Measure the latency of short sandboxed executions, spawning a sandbox
+    per call and using the pool of persistent sandboxes.
+    """
+    perf_test = True
+    NUM_EXECUTIONS = 50
+    CODE = textwrap.dedent("""\
+        import numpy
+        x = numpy.array([random.random() for _ in range(10)])
+        answer = float(numpy.dot(x, x))
+        """)
+
+    def test_benchmark(self):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        for pool_size in (0, 1):
+            configure_worker_pool(pool_size)
+            try:
+                desc = "SafeExec:worker pool size {}:{} executions".format(pool_size, self.NUM_EXECUTIONS)
+                with CodeBlockTimer(desc):
+                    for _ in xrange(self.NUM_EXECUTIONS):
+                        safe_exec(self.CODE, {}, random_seed=random.randint(0, 999))
+            finally:
+                configure_worker_pool(0)
@@ -0,0 +1,436 @@
+"""
+A pool of persistent, pre-warmed codejail interpreters.
+
+Spawning a fresh sandboxed Python for every `safe_exec` call means paying for
+interpreter startup and for importing numpy, scipy and friends each time,
+which dominates the cost of the short `<script>` blocks most problems use.
+
+A `WorkerPool` instead keeps a few sandboxed interpreters running.  Each one
+is started through the same codejail command line (and sandbox user) as
+`codejail.jail_code`, imports the `ASSUMED_IMPORTS` modules once, and then
+serves requests read from its stdin.  Every request is read and executed by
+a forked child of the worker, which closes every file descriptor except the
+pipe for its result and applies the codejail resource limits before running
+any code.  The worker never reads requests itself, and re-encodes each result
+before passing it on, so one submission can't see another's state or forge
+another's response.
+
+Requests and responses are single JSON lines, using the same contract as
+`codejail.safe_exec.safe_exec`: the code and the JSON-safe globals go in, and
+the JSON-able globals come back out.
+
+Workers are recycled after `max_runs` requests, and killed and replaced
+whenever they fail, time out or return something unreadable.  Like codejail,
+each worker runs in its own process group, so that killing it also kills the
+child running the code, and gets a private writable `tmp` directory as its
+TMPDIR, which is emptied after every request.
+
+"""
+
+import json
+import logging
+import os
+import os.path
+import Queue
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# The program each pooled interpreter runs.  It is formatted with the modules
+# to pre-import and the resource limits to apply to each request.
+WORKER_SCRIPT = textwrap.dedent("""\
+    import os
+    import resource
+    import shutil
+    import sys
+    import traceback
+    try:
+        import simplejson as json
+    except ImportError:
+        import json
+
+    for modname in %(modules)r:
+        try:
+            __import__(modname)
+        except Exception:
+            pass
+
+    LIMITS = %(limits)r
+
+    class DevNull(object):
+        def write(self, *args, **kwargs):
+            pass
+
+    ok_types = (
+        type(None), int, long, float, str, unicode, list, tuple, dict
+    )
+    bad_keys = ("__builtins__",)
+
+    def jsonable(v):
+        if not isinstance(v, ok_types):
+            return False
+        try:
+            json.dumps(v)
+        except Exception:
+            return False
+        return True
+
+    def run(request, channel):
+        pid = os.getpid()
+        for name, value in LIMITS:
+            limit = getattr(resource, name)
+            resource.setrlimit(limit, (value, value))
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        sys.stdin = open(os.devnull)
+        sys.stdout = DevNull()
+        code, g_dict = json.loads(request)
+        try:
+            exec code in g_dict
+        except BaseException:
+            response = {"error": traceback.format_exc()}
+        else:
+            response = {"globals": {
+                k: v
+                for k, v in g_dict.iteritems()
+                if jsonable(v) and k not in bad_keys
+            }}
+        if os.getpid() != pid:
+            return
+        data = json.dumps(response)
+        while data:
+            data = data[os.write(channel, data):]
+
+    def clean_tmp():
+        for name in os.listdir("tmp"):
+            path = os.path.join("tmp", name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def open_fds():
+        try:
+            return [int(fd) for fd in os.listdir("/proc/self/fd")]
+        except OSError:
+            return range(os.sysconf("SC_OPEN_MAX"))
+
+    def child(channel, null_fd):
+        # Only the child reads the request, so the worker itself never holds
+        # one in memory for later children to find.
+        request = sys.stdin.readline()
+        if not request:
+            return
+        # Tell the worker a request arrived, before any code can run.
+        os.write(channel, REQUEST_READ)
+        # Leave the code nothing but the channel for its result: not the
+        # worker's stdin, nor the pipe the worker answers the pool on.
+        for fd in (0, 1, 2):
+            os.dup2(null_fd, fd)
+        for fd in open_fds():
+            if fd > 2 and fd != channel:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        run(request, channel)
+
+    def checked_response(data, status):
+        # Re-encode what the child sent, so that a response is always one
+        # well-formed line, whatever the code wrote to its channel.
+        if status != 0:
+            return json.dumps({
+                "error": "Sandboxed process died with status code: %%d" %% status
+            })
+        try:
+            response = json.loads(data)
+        except ValueError:
+            response = None
+        if isinstance(response, dict) and (
+            response.keys() == ["error"] and isinstance(response["error"], basestring) or
+            response.keys() == ["globals"] and isinstance(response["globals"], dict)
+        ):
+            return json.dumps(response)
+        return json.dumps({"error": "Sandboxed process returned a malformed response"})
+
+    def serve_one(responses, null_fd):
+        # Each request is served in a new frame, so nothing from an earlier
+        # request is left in a frame that a forked child can walk up to.
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                child(write_fd, null_fd)
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        chunks = []
+        while True:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+        data = "".join(chunks)
+        if not data.startswith(REQUEST_READ):
+            # The pool closed our stdin, so there are no more requests.
+            return False
+        clean_tmp()
+        responses.write(checked_response(data[len(REQUEST_READ):], status) + "\\n")
+        responses.flush()
+        return True
+
+    def main():
+        # Keep the real stdout for responses, and point fd 1 at /dev/null so
+        # that nothing the sandboxed code prints can corrupt the protocol.
+        responses = os.fdopen(os.dup(1), "w")
+        null_fd = os.open(os.devnull, os.O_RDWR)
+        os.dup2(null_fd, 1)
+
+        # Tell the pool we're warmed up and ready for requests.
+        responses.write("ready\\n")
+        responses.flush()
+
+        while serve_one(responses, null_fd):
+            pass
+
+    # What a child writes to its channel as soon as it has read a request.
+    REQUEST_READ = "+"
+
+    main()
+""")
+
+# How long to wait for a new worker to finish its imports, in seconds.
+STARTUP_TIMEOUT = 60
+
+# The codejail resource limits that can be applied with setrlimit in the
+# forked child, and the `resource` constant each one maps to.
+RLIMITS = (
+    ("CPU", "RLIMIT_CPU"),
+    ("VMEM", "RLIMIT_AS"),
+    ("FSIZE", "RLIMIT_FSIZE"),
+)
+
+
+class WorkerError(Exception):
+    """
+    A pooled interpreter misbehaved and has to be replaced.
+    """
+    pass
+
+
+class PooledWorker(object):
+    """
+    One running sandboxed interpreter, serving requests over a pipe.
+    """
+    def __init__(self, modules):
+        command = jail_code.COMMANDS["python"]
+        self.user = command["user"]
+        self.tmpdir = tempfile.mkdtemp(prefix="codejail-pool-")
+        os.chmod(self.tmpdir, 0o755)
+        # A world-writable directory for the sandboxed code's temp files.
+        os.mkdir(os.path.join(self.tmpdir, "tmp"))
+        os.chmod(os.path.join(self.tmpdir, "tmp"), 0o777)
+        limits = [
+            (rlimit, jail_code.LIMITS[name])
+            for name, rlimit in RLIMITS
+            if jail_code.LIMITS.get(name)
+        ]
+        with open(os.path.join(self.tmpdir, "pool_worker.py"), "w") as script:
+            script.write(WORKER_SCRIPT % {"modules": list(modules), "limits": limits})
+
+        cmd = []
+        if self.user:
+            cmd.extend(["sudo", "-u", self.user, "TMPDIR=tmp"])
+        cmd.extend(command["cmdline_start"])
+        cmd.append("pool_worker.py")
+
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmd,
+                cwd=self.tmpdir,
+                env={"OPENBLAS_NUM_THREADS": "1", "TMPDIR": "tmp"},
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull,
+                close_fds=True,
+                # Start a new process group, so the worker and the children
+                # it forks can all be killed together.
+                preexec_fn=os.setsid,
+            )
+        self.runs = 0
+        try:
+            self._read_line(STARTUP_TIMEOUT)
+        except WorkerError:
+            self.close()
+            raise
+
+    def run(self, code, globals_dict, timeout=None):
+        """
+        Execute `code` with `globals_dict`, returning the response dict.
+
+        `timeout` is the number of wall-clock seconds to wait for the answer,
+        or None to wait indefinitely.  Raises `WorkerError` if the worker
+        doesn't produce a well-formed response in time.
+
+        """
+        self.runs += 1
+        request = json.dumps([code, json_safe(globals_dict)])
+        try:
+            self.process.stdin.write(request + "\n")
+            self.process.stdin.flush()
+        except (IOError, OSError) as err:
+            raise WorkerError("Couldn't send request to worker: {}".format(err))
+
+        line = self._read_line(timeout)
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise WorkerError("Worker returned a malformed response: {!r}".format(line[:200]))
+
+    def _read_line(self, timeout):
+        """
+        Read one newline-terminated response from the worker's stdout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        fd = self.process.stdout.fileno()
+        chunks = []
+        while True:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                raise WorkerError("Worker timed out")
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                raise WorkerError("Worker timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WorkerError("Worker exited with status code: {}".format(self.process.poll()))
+            chunks.append(chunk)
+            if chunk.endswith("\n"):
+                return "".join(chunks)
+
+    def close(self):
+        """
+        Shut the worker down, forcefully if it doesn't exit on its own.
+        """
+        try:
+            self.process.stdin.close()
+        except (IOError, OSError):
+            pass
+        if self.process.poll() is None:
+            self._kill()
+        self.process.wait()
+        if self.user:
+            # The sandbox user owns whatever the code left in tmp.
+            subprocess.call([
+                "sudo", "-u", self.user,
+                "find", os.path.join(self.tmpdir, "tmp"), "-mindepth", "1", "-maxdepth", "1",
+                "-exec", "rm", "-rf", "{}", ";"
+            ])
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _kill(self):
+        """
+        Kill the worker's whole process group, including any child that is
+        still running code.
+        """
+        pgid = self.process.pid
+        if self.user:
+            # A process started with sudo can't be killed directly, so kill the
+            # group the way codejail kills jailed code that runs too long.
+            subprocess.call(["sudo", "pkill", "-9", "-g", str(pgid)])
+        else:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class WorkerPool(object):
+    """
+    A bounded pool of `PooledWorker`s.
+
+    At most `size` requests run at once; callers beyond that wait for a free
+    worker.  Workers are started on first use and retired after `max_runs`
+    requests, or as soon as they fail.
+
+    """
+    def __init__(self, size, max_runs, modules=()):
+        self.size = size
+        self.max_runs = max_runs
+        self.modules = tuple(modules)
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = Queue.Queue()
+
+    def execute(self, code, globals_dict, slug=None):
+        """
+        Execute `code` in a pooled sandbox, updating `globals_dict`.
+
+        This behaves like `codejail.safe_exec.safe_exec`: the JSON-able
+        results are merged into `globals_dict`, and any failure of the code
+        raises `SafeExecException`.
+
+        """
+        with self._slots:
+            worker = None
+            try:
+                worker = self._checkout()
+                response = worker.run(code, globals_dict, timeout=jail_code.LIMITS.get("REALTIME") or None)
+            except WorkerError as err:
+                log.warning("Replacing sandbox worker after failure running %s: %s", slug, err)
+                if worker is not None:
+                    worker.close()
+                raise SafeExecException(
+                    "Couldn't execute jailed code: {}".format(err)
+                )
+            self._checkin(worker)
+
+        if "error" in response:
+            raise SafeExecException((
+                "Couldn't execute jailed code: stdout: '', "
+                "stderr: {!r} with status code: 1"
+            ).format(response["error"]))
+        globals_dict.update(response["globals"])
+
+    def _checkout(self):
+        """
+        Get an idle worker, starting a new one if there is none.
+        """
+        try:
+            return self._idle.get_nowait()
+        except Queue.Empty:
+            return PooledWorker(self.modules)
+
+    def _checkin(self, worker):
+        """
+        Return `worker` to the pool, or retire it if it has run enough.
+        """
+        if worker.runs >= self.max_runs:
+            worker.close()
+        else:
+            self._idle.put(worker)
+
+    def close(self):
+        """
+        Shut down all idle workers.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except Queue.Empty:
+                return
+            worker.close()
@@ -2,9 +2,11 @@
 Test capa problem.
 """
 import ddt
+from mock import patch
 import textwrap
 from lxml import etree
 import unittest
+import uuid
 
 from capa.tests.helpers import new_loncapa_problem
 
@@ -454,6 +456,31 @@ class CAPAProblemTest(unittest.TestCase):
         self.assert_question_tag(question1, question2, tag='label', label_attr=False)
         self.assert_question_tag(question1, question2, tag='p', label_attr=True)
 
+    def test_problem_tree_cache(self):
+        """
+        Verify that problems with the same XML only parse it once, and get their own copies of the tree.
+        """
+        xml = """
+        <problem>
+            <p>{}</p>
+            <optionresponse>
+                <optioninput>
+                    <option correct="False">apple</option>
+                    <option correct="True">banana</option>
+                </optioninput>
+            </optionresponse>
+        </problem>
+        """.format(uuid.uuid4().hex)
+        with patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            first_problem = new_loncapa_problem(xml)
+            second_problem = new_loncapa_problem(xml, seed=2)
+        self.assertEqual(len([call for call in mock_xml.call_args_list if call[0][0] == xml]), 1)
+
+        self.assertIsNot(first_problem.tree, second_problem.tree)
+        self.assertEqual(etree.tostring(first_problem.tree), etree.tostring(second_problem.tree))
+        # the tree was made compatible before it was cached
+        self.assertEqual(second_problem.tree.find('.//optioninput').get('correct'), 'banana')
+
 
 @ddt.ddt
 class CAPAMultiInputProblemTest(unittest.TestCase):
@@ -575,6 +575,55 @@ class FormulaResponseTest(ResponseTest):
         self.assertTrue(problem.responders.values()[0].validate_answer('14*x'))
         self.assertFalse(problem.responders.values()[0].validate_answer('3*y+2*x'))
 
+    def test_vectorized_evaluation(self):
+        """
+        Test that the samples of formulas are evaluated all at once
+        """
+        sample_dict = {'x': (-10, 10), 'y': (1, 2)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance=0.01,
+                                     answer="sin(x)^2 + y")
+        with mock.patch('capa.responsetypes.evaluator') as mock_evaluator:
+            self.assert_grade(problem, "y + 1 - cos(x)^2", "correct")
+            self.assert_grade(problem, "y + 1 - sin(x)^2", "incorrect")
+        self.assertFalse(mock_evaluator.called)
+
+    def test_vectorized_evaluation_matches_evaluator(self):
+        sample_dict = {'x': (-10, 10), 'y': (1, 2)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance=0.01,
+                                     answer="x")
+        responder = problem.responders.values()[0]
+        var_dict_list = responder.randomize_variables(responder.samples)
+        for formula in ("3", "x^2 - y/2", "x || y", "sqrt(x) * e^(j*y)", "arcsec(y) + 2.5k"):
+            expected = [calc.evaluator(var_dict, {}, formula) for var_dict in var_dict_list]
+            actual = responder.tupleize_answers_vectorized(formula, var_dict_list)
+            self.assertEqual(len(actual), len(expected))
+            for actual_value, expected_value in zip(actual, expected):
+                self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_vectorized_evaluation_fallback(self):
+        """
+        Test that formulas which can't be evaluated all at once are evaluated per sample
+        """
+        sample_dict = {'x': (1, 2)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance="1%",
+                                     answer="6*x")
+        # factorial only accepts single values
+        self.assert_grade(problem, "fact(3)*x", "correct")
+        # dividing by zero raises a floating point error for arrays, but gives NaN per sample
+        self.assert_grade(problem, "(x-x)||x", "incorrect")
+        # invalid formulas are reported by the per sample evaluation
+        self.assertRaises(StudentInputError, problem.grade_answers, {'1_2_1': 'z*x'})
+        self.assertRaises(StudentInputError, problem.grade_answers, {'1_2_1': 'x+'})
+        # other errors aren't hidden by the fallback
+        with mock.patch('capa.responsetypes.vector_evaluator', side_effect=MemoryError):
+            self.assertRaises(MemoryError, problem.grade_answers, {'1_2_1': '6*x'})
+
 
 class StringResponseTest(ResponseTest):  # pylint: disable=missing-docstring
     xml_factory_class = StringResponseXMLFactory
@@ -5,7 +5,13 @@ import unittest
 from lxml import etree
 
 from capa.tests.helpers import test_capa_system
-from capa.util import compare_with_tolerance, sanitize_html, get_inner_html_from_xpath, remove_markup
+from capa.util import (
+    compare_all_with_tolerance,
+    compare_with_tolerance,
+    sanitize_html,
+    get_inner_html_from_xpath,
+    remove_markup
+)
 
 
 class UtilTest(unittest.TestCase):
@@ -106,6 +112,29 @@ class UtilTest(unittest.TestCase):
         result = compare_with_tolerance(111.0, complex(100.0, 0), '10%', True)
         self.assertTrue(result)
 
+    def test_compare_all_with_tolerance(self):
+        """
+        Test that comparing arrays of results agrees with comparing each pair of results
+        """
+        infinity = float('Inf')
+        student_results = [100.0, 100.001, 101.0, 109.9, 110.1, 0.4, infinity, complex(100.0, 0.01), float('NaN')]
+        instructor_results = [100.0, 100.0, 100.0, 100.0, 100.0, 0.44, infinity, 100.0, 100.0]
+        for tolerance, relative_tolerance in (
+                ('0.001%', False), ('10%', False), ('10%', True), ('10.0', False), (0.01, False), (0.1, True)
+        ):
+            for student, instructor in zip(student_results, instructor_results):
+                self.assertEqual(
+                    compare_all_with_tolerance([student] * 3, [instructor] * 3, tolerance, relative_tolerance),
+                    compare_with_tolerance(student, instructor, tolerance, relative_tolerance),
+                )
+            self.assertEqual(
+                compare_all_with_tolerance(student_results, instructor_results, tolerance, relative_tolerance),
+                all(
+                    compare_with_tolerance(student, instructor, tolerance, relative_tolerance)
+                    for student, instructor in zip(student_results, instructor_results)
+                ),
+            )
+
     def test_sanitize_html(self):
         """
         Test for html sanitization with bleach.
@@ -5,6 +5,7 @@ import re
 from decimal import Decimal
 
 import bleach
+import numpy
 from lxml import etree
 
 from calc import evaluator
@@ -17,6 +18,11 @@ from openedx.core.djangolib.markup import HTML
 # Utility functions used in CAPA responsetypes
 default_tolerance = '0.001%'
 
+# The margin, relative to the compared values, by which `compare_all_with_tolerance` requires
+# values to be within tolerance in floating point before it trusts that `compare_with_tolerance`
+# (which rounds real values to 12 significant digits) would consider them equal.
+tolerance_comparison_margin = 1e-10
+
 
 def compare_with_tolerance(student_complex, instructor_complex, tolerance=default_tolerance, relative_tolerance=False):
     """
@@ -94,6 +100,58 @@ def compare_with_tolerance(student_complex, instructor_complex, tolerance=defaul
         return abs(student_complex - instructor_complex) <= tolerance
 
 
+def compare_all_with_tolerance(student_results, instructor_results, tolerance=default_tolerance,
+                               relative_tolerance=False):
+    """
+    Return whether each of the student results is equal to the instructor result at the same
+    index, within the tolerance. See `compare_with_tolerance` for the meaning of the arguments.
+
+    The results are compared as numpy arrays, all at once. Only the pairs of results which aren't
+    clearly within the tolerance, i.e. incorrect ones, infinite ones or ones too close to the
+    tolerance bounds, are then checked one at a time with `compare_with_tolerance`.
+    """
+    def compare_pair(index):
+        """
+        Compare the results at the given index with `compare_with_tolerance`.
+        """
+        return compare_with_tolerance(
+            student_results[index], instructor_results[index], tolerance, relative_tolerance
+        )
+
+    try:
+        student_complex = numpy.asarray(student_results, dtype=complex)
+        instructor_complex = numpy.asarray(instructor_results, dtype=complex)
+        student_abs = numpy.abs(student_complex)
+        instructor_abs = numpy.abs(instructor_complex)
+
+        tolerance_value = tolerance
+        is_relative = relative_tolerance
+        if isinstance(tolerance_value, str):
+            if tolerance_value == default_tolerance:
+                is_relative = True
+            if tolerance_value.endswith('%'):
+                tolerance_value = evaluator(dict(), dict(), tolerance_value[:-1]) * 0.01
+                if not is_relative:
+                    tolerance_value = tolerance_value * instructor_abs
+            else:
+                tolerance_value = evaluator(dict(), dict(), tolerance_value)
+
+        larger_abs = numpy.maximum(student_abs, instructor_abs)
+        if is_relative:
+            tolerance_value = tolerance_value * larger_abs
+
+        with numpy.errstate(all='ignore'):
+            margin = tolerance_comparison_margin * (larger_abs + numpy.abs(tolerance_value))
+            clearly_equal = numpy.abs(student_complex - instructor_complex) <= tolerance_value - margin
+            clearly_equal &= numpy.isfinite(larger_abs)
+        to_compare = numpy.flatnonzero(~clearly_equal)
+    except (ArithmeticError, TypeError, ValueError):
+        # The results can't be compared as arrays of numbers; compare them one at a time.
+        to_compare = range(min(len(student_results), len(instructor_results)))
+
+    return all(compare_pair(index) for index in to_compare)
+
+
 def contextualize_text(text, context):  # private
     """
     Takes a string with variables. E.g. $a+$b.
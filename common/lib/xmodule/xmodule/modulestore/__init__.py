@@ -150,6 +150,15 @@ class BulkOpsRecord(object):
         """
         return self._active_count == 1
 
+    @property
+    def published_versions(self):
+        """
+        Return a tuple of the published version of the course at the start of this
+        bulk operation and its current published version, or (None, None) if the
+        modulestore doesn't track versions.
+        """
+        return None, None
+
 
 class ActiveBulkThread(threading.local):
     """
@@ -318,8 +327,14 @@ class BulkOperationsMixin(object):
         Sends out the signal that items have been published from within this course.
         """
         if self.signal_handler and bulk_ops_record.has_publish_item:
+            previous_version, published_version = bulk_ops_record.published_versions
             # We remove the branch, because publishing always means copying from draft to published
-            self.signal_handler.send("course_published", course_key=course_id.for_branch(None))
+            self.signal_handler.send(
+                "course_published",
+                course_key=course_id.for_branch(None),
+                previous_published_version=previous_version,
+                published_version=published_version,
+            )
             bulk_ops_record.has_publish_item = False
 
     def send_bulk_library_updated_signal(self, bulk_ops_record, library_id):
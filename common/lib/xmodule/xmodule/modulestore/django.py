@@ -158,12 +158,18 @@ class SignalHandler(object):
     5. The thing that listens for the signal lives in process, but should do
        almost no work. Its main job is to kick off the celery task that will
        do the actual work.
+    6. For courses in a versioned modulestore, course_published is also sent
+       with the "previous_published_version" and "published_version" structure
+       guids of the course (otherwise None), which can be passed to the
+       modulestore's diff_structures method to find the blocks that changed.
     """
 
     # If you add a new signal, please don't forget to add it to the _mapping
     # as well.
     pre_publish = SwitchedSignal("pre_publish", providing_args=["course_key"])
-    course_published = SwitchedSignal("course_published", providing_args=["course_key"])
+    course_published = SwitchedSignal(
+        "course_published", providing_args=["course_key", "previous_published_version", "published_version"]
+    )
     course_deleted = SwitchedSignal("course_deleted", providing_args=["course_key"])
     library_updated = SwitchedSignal("library_updated", providing_args=["library_key"])
     item_deleted = SwitchedSignal("item_deleted", providing_args=["usage_key", "user_id"])
@@ -122,7 +122,7 @@ class ModuleStoreDraftAndPublished(BranchSettingMixin, BulkOperationsMixin):
         """
         raise NotImplementedError
 
-    def _flag_publish_event(self, course_key):
+    def _flag_publish_event(self, course_key, published_versions=None):
         """
         Wrapper around calls to fire the course_published signal
         Unless we're nested in an active bulk operation, this simply fires the signal
@@ -130,14 +130,22 @@ class ModuleStoreDraftAndPublished(BranchSettingMixin, BulkOperationsMixin):
 
         Arguments:
             course_key - course_key to which the signal applies
+            published_versions - optional tuple of the (previous, new) published version guids
+                of the course, for modulestores which version their courses
         """
         if self.signal_handler:
             bulk_record = self._get_bulk_ops_record(course_key) if isinstance(self, BulkOperationsMixin) else None
             if bulk_record and bulk_record.active:
                 bulk_record.has_publish_item = True
             else:
+                previous_version, published_version = published_versions or (None, None)
                 # We remove the branch, because publishing always means copying from draft to published
-                self.signal_handler.send("course_published", course_key=course_key.for_branch(None))
+                self.signal_handler.send(
+                    "course_published",
+                    course_key=course_key.for_branch(None),
+                    previous_published_version=previous_version,
+                    published_version=published_version,
+                )
 
     def update_item_parent(self, item_location, new_parent_location, old_parent_location, user_id, insert_at=None):
         """
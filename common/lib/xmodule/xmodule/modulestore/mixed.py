@@ -606,6 +606,34 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_block_versions(self, course_key):
+        """
+        Returns the version info of all of the blocks in the given course,
+        without loading any of the blocks, or None if the course's
+        modulestore does not track the versions of individual blocks.
+
+        See :py:meth: xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.get_block_versions
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_block_versions')
+            return store.get_block_versions(course_key)
+        except NotImplementedError:
+            return None
+
+    def diff_structures(self, course_key, old_version_guid, new_version_guid):
+        """
+        Returns the usage keys of the blocks which were added, removed and modified
+        between the two given versions of the course, or None if the course's
+        modulestore does not version its courses.
+
+        See :py:meth: xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.diff_structures
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'diff_structures')
+            return store.diff_structures(course_key, old_version_guid, new_version_guid)
+        except NotImplementedError:
+            return None
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
@@ -83,6 +83,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
+        # definitions loaded through this runtime, keyed by definition id
+        self._definitions = {}
+        # maps the id of each not yet loaded definition to the ids of the definitions to load along with it
+        self._definition_prefetch_groups = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -159,6 +163,39 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return json_data
 
+    def add_definition_prefetch_group(self, definition_ids):
+        """
+        Record that the given definitions should all be loaded in a single query
+        the first time that any one of them is lazily loaded.
+        """
+        group = set(definition_ids).difference(self._definitions)
+        for definition_id in group:
+            self._definition_prefetch_groups[definition_id] = group
+
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition with the given id. If the definition belongs to a prefetch
+        group, load the rest of the group's definitions along with it and cache them
+        for the lifetime of this runtime.
+        """
+        if definition_id in self._definitions:
+            return self._definitions[definition_id]
+
+        group = self._definition_prefetch_groups.pop(definition_id, None)
+        if not group:
+            return self.modulestore.get_definition(course_key, definition_id)
+
+        definition_ids = [other_id for other_id in group if other_id not in self._definitions]
+        for other_id in definition_ids:
+            self._definition_prefetch_groups.pop(other_id, None)
+        for definition in self.modulestore.get_definitions(course_key, definition_ids):
+            self._definitions[definition['_id']] = definition
+        if definition_id not in self._definitions:
+            # Missing definitions aren't cached; load this one on its own, so
+            # that it fails the same way as a definition outside of any group.
+            return self.modulestore.get_definition(course_key, definition_id)
+        return self._definitions[definition_id]
+
     # xblock's runtime does not always pass enough contextual information to figure out
     # which named container (course x branch) or which parent is requesting an item. Because split allows
     # a many:1 mapping from named containers to structures and because item's identities encode
@@ -198,6 +235,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 block_key.type,
                 definition_id,
                 convert_fields,
+                runtime=self,
             )
         else:
             definition_loader = None
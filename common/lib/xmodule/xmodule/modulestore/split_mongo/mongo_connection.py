@@ -8,6 +8,8 @@ import zlib
 import pymongo
 import pytz
 import re
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -15,6 +17,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -225,11 +228,113 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLRUCache(object):
+    """
+    A bounded, per-process, least-recently-used cache of course structures,
+    keyed by structure id.
+
+    Structures are immutable per version guid, so a structure that has been
+    unpickled once can be handed out again without going back to memcached.
+    The cache is bounded by the (uncompressed, pickled) size of the structures
+    it holds, rather than by the number of structures.
+
+    Callers must treat the returned structures as read-only; the split
+    modulestore already copies a structure before creating a new version of it.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the structure stored for ``key`` (marking it as most recently
+        used), or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, structure, size):
+        """
+        Store ``structure`` under ``key``, evicting the least recently used
+        structures until the cache fits in ``max_bytes``.
+
+        Arguments:
+            key: The structure id.
+            structure (dict): The structure to cache.
+            size (int): The size of the structure, in bytes.
+
+        Returns:
+            The number of structures that were evicted.
+        """
+        if size > self.max_bytes:
+            return 0
+
+        evictions = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                evictions += 1
+
+            self._entries[key] = (structure, size)
+            self.current_bytes += size
+        return evictions
+
+    def clear(self):
+        """
+        Remove all structures from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_STRUCTURE_LRU_CACHE = None
+
+
+def get_structure_lru_cache():
+    """
+    Return the process-wide :class:`StructureLRUCache`, or None if it is disabled.
+
+    The cache is sized by the ``COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES`` setting,
+    which the LMS and Studio set to 64MB.  A value of 0 turns it off, as does
+    leaving the setting out or running without Django.
+    """
+    global _STRUCTURE_LRU_CACHE  # pylint: disable=global-statement
+
+    max_bytes = 0
+    if DJANGO_AVAILABLE:
+        max_bytes = getattr(settings, 'COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES', 0)
+
+    if not max_bytes:
+        _STRUCTURE_LRU_CACHE = None
+    elif _STRUCTURE_LRU_CACHE is None or _STRUCTURE_LRU_CACHE.max_bytes != max_bytes:
+        _STRUCTURE_LRU_CACHE = StructureLRUCache(max_bytes)
+
+    return _STRUCTURE_LRU_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Structures are also kept, unpickled, in a bounded per-process LRU tier
+    (see :class:`StructureLRUCache`) that is consulted before the django cache.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
@@ -240,13 +345,23 @@ class CourseStructureCache(object):
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+        self.lru_cache = get_structure_lru_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
-        if self.cache is None:
+        if self.cache is None and self.lru_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            if self.lru_cache is not None:
+                structure = self.lru_cache.get(key)
+                tagger.tag(from_lru_cache=str(structure is not None).lower())
+                if structure is not None:
+                    return structure
+
+            if self.cache is None:
+                return None
+
             compressed_pickled_data = self.cache.get(key)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
@@ -260,16 +375,22 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            return pickle.loads(pickled_data)
+            structure = pickle.loads(pickled_data)
+            self._set_lru(key, structure, len(pickled_data), tagger)
+            return structure
 
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        if self.cache is None and self.lru_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
+            self._set_lru(key, structure, len(pickled_data), tagger)
+
+            if self.cache is None:
+                return None
 
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
@@ -278,6 +399,18 @@ class CourseStructureCache(object):
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+    def _set_lru(self, key, structure, size, tagger):
+        """
+        Store the structure in the per-process LRU tier (if it is enabled),
+        recording any evictions on ``tagger``.
+        """
+        if self.lru_cache is None:
+            return
+
+        evictions = self.lru_cache.set(key, structure, size)
+        tagger.measure('lru_evictions', evictions)
+        tagger.measure('lru_size', self.lru_cache.current_bytes)
+
 
 class MongoConnection(object):
     """
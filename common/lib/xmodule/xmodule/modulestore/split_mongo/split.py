@@ -90,7 +90,7 @@ from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, Du
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -118,6 +118,9 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# The usage keys of the blocks which were added, removed and modified between two structure versions.
+StructureDiff = namedtuple('StructureDiff', ['added', 'removed', 'modified'])
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -162,6 +165,18 @@ class SplitBulkWriteRecord(BulkOpsRecord):
             if self.initial_index.get('versions', {}).get(branch) != _id
         ]
 
+    @property
+    def published_versions(self):
+        """
+        Return a tuple of the published branch's version guid at the start of this
+        bulk operation and its current version guid.
+        """
+        published_branch = ModuleStoreEnum.BranchName.published
+        return tuple(
+            index.get('versions', {}).get(published_branch) if index is not None else None
+            for index in (self.initial_index, self.index)
+        )
+
     def structure_for_branch(self, branch):
         return self.structures.get(self.index.get('versions', {}).get(branch))
 
@@ -697,9 +712,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, prefetch_definitions=False, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param prefetch_definitions: whether lazily loaded definitions should be fetched together
+            with the definitions of the other blocks that were cached along with them.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
@@ -729,6 +746,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["request_cache"] = self.request_cache
 
         self.signal_handler = signal_handler
+        self.prefetch_definitions = prefetch_definitions
 
     def close_connections(self):
         """
@@ -769,7 +787,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             base_block_ids: list of BlockIds to fetch
             course_key: the destination course providing the context
             depth: how deep below these to prefetch
-            lazy: whether to load definitions now or later
+            lazy: whether to load definitions now or later. If later and the modulestore
+                prefetches definitions, the first lazy load of any of these blocks' definitions
+                loads all of them in a single query.
         """
         with self.bulk_operations(course_key, emit_signals=False):
             new_module_data = {}
@@ -802,6 +822,12 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+            elif self.prefetch_definitions:
+                system.add_definition_prefetch_group(
+                    block.definition
+                    for block in new_module_data.itervalues()
+                    if block.definition is not None and not block.definition_loaded
+                )
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -1615,6 +1641,70 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return usage_key, block.edit_info.original_usage_version
         return None, None
 
+    def get_block_versions(self, course_key):
+        """
+        Returns the version info of all of the blocks in the given course's
+        structure, without loading any of the blocks.
+
+        Returns a dict mapping each block's usage key to a tuple of:
+            the version guid of the structure in which the block was last changed,
+            the list of usage keys of the block's children.
+        """
+        structure = self._lookup_course(course_key).structure
+        course_key = course_key.version_agnostic().for_branch(None)
+
+        def usage_key_for(block_key):
+            """ Returns the usage key of the block with the given BlockKey """
+            return course_key.make_usage_key(block_key.type, block_key.id)
+
+        return {
+            usage_key_for(block_key): (
+                block_data.edit_info.update_version,
+                [usage_key_for(BlockKey(*child)) for child in block_data.fields.get('children', [])],
+            )
+            for block_key, block_data in structure['blocks'].iteritems()
+        }
+
+    def diff_structures(self, course_key, old_version_guid, new_version_guid):
+        """
+        Returns a StructureDiff of the usage keys of the blocks which were added, removed and
+        modified between the two given structure versions of the course, without loading any
+        of the blocks. A block is considered modified if its update_version differs between the
+        two structures.
+
+        If old_version_guid is None, all blocks of the new structure are considered added.
+        """
+        new_blocks = self._get_structure_blocks(course_key, new_version_guid)
+        old_blocks = self._get_structure_blocks(course_key, old_version_guid) if old_version_guid else {}
+        course_key = course_key.version_agnostic().for_branch(None)
+
+        def usage_keys_for(block_keys):
+            """ Returns the set of usage keys of the blocks with the given BlockKeys """
+            return {course_key.make_usage_key(block_key.type, block_key.id) for block_key in block_keys}
+
+        modified = [
+            block_key
+            for block_key in set(new_blocks).intersection(old_blocks)
+            if new_blocks[block_key].edit_info.update_version != old_blocks[block_key].edit_info.update_version
+        ]
+        return StructureDiff(
+            added=usage_keys_for(set(new_blocks).difference(old_blocks)),
+            removed=usage_keys_for(set(old_blocks).difference(new_blocks)),
+            modified=usage_keys_for(modified),
+        )
+
+    def _get_structure_blocks(self, course_key, version_guid):
+        """
+        Returns the blocks dict of the given structure version of the course.
+
+        Raises:
+            ItemNotFoundError: if the structure doesn't exist.
+        """
+        structure = self.get_structure(course_key, course_key.as_object_id(version_guid))
+        if structure is None:
+            raise ItemNotFoundError(version_guid)
+        return structure['blocks']
+
     def create_definition_from_data(self, course_key, new_def_data, category, user_id):
         """
         Pull the definition fields out of descriptor and save to the db as a new definition
@@ -2398,6 +2488,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :param blacklist: a list of usage keys to not change in the destination: i.e., don't add
         if not there, don't update if there.
 
+        Returns a tuple of the destination branch's version guid before and after the copy.
+
         Raises:
             ItemNotFoundError: if it cannot find the course. if the request is to publish a
                 subtree but the ancestors up to and including the course root are not published.
@@ -2467,8 +2559,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 self._delete_if_true_orphan(orphan, destination_structure)
 
             # update the db
+            previous_version = index_entry['versions'].get(destination_course.branch)
             self.update_structure(destination_course, destination_structure)
             self._update_head(destination_course, index_entry, destination_course.branch, destination_structure['_id'])
+            return previous_version, destination_structure['_id']
 
     @contract(source_keys="list(BlockUsageLocator)", dest_usage=BlockUsageLocator)
     def copy_from_template(self, source_keys, dest_usage, user_id, head_validation=True):
@@ -313,6 +313,13 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         usage_key = self._map_revision_to_branch(usage_key)
         return super(DraftVersioningModuleStore, self).get_block_original_usage(usage_key)
 
+    def get_block_versions(self, course_key):
+        """
+        See :py:meth: xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.get_block_versions
+        """
+        course_key = self._map_revision_to_branch(course_key)
+        return super(DraftVersioningModuleStore, self).get_block_versions(course_key)
+
     def get_orphans(self, course_key, **kwargs):
         course_key = self._map_revision_to_branch(course_key)
         return super(DraftVersioningModuleStore, self).get_orphans(course_key, **kwargs)
@@ -369,7 +376,7 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         Publishes the subtree under location from the draft branch to the published branch
         Returns the newly published item.
         """
-        super(DraftVersioningModuleStore, self).copy(
+        published_versions = super(DraftVersioningModuleStore, self).copy(
             user_id,
             # Directly using the replace function rather than the for_branch function
             # because for_branch obliterates the version_guid and will lead to missed version conflicts.
@@ -382,7 +389,7 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
             blacklist=blacklist
         )
 
-        self._flag_publish_event(location.course_key)
+        self._flag_publish_event(location.course_key, published_versions)
 
         return self.get_item(location.for_branch(ModuleStoreEnum.BranchName.published), **kwargs)
 
@@ -486,13 +493,15 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
             if commit:
                 # update published branch version only if publish and draft point to different versions
                 if versions['published-branch'] != versions['draft-branch']:
+                    # _update_head modifies the versions in place, so remember the previous one
+                    published_versions = (versions['published-branch'], versions['draft-branch'])
                     self._update_head(
                         course_locator,
                         index_entry,
                         'published-branch',
                         index_entry['versions']['draft-branch']
                     )
-                    self._flag_publish_event(course_locator)
+                    self._flag_publish_event(course_locator, published_versions)
                     return self.get_course_index(course_locator)['versions']
         return versions
 
@@ -9,7 +9,7 @@ import itertools
 import mimetypes
 from uuid import uuid4
 from contextlib import contextmanager
-from mock import patch, Mock, call
+from mock import patch, Mock, call, ANY
 
 # Mixed modulestore depends on django, so we'll manually configure some django settings
 # before importing the module
@@ -57,6 +57,9 @@ from xmodule.tests import DATA_DIR, CourseComparisonTest
 
 log = logging.getLogger(__name__)
 
+# The structure versions sent along with the course_published signal
+PUBLISHED_VERSIONS = {'previous_published_version': ANY, 'published_version': ANY}
+
 
 class CommonMixedModuleStoreSetup(CourseComparisonTest):
     """
@@ -2497,7 +2500,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
                 signal_handler.reset_mock()
 
                 course_key = course.id
@@ -2507,7 +2510,9 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                     Check if the signal has been fired.
                     The course_published signal fires before the _clear_bulk_ops_record.
                     """
-                    signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                    signal_handler.send.assert_called_with(
+                        'course_published', course_key=course.id, **PUBLISHED_VERSIONS
+                    )
 
                 with patch.object(
                     self.store.thread_cache.default_store, '_clear_bulk_ops_record', wraps=_clear_bulk_ops_record
@@ -2521,7 +2526,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                     self.assertEqual(mock_clear_bulk_ops_record.call_count, 1)
 
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_course_publish_signal_direct_firing(self, default):
@@ -2543,7 +2548,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 course_key = course.id
 
@@ -2553,16 +2558,22 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                     log.debug('Testing with block type %s', block_type)
                     signal_handler.reset_mock()
                     block = self.store.create_item(self.user_id, course_key, block_type)
-                    signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                    signal_handler.send.assert_called_with(
+                        'course_published', course_key=course.id, **PUBLISHED_VERSIONS
+                    )
 
                     signal_handler.reset_mock()
                     block.display_name = block_type
                     self.store.update_item(block, self.user_id)
-                    signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                    signal_handler.send.assert_called_with(
+                        'course_published', course_key=course.id, **PUBLISHED_VERSIONS
+                    )
 
                     signal_handler.reset_mock()
                     self.store.publish(block.location, self.user_id)
-                    signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                    signal_handler.send.assert_called_with(
+                        'course_published', course_key=course.id, **PUBLISHED_VERSIONS
+                    )
 
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_course_publish_signal_rerun_firing(self, default):
@@ -2584,7 +2595,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 course_key = course.id
 
@@ -2592,7 +2603,9 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                 signal_handler.reset_mock()
                 dest_course_id = self.store.make_course_key("org.other", "course.other", "run.other")
                 self.store.clone_course(course_key, dest_course_id, self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=dest_course_id)
+                signal_handler.send.assert_called_with(
+                    'course_published', course_key=dest_course_id, **PUBLISHED_VERSIONS
+                )
 
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
@@ -2623,9 +2636,17 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                 )
                 signal_handler.send.assert_has_calls([
                     call('pre_publish', course_key=self.store.make_course_key('edX', 'toy', '2012_Fall')),
-                    call('course_published', course_key=self.store.make_course_key('edX', 'toy', '2012_Fall')),
+                    call(
+                        'course_published',
+                        course_key=self.store.make_course_key('edX', 'toy', '2012_Fall'),
+                        **PUBLISHED_VERSIONS
+                    ),
                     call('pre_publish', course_key=self.store.make_course_key('edX', 'toy', '2012_Fall')),
-                    call('course_published', course_key=self.store.make_course_key('edX', 'toy', '2012_Fall')),
+                    call(
+                        'course_published',
+                        course_key=self.store.make_course_key('edX', 'toy', '2012_Fall'),
+                        **PUBLISHED_VERSIONS
+                    ),
                 ])
 
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
@@ -2648,18 +2669,18 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 # Test a draftable block type, which needs to be explicitly published, and nest it within the
                 # normal structure - this is important because some implementors change the parent when adding a
                 # non-published child; if parent is in DIRECT_ONLY_CATEGORIES then this should not fire the event
                 signal_handler.reset_mock()
                 section = self.store.create_item(self.user_id, course.id, 'chapter')
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 signal_handler.reset_mock()
                 subsection = self.store.create_child(self.user_id, section.location, 'sequential')
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 # 'units' and 'blocks' are draftable types
                 signal_handler.reset_mock()
@@ -2674,15 +2695,70 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 signal_handler.reset_mock()
                 self.store.publish(unit.location, self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 signal_handler.reset_mock()
                 self.store.unpublish(unit.location, self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 signal_handler.reset_mock()
                 self.store.delete_item(unit.location, self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
+
+    def test_course_publish_signal_structure_diff(self):
+        with MongoContentstoreBuilder().build() as contentstore:
+            signal_handler = Mock(name='signal_handler')
+            self.store = MixedModuleStore(
+                contentstore=contentstore,
+                create_modulestore_instance=create_modulestore_instance,
+                mappings={},
+                signal_handler=signal_handler,
+                **self.OPTIONS
+            )
+            self.addCleanup(self.store.close_all_connections)
+
+            def published_versions():
+                """
+                Returns the structure versions sent with the last course_published signal.
+                """
+                kwargs = signal_handler.send.call_args[1]
+                return kwargs['previous_published_version'], kwargs['published_version']
+
+            def diff_keys(diff):
+                """
+                Returns the block ids of the added, removed and modified blocks in the diff.
+                """
+                return tuple({usage_key.block_id for usage_key in keys} for keys in diff)
+
+            with self.store.default_store(ModuleStoreEnum.Type.split):
+                course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
+                previous_version, course_version = published_versions()
+                self.assertIsNone(previous_version)
+                self.assertIsNotNone(course_version)
+                added, removed, modified = diff_keys(self.store.diff_structures(course.id, None, course_version))
+                self.assertIn(course.location.block_id, added)
+                self.assertEqual((removed, modified), (set(), set()))
+
+                section = self.store.create_item(self.user_id, course.id, 'chapter')
+                previous_version, section_version = published_versions()
+                self.assertEqual(previous_version, course_version)
+                self.assertEqual(
+                    diff_keys(self.store.diff_structures(course.id, previous_version, section_version)),
+                    ({section.location.block_id}, set(), {course.location.block_id}),
+                )
+
+                self.store.delete_item(section.location, self.user_id)
+                previous_version, deleted_version = published_versions()
+                self.assertEqual(previous_version, section_version)
+                self.assertEqual(
+                    diff_keys(self.store.diff_structures(course.id, previous_version, deleted_version)),
+                    (set(), {section.location.block_id}, {course.location.block_id}),
+                )
+
+            with self.store.default_store(ModuleStoreEnum.Type.mongo):
+                course = self.store.create_course('org_x', 'course_z', 'run_z', self.user_id)
+                self.assertEqual(published_versions(), (None, None))
+                self.assertIsNone(self.store.diff_structures(course.id, None, None))
 
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_bulk_course_publish_signal_direct_firing(self, default):
@@ -2704,7 +2780,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 course_key = course.id
 
@@ -2724,7 +2800,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                         self.store.publish(block.location, self.user_id)
                         signal_handler.send.assert_not_called()
 
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_bulk_course_publish_signal_publish_firing(self, default):
@@ -2746,7 +2822,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
 
                 # Course creation and publication should fire the signal
                 course = self.store.create_course('org_x', 'course_y', 'run_z', self.user_id)
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 course_key = course.id
 
@@ -2780,7 +2856,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                     self.store.delete_item(unit.location, self.user_id)
                     signal_handler.send.assert_not_called()
 
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 # Test editing draftable block type without publish
                 signal_handler.reset_mock()
@@ -2791,7 +2867,7 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
                     signal_handler.send.assert_not_called()
                     self.store.publish(unit.location, self.user_id)
                     signal_handler.send.assert_not_called()
-                signal_handler.send.assert_called_with('course_published', course_key=course.id)
+                signal_handler.send.assert_called_with('course_published', course_key=course.id, **PUBLISHED_VERSIONS)
 
                 signal_handler.reset_mock()
                 with self.store.bulk_operations(course_key):
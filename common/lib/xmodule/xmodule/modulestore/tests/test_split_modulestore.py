@@ -14,6 +14,7 @@ import ddt
 from contracts import contract
 from nose.plugins.attrib import attr
 from django.core.cache import caches, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -32,6 +33,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLRUCache
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -770,6 +772,43 @@ class SplitModuleCourseTests(SplitModuleTest):
         self.assertIn(BlockKey('chapter', 'chapter1'), block_map)
         self.assertIn(BlockKey('problem', 'problem3_2'), block_map)
 
+    @ddt.data((False, 3), (True, 1))
+    @ddt.unpack
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_prefetch_definitions(self, prefetch_definitions, num_definition_queries, _from_json):
+        """
+        Test that the lazily loaded definitions of a fetched subtree are loaded
+        in a single query when the modulestore prefetches definitions.
+        """
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT),
+            'chapter', 'chapter3'
+        )
+        with patch.object(modulestore(), 'prefetch_definitions', prefetch_definitions):
+            chapter = modulestore().get_item(locator, depth=1)
+            problems = chapter.get_children()
+            self.assertEqual(len(problems), 3)
+            with check_mongo_calls(num_definition_queries):
+                for problem in problems:
+                    self.assertIsNotNone(problem.data)
+
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_prefetch_definitions_missing(self, _from_json):
+        """
+        Test that definitions missing from a prefetched group are loaded
+        on their own rather than being cached as missing.
+        """
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT),
+            'chapter', 'chapter3'
+        )
+        store = modulestore()
+        expected_data = [problem.data for problem in store.get_item(locator, depth=1).get_children()]
+        with patch.object(store, 'prefetch_definitions', True):
+            chapter = store.get_item(locator, depth=1)
+            with patch.object(store.db_connection, 'get_definitions', return_value=[]):
+                self.assertEqual([problem.data for problem in chapter.get_children()], expected_data)
+
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     def test_course_successors(self, _from_json):
         """
@@ -999,6 +1038,29 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @override_settings(COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES=1024 * 1024)
+    def test_lru_cache(self):
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # The dummy django cache doesn't store anything, but the
+        # in-process LRU tier does.
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
+    @override_settings(COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES=1)
+    def test_lru_cache_too_small(self):
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # The structure doesn't fit in the LRU tier, so it isn't cached
+        with check_mongo_calls(1):
+            cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1008,6 +1070,52 @@ class TestCourseStructureCache(SplitModuleTest):
         )
 
 
+class TestStructureLRUCache(unittest.TestCase):
+    """Tests for the StructureLRUCache"""
+
+    def setUp(self):
+        super(TestStructureLRUCache, self).setUp()
+        self.cache = StructureLRUCache(max_bytes=10)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_set_and_get(self):
+        structure = {'_id': 'a'}
+        self.assertEqual(self.cache.set('a', structure, 4), 0)
+        self.assertIs(self.cache.get('a'), structure)
+        self.assertEqual(self.cache.current_bytes, 4)
+
+    def test_eviction_order(self):
+        self.cache.set('a', {'_id': 'a'}, 4)
+        self.cache.set('b', {'_id': 'b'}, 4)
+        # touch 'a', so that 'b' is the least recently used
+        self.cache.get('a')
+        self.assertEqual(self.cache.set('c', {'_id': 'c'}, 4), 1)
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertEqual(self.cache.current_bytes, 8)
+
+    def test_replace(self):
+        self.cache.set('a', {'_id': 'a'}, 4)
+        self.cache.set('a', {'_id': 'a'}, 6)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.current_bytes, 6)
+
+    def test_oversized(self):
+        self.assertEqual(self.cache.set('a', {'_id': 'a'}, 11), 0)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.current_bytes, 0)
+
+    def test_clear(self):
+        self.cache.set('a', {'_id': 'a'}, 4)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.current_bytes, 0)
+
+
 class SplitModuleItemTests(SplitModuleTest):
     '''
     Item read tests including inheritance
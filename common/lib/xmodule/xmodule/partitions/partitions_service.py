@@ -3,6 +3,8 @@ This is a service-like API that assigns tracks which groups users are in for var
 user partitions.  It uses the user_service key/value store provided by the LMS runtime to
 persist the assignments.
 """
+from collections import OrderedDict
+
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 import logging
@@ -37,6 +39,77 @@ def get_all_partitions_for_course(course, active_only=False):
     return all_partitions
 
 
+def get_user_partition_groups_for_users(course_key, user_partitions, users, assign=True):
+    """
+    Returns the groups to which each of the given users is assigned in each
+    of the given user partitions.
+
+    Partition schemes that define a `prefetch_groups_for_users` classmethod
+    read the groups of all the users at once, and assign the users who aren't
+    in a group yet in bulk if `assign` is True, instead of doing so for each
+    user.  The groups are then resolved from what was prefetched.
+
+    Args:
+        course_key: the course the partitions belong to.
+        user_partitions: the UserPartitions to resolve the users' groups in.
+        users: iterable of User objects.
+        assign: if `False`, users who aren't in a group yet aren't assigned
+            one, where the scheme supports prefetching.
+
+    Returns:
+        A dict mapping each user's id to a dict that maps the id of every
+        partition to the user's Group in it, or to None.
+    """
+    users = list(users)
+    prefetch_user_partition_groups(course_key, user_partitions, users, assign=assign)
+    return {
+        user.id: {
+            partition.id: partition.scheme.get_group_for_user(course_key, user, partition)
+            for partition in user_partitions
+        }
+        for user in users
+    }
+
+
+def prefetch_user_partition_groups(course_key, user_partitions, users, assign=True):
+    """
+    Warms the caches the partition schemes of the given user partitions use
+    to resolve the groups of the given users, through the schemes'
+    `prefetch_groups_for_users` classmethods.  If `assign` is True, users who
+    aren't in a group yet are assigned one in bulk, as `get_group_for_user`
+    would assign them for a single user.
+    """
+    for scheme, partitions in _get_partitions_by_scheme(user_partitions).iteritems():
+        prefetch = getattr(scheme, 'prefetch_groups_for_users', None)
+        if prefetch is not None:
+            prefetch(course_key, users, partitions, assign=assign)
+
+
+def assign_user_partition_groups(course_key, user_partitions, users):
+    """
+    Assigns the given users, whose groups were prefetched by
+    `prefetch_user_partition_groups` with `assign` False, to a group of each
+    of the given user partitions they aren't in yet, in bulk, through the
+    partition schemes' `assign_groups_for_users` classmethods.  Users whose
+    groups weren't prefetched are left for `get_group_for_user` to assign.
+    """
+    for scheme, partitions in _get_partitions_by_scheme(user_partitions).iteritems():
+        assign = getattr(scheme, 'assign_groups_for_users', None)
+        if assign is not None:
+            assign(course_key, users, partitions)
+
+
+def _get_partitions_by_scheme(user_partitions):
+    """
+    Returns an OrderedDict mapping the schemes of the given user partitions
+    to the lists of the partitions that use them.
+    """
+    partitions_by_scheme = OrderedDict()
+    for partition in user_partitions:
+        partitions_by_scheme.setdefault(partition.scheme, []).append(partition)
+    return partitions_by_scheme
+
+
 def _get_dynamic_partitions(course):
     """
     Return the dynamic user partitions for this course.
@@ -25,6 +25,8 @@ class BlocksAPITransformer(BlockStructureTransformer):
 
     WRITE_VERSION = 1
     READ_VERSION = 1
+    USER_INDEPENDENT = True
+    SUPPORTS_INCREMENTAL_COLLECT = True
     STUDENT_VIEW_DATA = 'student_view_data'
     STUDENT_VIEW_MULTI_DEVICE = 'student_view_multi_device'
 
@@ -38,6 +40,16 @@ class BlocksAPITransformer(BlockStructureTransformer):
     def name(cls):
         return "blocks_api"
 
+    def transform_cache_key(self):
+        return (
+            self.name(),
+            self.READ_VERSION,
+            tuple(self.block_types_to_count or ()),
+            tuple(self.requested_student_view_data or ()),
+            self.depth,
+            self.nav_depth,
+        )
+
     @classmethod
     def collect(cls, block_structure):
         """
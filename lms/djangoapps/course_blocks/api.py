@@ -23,6 +23,7 @@ def get_course_blocks(
         starting_block_usage_key,
         transformers=None,
         collected_block_structure=None,
+        load_all_transformer_data=True,
 ):
     """
     A higher order function implemented on top of the
@@ -45,6 +46,12 @@ def get_course_blocks(
             BlockStructureManager.get_collected.  Can be optionally
             provided if already available, for optimization.
 
+        load_all_transformer_data (bool) - Whether the collected
+            block-level data of all registered transformers is to be
+            loaded, rather than only that of the given transformers.
+            Pass False if the returned block structure is not read for
+            the data of any other transformers.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at starting_block_usage_key, that has undergone the
@@ -62,4 +69,40 @@ def get_course_blocks(
         transformers,
         starting_block_usage_key,
         collected_block_structure,
+        load_all_transformer_data,
+    )
+
+
+def get_course_blocks_for_users(
+        users,
+        starting_block_usage_key,
+        transformers=None,
+        collected_block_structure=None,
+):
+    """
+    Returns a BlockStructureTransformBatch for the given users, keyed
+    by user id, whose get_transformed method returns the equivalent of
+    get_course_blocks for each of the users.
+
+    Data shared by the transforms for all of the users - the collected
+    block structure, the result of user-independent transformers, and
+    the users' course roles, cohorts, enrollments and library content
+    selections - is loaded only once for the batch, when the first
+    block structure is requested.
+
+    Arguments:
+        users (list[django.contrib.auth.models.User]) - The users for
+            which the block structure is to be transformed.
+
+        See get_course_blocks for the remaining arguments.
+    """
+    if not transformers:
+        transformers = BlockStructureTransformers(COURSE_BLOCK_ACCESS_TRANSFORMERS)
+
+    course_key = starting_block_usage_key.course_key
+    return get_block_structure_manager(course_key).get_transformed_batch(
+        transformers,
+        {user.id: CourseUsageInfo(course_key, user) for user in users},
+        starting_block_usage_key,
+        collected_block_structure,
     )
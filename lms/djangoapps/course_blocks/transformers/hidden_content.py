@@ -11,6 +11,7 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
 )
 from xmodule.seq_module import SequenceModule
 
+from ..usage_info import CourseUsageInfo
 from .utils import collect_merged_boolean_field, collect_merged_date_field
 
 MAXIMUM_DATE = utc.localize(datetime.max)
@@ -31,6 +32,7 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
     """
     WRITE_VERSION = 2
     READ_VERSION = 2
+    SUPPORTS_INCREMENTAL_COLLECT = True
     MERGED_DUE_DATE = 'merged_due_date'
     MERGED_HIDE_AFTER_DUE = 'merged_hide_after_due'
 
@@ -88,6 +90,9 @@ class HiddenContentTransformer(FilteringTransformerMixin, BlockStructureTransfor
 
         block_structure.request_xblock_fields(u'self_paced', u'end')
 
+    def prepare_batch(self, usage_infos, block_structure):
+        CourseUsageInfo.prefetch_staff_access(usage_infos)
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Visibility check.
         if usage_info.has_staff_access:
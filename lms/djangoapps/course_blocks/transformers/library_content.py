@@ -13,7 +13,7 @@ from track import contexts
 from xmodule.library_content_module import LibraryContentModule
 from xmodule.modulestore.django import modulestore
 
-from ..utils import get_student_module_as_dict
+from ..utils import bulk_cache_student_modules, get_student_module_as_dict
 
 
 class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransformer):
@@ -26,6 +26,7 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    SUPPORTS_INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -67,6 +68,17 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
                 summary = summarize_block(child_key)
                 block_structure.set_transformer_block_field(child_key, cls, 'block_analytics_summary', summary)
 
+    def prepare_batch(self, usage_infos, block_structure):
+        library_content_keys = [
+            block_key for block_key in block_structure
+            if block_key.block_type == 'library_content' and block_structure.get_children(block_key)
+        ]
+        bulk_cache_student_modules(
+            [usage_info.user for usage_info in usage_infos],
+            usage_infos[0].course_key,
+            library_content_keys,
+        )
+
     def transform_block_filters(self, usage_info, block_structure):
         all_library_children = set()
         all_selected_children = set()
@@ -8,6 +8,7 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
 )
 from xmodule.course_metadata_utils import DEFAULT_START_DATE
 
+from ..usage_info import CourseUsageInfo
 from .utils import collect_merged_date_field
 
 
@@ -29,6 +30,7 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    SUPPORTS_INCREMENTAL_COLLECT = True
     MERGED_START_DATE = 'merged_start_date'
 
     @classmethod
@@ -67,6 +69,9 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+    def prepare_batch(self, usage_infos, block_structure):
+        CourseUsageInfo.prefetch_staff_access(usage_infos)
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access:
@@ -8,15 +8,20 @@ from collections import namedtuple
 import ddt
 from nose.plugins.attrib import attr
 
-from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort
+from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, get_cohort
+from openedx.core.djangoapps.course_groups.models import CourseCohort
 from openedx.core.djangoapps.course_groups.partition_scheme import CohortPartitionScheme
-from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
+from openedx.core.djangoapps.course_groups.tests.helpers import (
+    CohortFactory,
+    CourseCohortFactory,
+    config_course_cohorts
+)
 from openedx.core.djangoapps.course_groups.views import link_cohort_to_partition_group
-from student.tests.factories import CourseEnrollmentFactory
+from student.tests.factories import CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ...api import get_course_blocks
+from ...api import get_course_blocks, get_course_blocks_for_users
 from ..user_partitions import UserPartitionTransformer, _MergedGroupAccess
 from .helpers import CourseStructureTestCase, update_block
 
@@ -220,6 +225,31 @@ class UserPartitionTransformerTestCase(UserPartitionTestMixin, CourseStructureTe
             self.get_block_key_set(self.blocks, *expected_blocks)
         )
 
+    def test_transform_batch_assigns_cohorts(self):
+        """
+        Tests that a batched transform assigns an uncohorted user to a
+        cohort, and so returns the same blocks as get_course_blocks, but
+        only once the user's blocks are transformed.
+        """
+        self.setup_partitions_and_course()
+        random_cohort = self.partition_cohorts[self.user_partition.id - 1][0]
+        CourseCohortFactory(course_user_group=random_cohort, assignment_type=CourseCohort.RANDOM)
+        other_user, untransformed_user = UserFactory.create_batch(2)
+        for user in (other_user, untransformed_user):
+            CourseEnrollmentFactory.create(user=user, course_id=self.course.id, is_active=True)
+        expected_block_keys = self.get_block_key_set(
+            self.blocks, 'course', 'A', 'B', 'C', 'E', 'F', 'G', 'J', 'L', 'M', 'O'
+        )
+
+        batch = get_course_blocks_for_users([self.user, untransformed_user], self.course.location, self.transformers)
+        self.assertSetEqual(set(batch.get_transformed(self.user.id).get_block_keys()), expected_block_keys)
+        self.assertEqual(get_cohort(self.user, self.course.id, assign=False), random_cohort)
+        self.assertIsNone(get_cohort(untransformed_user, self.course.id, assign=False))
+
+        trans_block_structure = get_course_blocks(other_user, self.course.location, self.transformers)
+        self.assertSetEqual(set(trans_block_structure.get_block_keys()), expected_block_keys)
+        self.assertEqual(get_cohort(other_user, self.course.id, assign=False), random_cohort)
+
     def test_transform_on_inactive_partition(self):
         """
         Tests UserPartitionTransformer for inactive UserPartition.
@@ -5,7 +5,11 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
 )
-from xmodule.partitions.partitions_service import get_all_partitions_for_course
+from xmodule.partitions.partitions_service import (
+    assign_user_partition_groups,
+    get_all_partitions_for_course,
+    prefetch_user_partition_groups
+)
 
 from .split_test import SplitTestTransformer
 from .utils import get_field_on_block
@@ -22,6 +26,7 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    SUPPORTS_INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -69,6 +74,18 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
             merged_group_access = _MergedGroupAccess(user_partitions, xblock, merged_parent_access_list)
             block_structure.set_transformer_block_field(block_key, cls, 'merged_group_access', merged_group_access)
 
+    def prepare_batch(self, usage_infos, block_structure):
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return
+
+        # Warm the caches used by the partition schemes to resolve each
+        # user's groups.  Users who aren't in a cohort or random group yet
+        # aren't assigned one here, as the blocks of many of the users may
+        # never be transformed; see transform_block_filters.
+        users = [usage_info.user for usage_info in usage_infos]
+        prefetch_user_partition_groups(usage_infos[0].course_key, user_partitions, users, assign=False)
+
     def transform_block_filters(self, usage_info, block_structure):
         result_list = SplitTestTransformer().transform_block_filters(usage_info, block_structure)
 
@@ -76,6 +93,9 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
         if not user_partitions:
             return [block_structure.create_universal_filter()]
 
+        # Assign the user to any groups they aren't in yet, as
+        # get_course_blocks would, if prepare_batch prefetched them.
+        assign_user_partition_groups(usage_info.course_key, user_partitions, [usage_info.user])
         user_groups = _get_user_partition_groups(
             usage_info.course_key, user_partitions, usage_info.user
         )
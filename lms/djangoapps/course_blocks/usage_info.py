@@ -3,6 +3,7 @@ Declares CourseUsageInfo class to be used by the transform method in
 Transformers.
 """
 from lms.djangoapps.courseware.access import _has_access_to_course
+from student.roles import BulkRoleCache
 
 
 class CourseUsageInfo(object):
@@ -34,3 +35,20 @@ class CourseUsageInfo(object):
         if self._has_staff_access is None:
             self._has_staff_access = _has_access_to_course(self.user, 'staff', self.course_key)
         return self._has_staff_access
+
+    @classmethod
+    def prefetch_staff_access(cls, usage_infos):
+        '''
+        Computes and caches whether each of the users of the given
+        CourseUsageInfo instances has staff access, bulk-loading their
+        course roles at once rather than one user at a time.
+
+        Instances whose value is already cached are skipped.
+        '''
+        usage_infos = [usage_info for usage_info in usage_infos if usage_info._has_staff_access is None]
+        if not usage_infos:
+            return
+
+        BulkRoleCache.prefetch([usage_info.user for usage_info in usage_infos])
+        for usage_info in usage_infos:
+            usage_info._has_staff_access = _has_access_to_course(usage_info.user, 'staff', usage_info.course_key)
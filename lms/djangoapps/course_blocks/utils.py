@@ -4,6 +4,38 @@ Common utilities for use along with the course blocks.
 import json
 
 from courseware.models import StudentModule
+from openedx.core.djangoapps.request_cache import clear_cache, get_cache
+
+STUDENT_MODULE_CACHE_NAMESPACE = u'course_blocks.utils.student_modules'
+
+
+def bulk_cache_student_modules(users, course_key, block_keys):
+    """
+    Pre-fetches the student modules of the given users for the given
+    blocks, for later retrieval by get_student_module_as_dict.
+
+    Each pre-fetched student module is returned only once, since the
+    caller may update it afterwards.
+    """
+    # before populating the cache with another bulk set of data,
+    # remove previously cached entries to keep memory usage low.
+    clear_cache(STUDENT_MODULE_CACHE_NAMESPACE)
+    cache = get_cache(STUDENT_MODULE_CACHE_NAMESPACE)
+    if not block_keys:
+        return
+
+    for user in users:
+        for block_key in block_keys:
+            cache[(user.id, block_key)] = None
+
+    student_modules = StudentModule.objects.filter(
+        student__in=users,
+        course_id=course_key,
+        module_state_key__in=block_keys,
+    )
+    for student_module in student_modules:
+        block_key = student_module.module_state_key.map_into_course(course_key)
+        cache[(student_module.student_id, block_key)] = student_module
 
 
 def get_student_module_as_dict(user, course_key, block_key):
@@ -18,14 +50,18 @@ def get_student_module_as_dict(user, course_key, block_key):
     Returns:
         StudentModule as a (possibly empty) dict.
     """
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_key,
-            module_state_key=block_key,
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    cache = get_cache(STUDENT_MODULE_CACHE_NAMESPACE)
+    if (user.id, block_key) in cache:
+        student_module = cache.pop((user.id, block_key))
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_key,
+                module_state_key=block_key,
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module:
         return json.loads(student_module.state)
@@ -11,6 +11,9 @@ Note: The access control logic in this file does NOT check for enrollment in
   It is a wrapper around has_access that additionally checks for enrollment.
 """
 import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
 from django.conf import settings
@@ -34,6 +37,7 @@ from courseware.access_utils import (
     in_preview_mode,
     check_course_open_for_learner,
 )
+from courseware.field_overrides import OverrideFieldData
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
 from lms.djangoapps.ccx.custom_exception import CCXLocatorValidationException
 from lms.djangoapps.ccx.models import CustomCourseForEdX
@@ -50,6 +54,7 @@ from student.roles import (
     GlobalStaff,
     OrgInstructorRole,
     OrgStaffRole,
+    RoleCache,
     SupportStaffRole
 )
 from util import milestones_helpers as milestones_helpers
@@ -66,6 +71,113 @@ from xmodule.x_module import XModule
 log = logging.getLogger(__name__)
 
 
+class _AccessTables(threading.local):
+    """
+    A thread local holding the stack of CourseAccessTables in use.
+    """
+    tables = ()
+
+
+_ACCESS_TABLES = _AccessTables()
+
+
+class CourseAccessTable(object):
+    """
+    The access decisions of one user in one course, computed once and then
+    consulted by has_access instead of being re-evaluated on every check.
+    See `precomputed_access`.
+    """
+    def __init__(self, user, course_key, cache_load_access=True):
+        self.user = user
+        self.course_key = course_key
+        # Whether the 'load' decisions of blocks can be memoized by location.
+        # They can't when field overrides may give the same block different
+        # start dates or visibility depending on how it was loaded.
+        self.cache_load_access = cache_load_access
+        self.user_role = None
+        self.course_access = {}
+        self.user_groups = {}
+        self.load_access = {}
+        self.required_content = None
+
+    def populate(self, course, depth=None):
+        """
+        Load all of the user's course access roles and the content their
+        milestones require, and compute the user's role in the course.  If
+        they can be memoized, also compute the 'load' decisions of the blocks
+        the user can load down to `depth` levels below the course (all of
+        them when `depth` is None).
+        """
+        if self.user.is_authenticated() and not hasattr(self.user, '_roles'):
+            # The role checks of has_access all read this cache of the user's roles.
+            self.user._roles = RoleCache(self.user)  # pylint: disable=protected-access
+        self.required_content = milestones_helpers.get_required_content(self.course_key, self.user)
+        get_user_role(self.user, self.course_key)
+        if not self.cache_load_access or depth == 0:
+            return
+
+        queue = deque((child, 1) for child in course.get_children())
+        while queue:
+            block, block_depth = queue.popleft()
+            if isinstance(block, ErrorDescriptor):
+                continue
+            if not has_access(self.user, 'load', block, self.course_key):
+                continue
+            if block.has_children and (depth is None or block_depth < depth):
+                queue.extend((child, block_depth + 1) for child in block.get_children())
+
+
+@contextmanager
+def precomputed_access(user, course, depth=None):
+    """
+    A context manager which computes `user`'s access to `course` and to the
+    blocks of its subtree in one pass, and makes has_access consult the
+    resulting CourseAccessTable inside the context of a `with` statement.
+
+    Blocks outside of the precomputed subtree are added to the table on
+    their first check.  If a table for the user and course is already in
+    use, it is used as is.
+    """
+    table = _get_access_table(user, course.id)
+    if table is not None:
+        yield table
+        return
+
+    table = CourseAccessTable(user, course.id, cache_load_access=not OverrideFieldData.enabled_for(course))
+    prev = _ACCESS_TABLES.tables
+    _ACCESS_TABLES.tables += (table,)
+    try:
+        table.populate(course, depth)
+        yield table
+    finally:
+        _ACCESS_TABLES.tables = prev
+
+
+def _get_access_table(user, course_key):
+    """
+    Returns the CourseAccessTable in use for the given user and course, or
+    None if there is none.
+    """
+    if user is None or course_key is None:
+        return None
+    for table in reversed(_ACCESS_TABLES.tables):
+        if table.user is user and table.course_key == course_key:
+            return table
+    return None
+
+
+def get_required_content(course_key, user):
+    """
+    Returns the content the user must complete before the rest of the
+    course is made available, as milestones_helpers.get_required_content
+    does, looking it up only once while a CourseAccessTable is in use.
+    """
+    table = _get_access_table(user, course_key)
+    if table is None:
+        return milestones_helpers.get_required_content(course_key, user)
+    return table.required_content
+
+
 def has_ccx_coach_role(user, course_key):
     """
     Check if user is a coach on this ccx.
@@ -447,11 +559,7 @@ def _has_group_access(descriptor, user, course_key):
     # look up the user's group for each partition
     user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        user_groups[partition.id] = _get_group_for_user(course_key, user, partition)
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
@@ -462,6 +570,19 @@ def _has_group_access(descriptor, user, course_key):
     return ACCESS_GRANTED
 
 
+def _get_group_for_user(course_key, user, partition):
+    """
+    Returns the user's group in the given partition, looking it up only
+    once while a CourseAccessTable is in use.
+    """
+    table = _get_access_table(user, course_key)
+    if table is None:
+        return partition.scheme.get_group_for_user(course_key, user, partition)
+    if partition.id not in table.user_groups:
+        table.user_groups[partition.id] = partition.scheme.get_group_for_user(course_key, user, partition)
+    return table.user_groups[partition.id]
+
+
 def _has_access_descriptor(user, action, descriptor, course_key=None):
     """
     Check if user has access to this descriptor.
@@ -500,8 +621,20 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
             )
         )
 
+    def can_load_from_table():
+        """
+        Returns the memoized 'load' decision for the descriptor, if a
+        CourseAccessTable is in use.
+        """
+        table = _get_access_table(user, course_key)
+        if table is None or not table.cache_load_access:
+            return can_load()
+        if descriptor.location not in table.load_access:
+            table.load_access[descriptor.location] = can_load()
+        return table.load_access[descriptor.location]
+
     checkers = {
-        'load': can_load,
+        'load': can_load_from_table,
         'staff': lambda: _has_staff_access_to_descriptor(user, descriptor, course_key),
         'instructor': lambda: _has_instructor_access_to_descriptor(user, descriptor, course_key)
     }
@@ -659,6 +792,19 @@ def _has_access_to_course(user, access_level, course_key):
 
     access_level = string, either "staff" or "instructor"
     """
+    table = _get_access_table(user, course_key)
+    if table is None:
+        return _compute_access_to_course(user, access_level, course_key)
+    if access_level not in table.course_access:
+        table.course_access[access_level] = _compute_access_to_course(user, access_level, course_key)
+    return table.course_access[access_level]
+
+
+def _compute_access_to_course(user, access_level, course_key):
+    """
+    Checks the given user's access_level access to the course with the
+    given course_key.  See `_has_access_to_course`.
+    """
     if user is None or (not user.is_authenticated()):
         debug("Deny: no user or anon user")
         return ACCESS_DENIED
@@ -824,12 +970,19 @@ def get_user_role(user, course_key):
     Return corresponding string if user has staff, instructor or student
     course role in LMS.
     """
+    table = _get_access_table(user, course_key)
+    if table is not None and table.user_role is not None:
+        return table.user_role
+
     role = get_masquerade_role(user, course_key)
-    if role:
-        return role
-    elif has_access(user, 'instructor', course_key):
-        return 'instructor'
-    elif has_access(user, 'staff', course_key):
-        return 'staff'
-    else:
-        return 'student'
+    if not role:
+        if has_access(user, 'instructor', course_key):
+            role = 'instructor'
+        elif has_access(user, 'staff', course_key):
+            role = 'staff'
+        else:
+            role = 'student'
+
+    if table is not None:
+        table.user_role = role
+    return role
@@ -2,10 +2,10 @@
 This file contains all entrance exam related utils/logic.
 """
 
-from courseware.access import has_access
+from courseware.access import get_required_content, has_access
 from opaque_keys.edx.keys import UsageKey
 from student.models import EntranceExamConfiguration
-from util.milestones_helpers import get_required_content, is_entrance_exams_enabled
+from util.milestones_helpers import is_entrance_exams_enabled
 from xmodule.modulestore.django import modulestore
 
 
@@ -25,6 +25,7 @@ from openedx.core.djangoapps.request_cache.middleware import RequestCache
 from xmodule.modulestore.inheritance import InheritanceMixin
 
 NOTSET = object()
+INHERITABLE_FIELDS = frozenset(InheritanceMixin.fields.keys())
 ENABLED_OVERRIDE_PROVIDERS_KEY = u'courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = u'courseware.modulestore_field_overrides.enabled_providers.{course_id}'
 
@@ -155,11 +156,6 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
@@ -170,6 +166,14 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def enabled_for(cls, course):
+        """
+        Returns whether any override providers are enabled for the given
+        course, i.e. whether `wrap` would override any fields of its blocks.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -180,6 +184,11 @@ class OverrideFieldData(FieldData):
         Arguments:
             course: The course XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
         request_cache = RequestCache.get_request_cache()
         if course is None:
             cache_key = ENABLED_OVERRIDE_PROVIDERS_KEY.format(course_id='None')
@@ -197,6 +206,30 @@ class OverrideFieldData(FieldData):
     def __init__(self, user, fallback, providers):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        # The ancestors of the blocks whose inherited overrides were looked
+        # up, keyed by block location, so the tree is only walked once.
+        self._lineages = {}
+
+    def _lineage(self, block):
+        """
+        Returns the ancestors of the given block, starting with its immediate
+        parent and ending at the root of the block tree.
+        """
+        lineage = self._lineages.get(block.location)
+        if lineage is None:
+            lineage = self._lineages[block.location] = tuple(_lineage(block))
+        return lineage
+
+    def _get_inherited_override(self, block, name):
+        """
+        Returns the override of the field identified by `name` on the closest
+        ancestor of `block` that has one, or `NOTSET` if there is none.
+        """
+        for ancestor in self._lineage(block):
+            value = self.get_override(ancestor, name)
+            if value is not NOTSET:
+                return value
+        return NOTSET
 
     def get_override(self, block, name):
         """
@@ -231,11 +264,9 @@ class OverrideFieldData(FieldData):
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in INHERITABLE_FIELDS:
+                if self._get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -246,12 +277,10 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+            if name in INHERITABLE_FIELDS:
+                value = self._get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
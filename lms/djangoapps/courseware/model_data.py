@@ -9,6 +9,9 @@ Classes to provide the LMS runtime data storage to XBlocks.
 :class:`FieldDataCache`: A object which provides a read-through prefetch cache
     of data to support XBlock fields within a limited set of scopes.
 
+:class:`PrefetchPlanner`: Plans the queries a :class:`~FieldDataCache` issues to
+    prefetch field data, skipping scopes and blocks that have nothing to fetch.
+
 The remaining classes in this module provide read-through prefetch cache implementations
 for specific scopes. The individual classes provide the knowledge of what are the essential
 pieces of information for each scope, and thus how to cache, prefetch, and create new field data
@@ -36,10 +39,16 @@ from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
-from courseware.user_state_client import DjangoXBlockUserStateClient
+from courseware.user_state_client import DjangoXBlockUserStateClient, flush_write_behind
 from xmodule.modulestore.django import modulestore
 
-from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
+from .models import (
+    ChunkingManager,
+    StudentModule,
+    XModuleStudentInfoField,
+    XModuleStudentPrefsField,
+    XModuleUserStateSummaryField
+)
 
 log = logging.getLogger(__name__)
 
@@ -82,6 +91,14 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+def _chunked_query_count(items):
+    """
+    Return the number of queries `ChunkingManager.chunked_filter` issues to
+    select `items`.
+    """
+    return (len(items) + ChunkingManager.CHUNK_SIZE - 1) // ChunkingManager.CHUNK_SIZE
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -320,6 +337,19 @@ class DjangoOrmFieldCache(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def query_count(self, xblocks, aside_types):
+        """
+        Return the number of queries :meth:`cache_fields` issues to load the
+        fields of the supplied ``xblocks`` and ``aside_types``.
+
+        Arguments:
+            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
+            aside_types (list of str): Asides to load field for (which annotate the supplied
+                xblocks).
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def _cache_key_for_field_object(self, field_object):
         """
@@ -368,6 +398,20 @@ class UserStateCache(object):
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    def query_count(self, xblocks, aside_types):
+        """
+        Return the number of queries :meth:`cache_fields` issues to load the
+        fields of the supplied ``xblocks`` and ``aside_types``.
+
+        Arguments:
+            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
+            aside_types (list of str): Aside types to cache fields for.
+        """
+        usage_keys_by_course = defaultdict(list)
+        for usage_key in _all_usage_keys(xblocks, aside_types):
+            usage_keys_by_course[usage_key.course_key].append(usage_key)
+        return sum(_chunked_query_count(usage_keys) for usage_keys in usage_keys_by_course.itervalues())
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -535,6 +579,13 @@ class UserStateSummaryCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def query_count(self, xblocks, aside_types):
+        """
+        Return the number of queries :meth:`cache_fields` issues to load the
+        fields of the supplied ``xblocks`` and ``aside_types``.
+        """
+        return _chunked_query_count(_all_usage_keys(xblocks, aside_types))
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -598,6 +649,13 @@ class PreferencesCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def query_count(self, xblocks, aside_types):
+        """
+        Return the number of queries :meth:`cache_fields` issues to load the
+        fields of the supplied ``xblocks`` and ``aside_types``.
+        """
+        return _chunked_query_count(_all_block_types(xblocks, aside_types))
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -658,6 +716,13 @@ class UserInfoCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def query_count(self, xblocks, aside_types):
+        """
+        Return the number of queries :meth:`cache_fields` issues to load the
+        fields of the supplied ``xblocks`` and ``aside_types``.
+        """
+        return 1
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -677,6 +742,90 @@ class UserInfoCache(DjangoOrmFieldCache):
         return key.field_name
 
 
+class PrefetchPlanner(object):
+    """
+    Plans the queries a FieldDataCache issues to prefetch the field data of
+    its descriptors.
+
+    Each scope is only queried for the descriptors that declare fields in
+    that scope and whose data in that scope hasn't been fetched yet, and
+    scopes with nothing left to fetch are skipped entirely.  The number of
+    queries issued for each scope is recorded in ``query_counts``.
+    """
+    def __init__(self, asides):
+        self.asides = asides
+        self.query_counts = defaultdict(int)
+        self._fetched = defaultdict(set)
+
+    @property
+    def total_query_count(self):
+        """
+        The number of queries issued for all scopes.
+        """
+        return sum(self.query_counts.itervalues())
+
+    def plan(self, descriptors, scopes):
+        """
+        Return a list of (scope, fields, descriptors) to fetch for the supplied
+        ``descriptors``, in the supplied ``scopes`` only, and record them as
+        fetched.
+
+        Arguments:
+            descriptors (list of :class:`XBlock`): The descriptors to prefetch field data for.
+            scopes (list of :class:`Scope`): The scopes that can be prefetched.
+        """
+        descriptor_scope_fields = []
+        for descriptor in descriptors:
+            scope_fields = defaultdict(list)
+            for field in descriptor.fields.values():
+                if field.scope in scopes:
+                    scope_fields[field.scope].append(field)
+            descriptor_scope_fields.append((descriptor, scope_fields))
+        batch_scopes = set(scope for _, scope_fields in descriptor_scope_fields for scope in scope_fields)
+
+        fields_to_fetch = defaultdict(dict)
+        descriptors_to_fetch = defaultdict(list)
+        for descriptor, scope_fields in descriptor_scope_fields:
+            # Asides may store data for a descriptor in a scope it declares
+            # no fields in itself, so it is fetched in all the scopes of the batch.
+            for scope in (batch_scopes if self.asides else scope_fields.keys()):
+                fetched = self._fetched[scope]
+                prefetch_key = self._prefetch_key(scope, descriptor)
+                new_fields = [field for field in scope_fields[scope] if (prefetch_key, field.name) not in fetched]
+                if self.asides and (prefetch_key, None) not in fetched:
+                    fetched.add((prefetch_key, None))
+                elif not new_fields:
+                    continue
+                fetched.update((prefetch_key, field.name) for field in new_fields)
+                descriptors_to_fetch[scope].append(descriptor)
+                for field in new_fields:
+                    fields_to_fetch[scope][field.name] = field
+
+        return [
+            (scope, fields_to_fetch[scope].values(), descriptors_to_fetch[scope])
+            for scope in scopes
+            if descriptors_to_fetch[scope]
+        ]
+
+    def record_queries(self, scope, query_count):
+        """
+        Record that ``query_count`` queries were issued for ``scope``.
+        """
+        self.query_counts[scope] += query_count
+
+    def _prefetch_key(self, scope, descriptor):
+        """
+        Return what identifies the rows holding the ``scope`` data of ``descriptor``
+        (along with the field names).
+        """
+        if scope in (Scope.user_state, Scope.user_state_summary):
+            return descriptor.scope_ids.usage_id
+        elif scope == Scope.preferences:
+            return BlockTypeKeyV1(descriptor.entry_point, descriptor.scope_ids.block_type)
+        else:
+            return None
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
@@ -722,6 +871,7 @@ class FieldDataCache(object):
             ),
         }
         self.scorable_locations = set()
+        self.prefetch_planner = PrefetchPlanner(self.asides)
         self.add_descriptors_to_cache(descriptors)
 
     def add_descriptors_to_cache(self, descriptors):
@@ -730,11 +880,11 @@ class FieldDataCache(object):
         """
         if self.user.is_authenticated():
             self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
-            for scope, fields in self._fields_to_cache(descriptors).items():
-                if scope not in self.cache:
-                    continue
-
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+            for scope, fields, scope_descriptors in self.prefetch_planner.plan(descriptors, self.cache.keys()):
+                self.cache[scope].cache_fields(fields, scope_descriptors, self.asides)
+                self.prefetch_planner.record_queries(
+                    scope, self.cache[scope].query_count(scope_descriptors, self.asides)
+                )
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -793,16 +943,6 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
-    def _fields_to_cache(self, descriptors):
-        """
-        Returns a map of scopes to fields in that scope that should be cached
-        """
-        scope_map = defaultdict(set)
-        for descriptor in descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
-
     @contract(key=DjangoKeyValueStore.Key)
     def get(self, key):
         """
@@ -988,12 +1128,41 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def bulk_create_for_locations(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients for all of the given users, with data for the
+        given locations pre-fetched in a single query.
+
+        Returns a dict mapping each user_id to its ScoresClient.
+        """
+        clients = {}
+        for user_id in user_ids:
+            clients[user_id] = cls(course_id, user_id)
+            clients[user_id]._has_fetched = True  # pylint: disable=protected-access
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            clients[user_id]._locations_to_scores[location.map_into_course(course_id)] = cls.Score(  # pylint: disable=protected-access
+                correct, total, created
+            )
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
     """
     Set the score and max_score for the specified user and xblock usage.
     """
+    # Write any pending state first, so that the state history stays in order.
+    flush_write_behind()
+
     created = False
     kwargs = {"student_id": user_id, "module_state_key": usage_key, "course_id": usage_key.course_key}
     try:
@@ -44,6 +44,9 @@ class ChunkingManager(models.Manager):
     the ability to make select queries with specific chunk sizes.
     """
 
+    # The default number of items passed to each query by chunked_filter.
+    CHUNK_SIZE = 500
+
     class Meta(object):
         app_label = "courseware"
 
@@ -63,7 +66,7 @@ class ChunkingManager(models.Manager):
                 ``__in`` key.
             chunk_size (int): The size of chunks to pass. Defaults to 500.
         """
-        chunk_size = kwargs.pop('chunk_size', 500)
+        chunk_size = kwargs.pop('chunk_size', self.CHUNK_SIZE)
         res = itertools.chain.from_iterable(
             self.filter(**dict([(chunk_field, chunk)] + kwargs.items()))
             for chunk in chunks(items, chunk_size)
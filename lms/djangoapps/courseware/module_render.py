@@ -31,7 +31,7 @@ from xblock.runtime import KvsFieldData
 
 import static_replace
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import get_user_role, has_access
+from courseware.access import get_required_content, get_user_role, has_access, precomputed_access
 from courseware.entrance_exams import user_can_skip_entrance_exam, user_has_passed_entrance_exam
 from courseware.masquerade import (
     MasqueradingKeyValueStore,
@@ -40,6 +40,7 @@ from courseware.masquerade import (
     setup_masquerade
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.user_state_client import write_behind
 from edxmako.shortcuts import render_to_string
 from eventtracking import tracker
 from lms.djangoapps.grades.signals.signals import SCORE_PUBLISHED
@@ -51,6 +52,7 @@ from openedx.core.djangoapps.bookmarks.services import BookmarksService
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.credit.services import CreditService
 from openedx.core.djangoapps.monitoring_utils import set_custom_metrics_for_course_key, set_monitoring_transaction_name
+from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag, WaffleFlagNamespace
 from openedx.core.djangoapps.util.user_utils import SystemUser
 from openedx.core.lib.gating.services import GatingService
 from openedx.core.lib.license import wrap_with_license
@@ -83,6 +85,10 @@ from .field_overrides import OverrideFieldData
 
 log = logging.getLogger(__name__)
 
+# Coalesces the user state writes made by each XBlock handler call, and
+# writes them in bulk once the handler returns.
+WRITE_BEHIND_USER_STATE_FLAG = CourseWaffleFlag(WaffleFlagNamespace(name='courseware'), 'write_behind_user_state')
+
 if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
     REQUESTS_AUTH = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
 else:
@@ -149,7 +155,7 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     field_data_cache must include data from the course module and 2 levels of its descendants
     '''
 
-    with modulestore().bulk_operations(course.id):
+    with modulestore().bulk_operations(course.id), precomputed_access(user, course, depth=2):
         course_module = get_module_for_descriptor(
             user, request, course, field_data_cache, course.id, course=course
         )
@@ -161,7 +167,7 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
 
         # Check for content which needs to be completed
         # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course.id, user)
+        required_content = get_required_content(course.id, user)
 
         # The user may not actually have to complete the entrance exam, if one is required
         if user_can_skip_entrance_exam(user, course):
@@ -1066,7 +1072,11 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course
         req = django_to_webob_request(request)
         try:
             with tracker.get_tracker().context(tracking_context_name, tracking_context):
-                resp = instance.handle(handler, req, suffix)
+                if WRITE_BEHIND_USER_STATE_FLAG.is_enabled(course_key):
+                    with write_behind():
+                        resp = instance.handle(handler, req, suffix)
+                else:
+                    resp = instance.handle(handler, req, suffix)
                 if suffix == 'problem_check' \
                         and course \
                         and getattr(course, 'entrance_exam_enabled', False) \
@@ -4,6 +4,10 @@ by the individual due dates feature.
 """
 import json
 
+from six import text_type
+
+from openedx.core.djangoapps.request_cache import get_cache
+
 from .field_overrides import FieldOverrideProvider
 from .models import StudentFieldOverride
 
@@ -43,19 +47,44 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    course_overrides = _get_overrides_for_user_in_course(user, block.runtime.course_id)
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for field_name, value in course_overrides.get(text_type(block.location), {}).iteritems():
+        field = block.fields[field_name]
+        overrides[field_name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_overrides_for_user_in_course(user, course_id):
+    """
+    Gets all of the individual student overrides for given user in the given
+    course, with a single query per request.  Returns a dictionary mapping the
+    serialized locations of the overridden blocks to dictionaries of their
+    serialized field override values, keyed by field name.
+    """
+    overrides_cache = get_cache('courseware.student_field_overrides')
+    cache_key = (user.id, course_id)
+    if cache_key not in overrides_cache:
+        overrides = {}
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_id,
+            student_id=user.id,
+        )
+        for override in query:
+            overrides.setdefault(text_type(override.location), {})[override.field] = override.value
+        overrides_cache[cache_key] = overrides
+    return overrides_cache[cache_key]
+
+
+def _clear_cached_overrides(user, block):
+    """
+    Forgets the overrides of the given user that were read for the block and
+    its course, after they have been changed.
+    """
+    get_cache('courseware.student_field_overrides').pop((user.id, block.runtime.course_id), None)
+    getattr(block, '_student_overrides', {}).pop(user.id, None)
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -70,6 +99,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    _clear_cached_overrides(user, block)
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +117,4 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    _clear_cached_overrides(user, block)
@@ -671,6 +671,61 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase, MilestonesTes
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
 
+    def test_precomputed_access(self):
+        """
+        Tests that the access decisions of a subtree are computed once and
+        then read from the table inside the context.
+        """
+        chapter = ItemFactory.create(category='chapter', parent_location=self.course.location)
+        sequential = ItemFactory.create(category='sequential', parent_location=chapter.location)
+        hidden = ItemFactory.create(
+            category='sequential', parent_location=chapter.location, visible_to_staff_only=True,
+        )
+        course = modulestore().get_course(self.course.id)
+
+        with access.precomputed_access(self.student, course, depth=2) as table:
+            self.assertEqual(table.user_role, 'student')
+            self.assertEqual(
+                {location: bool(result) for location, result in table.load_access.iteritems()},
+                {chapter.location: True, sequential.location: True, hidden.location: False},
+            )
+            with patch('courseware.access._has_group_access') as mock_group_access:
+                self.assertTrue(access.has_access(self.student, 'load', sequential, self.course.id))
+                self.assertFalse(access.has_access(self.student, 'load', hidden, self.course.id))
+                self.assertFalse(mock_group_access.called)
+
+            # Other users aren't affected by the table.
+            self.assertTrue(access.has_access(self.course_staff, 'load', hidden, self.course.id))
+
+        with patch('courseware.access._has_group_access', return_value=access.ACCESS_GRANTED) as mock_group_access:
+            access.has_access(self.student, 'load', sequential, self.course.id)
+            self.assertTrue(mock_group_access.called)
+
+    def test_precomputed_access_roles(self):
+        """
+        Tests that the user's roles are looked up once inside the context.
+        """
+        course = modulestore().get_course(self.course.id)
+        with access.precomputed_access(self.course_staff, course, depth=0):
+            with self.assertNumQueries(0):
+                self.assertEqual(access.get_user_role(self.course_staff, self.course.id), 'staff')
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course.id))
+                self.assertTrue(access.has_access(self.course_staff, 'staff', course))
+
+    @patch('util.milestones_helpers.get_required_content', return_value=['required'])
+    def test_precomputed_access_required_content(self, mock_required_content):
+        """
+        Tests that the content required by the user's milestones is looked
+        up once inside the context, and that nested contexts share a table.
+        """
+        course = modulestore().get_course(self.course.id)
+        with access.precomputed_access(self.student, course, depth=0) as table:
+            with access.precomputed_access(self.student, course, depth=0) as nested_table:
+                self.assertIs(nested_table, table)
+                self.assertEqual(access.get_required_content(self.course.id, self.student), ['required'])
+            self.assertEqual(access.get_required_content(self.course.id, self.student), ['required'])
+        self.assertEqual(mock_required_content.call_count, 1)
+
 
 @attr(shard=1)
 class UserRoleTestCase(TestCase):
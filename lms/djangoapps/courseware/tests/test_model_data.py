@@ -434,3 +434,39 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr(shard=1)
+class TestPrefetchPlanner(TestCase):
+    """Tests for the queries FieldDataCache plans to prefetch field data"""
+    def setUp(self):
+        super(TestPrefetchPlanner, self).setUp()
+        self.user = UserFactory.create(username='user')
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'b_field'),
+            mock_field(Scope.settings, 'c_field'),
+        ])
+
+    def test_scopes_without_fields_are_skipped(self):
+        with self.assertNumQueries(2):
+            field_data_cache = FieldDataCache([self.descriptor], course_id, self.user)
+
+        self.assertEqual(
+            dict(field_data_cache.prefetch_planner.query_counts),
+            {Scope.user_state: 1, Scope.preferences: 1},
+        )
+        self.assertEqual(field_data_cache.prefetch_planner.total_query_count, 2)
+
+    def test_fetched_descriptors_are_skipped(self):
+        field_data_cache = FieldDataCache([self.descriptor], course_id, self.user)
+
+        with self.assertNumQueries(0):
+            field_data_cache.add_descriptors_to_cache([self.descriptor])
+        self.assertEqual(field_data_cache.prefetch_planner.total_query_count, 2)
+
+        # Only the new field is fetched for a descriptor that was already fetched.
+        descriptor = mock_descriptor([mock_field(Scope.preferences, 'b_field'), mock_field(Scope.user_info, 'd_field')])
+        with self.assertNumQueries(1):
+            field_data_cache.add_descriptors_to_cache([descriptor])
+        self.assertEqual(field_data_cache.prefetch_planner.query_counts[Scope.user_info], 1)
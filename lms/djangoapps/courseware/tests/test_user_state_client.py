@@ -3,14 +3,17 @@ Black-box tests of the DjangoUserStateClient against the semantics
 defined in edx_user_state_client.
 """
 
+import json
 from collections import defaultdict
 from unittest import skip
 
 from django.test import TestCase
 from edx_user_state_client.tests import UserStateClientTestBase
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
 
+from courseware.models import StudentModule
 from courseware.tests.factories import UserFactory
-from courseware.user_state_client import DjangoXBlockUserStateClient
+from courseware.user_state_client import DjangoXBlockUserStateClient, write_behind
 
 
 class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
@@ -67,3 +70,46 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestWriteBehind(TestCase):
+    """
+    Tests of the write-behind mode of the DjangoUserStateClient.
+    """
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestWriteBehind, self).setUp()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user)
+        course_key = CourseLocator('org', 'course', 'run')
+        self.problem_key = BlockUsageLocator(course_key, 'problem', 'problem')
+        self.video_key = BlockUsageLocator(course_key, 'video', 'video')
+
+    def _stored_state(self, block_key):
+        return json.loads(StudentModule.objects.get(student=self.user, module_state_key=block_key).state)
+
+    def test_writes_are_coalesced(self):
+        self.client.set_many(self.user.username, {self.problem_key: {'a_field': 1}})
+
+        with write_behind():
+            with self.assertNumQueries(0):
+                self.client.set_many(self.user.username, {self.problem_key: {'a_field': 2}, self.video_key: {'x': 1}})
+                self.client.set_many(self.user.username, {self.problem_key: {'b_field': 3}, self.video_key: {'x': 2}})
+
+        self.assertEqual(self._stored_state(self.problem_key), {'a_field': 2, 'b_field': 3})
+        self.assertEqual(self._stored_state(self.video_key), {'x': 2})
+        # One history entry for the first write, and one for all the coalesced writes.
+        self.assertEqual(len(list(self.client.get_history(self.user.username, self.problem_key))), 2)
+
+    def test_reads_flush_pending_writes(self):
+        with write_behind():
+            self.client.set_many(self.user.username, {self.problem_key: {'a_field': 1}})
+            states = list(self.client.get_many(self.user.username, [self.problem_key]))
+            self.assertEqual([state.state for state in states], [{'a_field': 1}])
+
+            self.client.set_many(self.user.username, {self.problem_key: {'b_field': 2}})
+
+        self.assertEqual(self._stored_state(self.problem_key), {'a_field': 1, 'b_field': 2})
+        self.assertEqual(len(list(self.client.get_history(self.user.username, self.problem_key))), 2)
@@ -5,17 +5,23 @@ data in a Django ORM model.
 
 import itertools
 import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from operator import attrgetter
 from time import time
 
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
 import dogstats_wrapper as dog_stats_api
-from courseware.models import BaseStudentModuleHistory, StudentModule
+from courseware.models import BaseStudentModuleHistory, StudentModule, StudentModuleHistory
 from openedx.core.djangoapps import monitoring_utils
 
 try:
@@ -27,6 +33,76 @@ except ImportError:
 log = logging.getLogger(__name__)
 
 
+class _WriteBehindBuffers(threading.local):
+    """
+    A thread local holding the stack of write-behind buffers in use.
+    """
+    buffers = ()
+
+
+_WRITE_BEHIND_BUFFERS = _WriteBehindBuffers()
+
+
+class _WriteBehindBuffer(object):
+    """
+    The user state writes made while write-behind is in use, coalesced per
+    (user, block) pair.
+    """
+    def __init__(self):
+        self.users = {}
+        self.states = OrderedDict()
+
+    def add(self, user, block_keys_to_state):
+        """
+        Overlay the states in `block_keys_to_state` over the pending states of
+        the same blocks for `user`.
+        """
+        self.users[user.username] = user
+        for usage_key, state in block_keys_to_state.iteritems():
+            self.states.setdefault((user.username, usage_key), {}).update(state)
+
+    def flush(self):
+        """
+        Write all pending states, in bulk for each user.
+        """
+        states_by_user = OrderedDict()
+        for (username, usage_key), state in self.states.iteritems():
+            states_by_user.setdefault(username, OrderedDict())[usage_key] = state
+        self.states.clear()
+
+        for username, block_keys_to_state in states_by_user.iteritems():
+            user = self.users[username]
+            DjangoXBlockUserStateClient(user).bulk_set_many(user, block_keys_to_state)
+
+
+@contextmanager
+def write_behind():
+    """
+    A context manager inside which `DjangoXBlockUserStateClient.set_many`
+    coalesces all writes to the same (user, block) pair, and which writes them
+    in bulk on exit, inside the context of a `with` statement.
+
+    Any read or delete of user state flushes the pending writes first, so
+    readers never see stale state.
+    """
+    write_buffer = _WriteBehindBuffer()
+    prev = _WRITE_BEHIND_BUFFERS.buffers
+    _WRITE_BEHIND_BUFFERS.buffers += (write_buffer,)
+    try:
+        yield
+    finally:
+        _WRITE_BEHIND_BUFFERS.buffers = prev
+        write_buffer.flush()
+
+
+def flush_write_behind():
+    """
+    Write the pending states of all write-behind buffers in use.
+    """
+    for write_buffer in _WRITE_BEHIND_BUFFERS.buffers:
+        write_buffer.flush()
+
+
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
     An interface that uses the Django ORM StudentModule as a backend.
@@ -85,6 +161,8 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             username (str): The name of the user to load `StudentModule`s for.
             block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
         """
+        flush_write_behind()
+
         course_key_func = attrgetter('course_key')
         by_course = itertools.groupby(
             sorted(block_keys, key=course_key_func),
@@ -268,6 +346,18 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        if _WRITE_BEHIND_BUFFERS.buffers:
+            self._nr_stat_increment('set_many', 'write_behind')
+            _WRITE_BEHIND_BUFFERS.buffers[-1].add(user, block_keys_to_state)
+            return
+
+        self._set_many(user, block_keys_to_state)
+
+    def _set_many(self, user, block_keys_to_state):
+        """
+        Overlay the states in `block_keys_to_state` over the stored states of
+        `user`, one block at a time.
+        """
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
@@ -337,6 +427,111 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'set_many.response_time', duration)
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def bulk_set_many(self, user, block_keys_to_state):
+        """
+        Overlay the states in `block_keys_to_state` over the stored states of
+        `user`, reading the stored states in one query, creating all new rows
+        in one query and writing the state history of all blocks in one query
+        per history table.
+
+        Arguments:
+            user (:class:`~User`): The user whose state should be set.
+            block_keys_to_state (dict): A dict mapping UsageKeys to state dicts.
+        """
+        if not block_keys_to_state:
+            return
+
+        evt_time = time()
+        self._nr_stat_increment('bulk_set_many', 'calls')
+
+        student_modules = {
+            usage_key: student_module
+            for student_module, usage_key in self._get_student_modules(user.username, block_keys_to_state.keys())
+        }
+
+        new_modules = []
+        updated_modules = []
+        for usage_key, state in block_keys_to_state.iteritems():
+            student_module = student_modules.get(usage_key)
+            if student_module is None:
+                new_modules.append(StudentModule(
+                    student=user,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    module_type=usage_key.block_type,
+                    state=json.dumps(state),
+                ))
+            else:
+                current_state = {} if student_module.state is None else json.loads(student_module.state)
+                current_state.update(state)
+                student_module.state = json.dumps(current_state)
+                updated_modules.append(student_module)
+
+        try:
+            with transaction.atomic():
+                modified = timezone.now()
+                for student_module in updated_modules:
+                    student_module.modified = modified
+                    StudentModule.objects.filter(id=student_module.id).update(
+                        state=student_module.state, modified=modified,
+                    )
+                if new_modules:
+                    StudentModule.objects.bulk_create(new_modules)
+        except IntegrityError:
+            # Another request created some of these rows in the meantime, so
+            # fall back to writing them one at a time.
+            log.warning("bulk_set_many: IntegrityError for student %s, writing %d blocks individually",
+                        user, len(block_keys_to_state))
+            self._set_many(user, block_keys_to_state)
+            return
+
+        history_modules = [
+            student_module for student_module in updated_modules
+            if student_module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+        ]
+        new_history_keys = [
+            student_module.module_state_key for student_module in new_modules
+            if student_module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+        ]
+        if new_history_keys:
+            # bulk_create doesn't set the ids of the new rows, which their history needs.
+            history_modules.extend(StudentModule.objects.filter(student=user, module_state_key__in=new_history_keys))
+        self._bulk_save_history(history_modules)
+
+        duration = (time() - evt_time) * 1000  # milliseconds
+        self._ddog_histogram(evt_time, 'bulk_set_many.blks_created', len(new_modules))
+        self._ddog_histogram(evt_time, 'bulk_set_many.blks_updated', len(updated_modules))
+        self._ddog_histogram(evt_time, 'bulk_set_many.response_time', duration)
+        self._nr_stat_accumulate('bulk_set_many', 'duration', duration)
+
+    def _bulk_save_history(self, student_modules):
+        """
+        Write the history entries that saving each of `student_modules` would
+        have written, in one query per history table.
+        """
+        if not student_modules:
+            return
+
+        history_classes = []
+        if not settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+            history_classes.append(StudentModuleHistory)
+        if apps.is_installed('coursewarehistoryextended'):
+            from coursewarehistoryextended.models import StudentModuleHistoryExtended
+            history_classes.append(StudentModuleHistoryExtended)
+
+        for history_class in history_classes:
+            history_class.objects.bulk_create([
+                history_class(
+                    student_module=student_module,
+                    version=None,
+                    created=student_module.modified,
+                    state=student_module.state,
+                    grade=student_module.grade,
+                    max_grade=student_module.max_grade,
+                )
+                for student_module in student_modules
+            ])
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
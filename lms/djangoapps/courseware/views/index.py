@@ -43,7 +43,7 @@ from util.views import ensure_valid_course_key
 from xmodule.modulestore.django import modulestore
 from xmodule.x_module import STUDENT_VIEW
 from .views import CourseTabView
-from ..access import has_access
+from ..access import has_access, precomputed_access
 from ..access_utils import check_course_open_for_learner
 from ..courses import get_course_with_access, get_current_child, get_studio_url
 from ..entrance_exams import (
@@ -120,7 +120,10 @@ class CoursewareIndex(View):
                 )
                 self.is_staff = has_access(request.user, 'staff', self.course)
                 self._setup_masquerade_for_effective_user()
-                return self.render(request)
+                # Compute the effective user's roles, milestones and chapter and section
+                # access once, and memoize the rest as the section is rendered.
+                with precomputed_access(self.effective_user, self.course, depth=CONTENT_DEPTH):
+                    return self.render(request)
         except Exception as exception:  # pylint: disable=broad-except
             return CourseTabView.handle_exceptions(request, self.course, exception)
 
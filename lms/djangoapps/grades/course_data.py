@@ -14,7 +14,15 @@ class CourseData(object):
     This is an in-memory object that maintains its own internal
     cache during its lifecycle.
     """
-    def __init__(self, user, course=None, collected_block_structure=None, structure=None, course_key=None):
+    def __init__(
+            self,
+            user,
+            course=None,
+            collected_block_structure=None,
+            structure=None,
+            course_key=None,
+            course_blocks_batch=None,
+    ):
         if not any([course, collected_block_structure, structure, course_key]):
             raise ValueError(
                 "You must specify one of course, collected_block_structure, structure, or course_key to this method."
@@ -25,6 +33,7 @@ class CourseData(object):
         self._course = course
         self._course_key = course_key
         self._location = None
+        self._course_blocks_batch = course_blocks_batch
 
     @property
     def course_key(self):
@@ -50,7 +59,9 @@ class CourseData(object):
 
     @property
     def structure(self):
-        if self._structure is None:
+        if self._structure is None and self._course_blocks_batch is not None:
+            self._structure = self._course_blocks_batch.get_transformed(self.user.id)
+        elif self._structure is None:
             self._structure = get_course_blocks(
                 self.user,
                 self.location,
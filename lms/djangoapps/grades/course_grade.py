@@ -242,6 +242,9 @@ class CourseGrade(CourseGradeBase):
     Course Grade class when grades are updated or read from storage.
     """
     def __init__(self, user, course_data, *args, **kwargs):
+        # When persist_subsections is False, subsection grades that are
+        # force-updated are left for the caller to persist in bulk.
+        self._persist_subsections = kwargs.pop('persist_subsections', True)
         super(CourseGrade, self).__init__(user, course_data, *args, **kwargs)
         self._subsection_grade_factory = SubsectionGradeFactory(user, course_data=course_data)
 
@@ -279,7 +282,11 @@ class CourseGrade(CourseGradeBase):
 
     def _get_subsection_grade(self, subsection, force_update_subsections=False):
         if self.force_update_subsections:
-            return self._subsection_grade_factory.update(subsection, force_update_subsections=force_update_subsections)
+            return self._subsection_grade_factory.update(
+                subsection,
+                force_update_subsections=force_update_subsections,
+                persist_grade=self._persist_subsections,
+            )
         else:
             # Pass read_only here so the subsection grades can be persisted in bulk at the end.
             return self._subsection_grade_factory.create(subsection, read_only=True)
@@ -2,17 +2,21 @@
 Course Grade Factory Class
 """
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import dogstats_wrapper as dog_stats_api
+from django.db import transaction
 from six import text_type
 
+from lms.djangoapps.course_blocks.api import get_course_blocks_for_users
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE_GRADE_NOW_PASSED
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade, prefetch
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks, clear_prefetched_data, prefetch
+from .subsection_grade import CreateSubsectionGrade
 
 log = getLogger(__name__)
 
@@ -23,6 +27,9 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of users whose course structures are transformed as a batch in iter.
+    USER_BATCH_SIZE = 100
+
     def read(
             self,
             user,
@@ -31,6 +38,7 @@ class CourseGradeFactory(object):
             course_structure=None,
             course_key=None,
             create_if_needed=True,
+            course_blocks_batch=None,
     ):
         """
         Returns the CourseGrade for the given user in the course.
@@ -40,9 +48,12 @@ class CourseGradeFactory(object):
         Else, returns None.
 
         At least one of course, collected_block_structure, course_structure,
-        or course_key should be provided.
+        or course_key should be provided. If course_structure is not
+        provided, it is transformed by course_blocks_batch, if provided.
         """
-        course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
+        course_data = CourseData(
+            user, course, collected_block_structure, course_structure, course_key, course_blocks_batch,
+        )
         try:
             return self._read(user, course_data)
         except PersistentCourseGrade.DoesNotExist:
@@ -61,15 +72,19 @@ class CourseGradeFactory(object):
             course_structure=None,
             course_key=None,
             force_update_subsections=False,
+            course_blocks_batch=None,
     ):
         """
         Computes, updates, and returns the CourseGrade for the given
         user in the course.
 
         At least one of course, collected_block_structure, course_structure,
-        or course_key should be provided.
+        or course_key should be provided. If course_structure is not
+        provided, it is transformed by course_blocks_batch, if provided.
         """
-        course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
+        course_data = CourseData(
+            user, course, collected_block_structure, course_structure, course_key, course_blocks_batch,
+        )
         return self._update(
             user,
             course_data,
@@ -92,6 +107,10 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        When force_update is set and grades are persisted, the grades of each
+        batch of users are computed first and then written together, with
+        bulk queries for the subsection and course grade rows.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -102,17 +121,126 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
-                yield self._iter_grade_result(user, course_data, force_update)
+        users = iter(users)
+        while True:
+            users_batch = list(islice(users, self.USER_BATCH_SIZE))
+            if not users_batch:
+                break
 
-    def _iter_grade_result(self, user, course_data, force_update):
+            # The course structures of the users in the batch are
+            # transformed as needed, sharing their bulk-loaded data.
+            course_blocks_batch = get_course_blocks_for_users(
+                users_batch,
+                course_data.location,
+                collected_block_structure=course_data.collected_structure,
+            )
+            if force_update and should_persist_grades(course_data.course_key):
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter_batch', tags=stats_tags):
+                    results = self._iter_update_batch(users_batch, course_data, course_blocks_batch)
+                for result in results:
+                    yield result
+                continue
+
+            for user in users_batch:
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                    yield self._iter_grade_result(user, course_data, force_update, course_blocks_batch)
+
+    def _iter_update_batch(self, users_batch, course_data, course_blocks_batch):
+        """
+        Computes and saves the grades of all the users in users_batch,
+        returning their GradeResults in order.
+
+        The grades of all the users are computed before any are saved, and
+        are then written in one transaction.  If that fails, the batch is
+        graded again one user at a time, so that a single bad record only
+        fails the grade of its own user.
+        """
+        course_key = course_data.course_key
+        VisibleBlocks.bulk_read(course_key)
+
+        results = []
+        for user in users_batch:
+            try:
+                user_course_data = CourseData(
+                    user,
+                    course=course_data.course,
+                    collected_block_structure=course_data.collected_structure,
+                    course_key=course_key,
+                    course_blocks_batch=course_blocks_batch,
+                )
+                course_grade = CourseGrade(
+                    user,
+                    user_course_data,
+                    force_update_subsections=True,
+                    persist_subsections=False,
+                ).update()
+                # Evaluate all the subsection grades now, so errors are
+                # attributed to this user rather than to the whole batch.
+                course_grade.attempted  # pylint: disable=pointless-statement
+                results.append(self.GradeResult(user, course_grade, None))
+            except Exception as exc:  # pylint: disable=broad-except
+                log.exception(
+                    'Cannot grade student %s in course %s because of exception: %s',
+                    user.id,
+                    course_key,
+                    text_type(exc)
+                )
+                results.append(self.GradeResult(user, None, exc))
+
+        graded = [result for result in results if result.course_grade is not None]
+        try:
+            with transaction.atomic():
+                subsection_grades = CreateSubsectionGrade.bulk_update_or_create_models(
+                    [
+                        (result.student, result.course_grade.subsection_grades.itervalues())
+                        for result in graded
+                    ],
+                    course_key,
+                    emit_events=False,
+                )
+                course_grades = PersistentCourseGrade.bulk_update_or_create(
+                    course_key,
+                    [
+                        self._persisted_course_grade_params(
+                            result.student, result.course_grade.course_data, result.course_grade,
+                        )
+                        for result in graded
+                        if result.course_grade.attempted
+                    ],
+                    emit_events=False,
+                )
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Grades: Bulk update failed for a batch of users in %s, updating individually', course_key)
+            # The request caches may hold rows written by the rolled back
+            # transaction, which the per-user updates must not reuse.
+            clear_prefetched_data(course_key)
+            return [
+                self._iter_grade_result(user, course_data, True, course_blocks_batch)
+                for user in users_batch
+            ]
+
+        # The grade_calculated events are only emitted once the grades are saved,
+        # so a failed batch, which is graded again above, doesn't emit them twice.
+        PersistentSubsectionGrade.emit_grade_calculated_events(subsection_grades)
+        PersistentCourseGrade.emit_grade_calculated_events(course_grades)
+
+        for result in graded:
+            course_grade = result.course_grade
+            self._send_course_grade_signals(result.student, course_grade.course_data, course_grade)
+            log.info(
+                u'Grades: Update, %s, User: %s, %s, persisted: %s',
+                course_grade.course_data.full_string(), result.student.id, course_grade, course_grade.attempted,
+            )
+        return results
+
+    def _iter_grade_result(self, user, course_data, force_update, course_blocks_batch):
         try:
             kwargs = {
                 'user': user,
                 'course': course_data.course,
                 'collected_block_structure': course_data.collected_structure,
-                'course_key': course_data.course_key
+                'course_key': course_data.course_key,
+                'course_blocks_batch': course_blocks_batch,
             }
             if force_update:
                 kwargs['force_update_subsections'] = True
@@ -183,16 +311,41 @@ class CourseGradeFactory(object):
         if should_persist:
             course_grade._subsection_grade_factory.bulk_create_unsaved()
             PersistentCourseGrade.update_or_create(
-                user_id=user.id,
-                course_id=course_data.course_key,
-                course_version=course_data.version,
-                course_edited_timestamp=course_data.edited_on,
-                grading_policy_hash=course_data.grading_policy_hash,
-                percent_grade=course_grade.percent,
-                letter_grade=course_grade.letter_grade or "",
-                passed=course_grade.passed,
+                **CourseGradeFactory._persisted_course_grade_params(user, course_data, course_grade)
             )
 
+        CourseGradeFactory._send_course_grade_signals(user, course_data, course_grade)
+
+        log.info(
+            u'Grades: Update, %s, User: %s, %s, persisted: %s',
+            course_data.full_string(), user.id, course_grade, should_persist,
+        )
+
+        return course_grade
+
+    @staticmethod
+    def _persisted_course_grade_params(user, course_data, course_grade):
+        """
+        Returns the parameters for creating/updating the persisted
+        course grade of the given user.
+        """
+        return dict(
+            user_id=user.id,
+            course_id=course_data.course_key,
+            course_version=course_data.version,
+            course_edited_timestamp=course_data.edited_on,
+            grading_policy_hash=course_data.grading_policy_hash,
+            percent_grade=course_grade.percent,
+            letter_grade=course_grade.letter_grade or "",
+            passed=course_grade.passed,
+        )
+
+    @staticmethod
+    def _send_course_grade_signals(user, course_data, course_grade):
+        """
+        Sends a COURSE_GRADE_CHANGED signal to listeners and a
+        COURSE_GRADE_NOW_PASSED if learner has passed course.
+        """
         COURSE_GRADE_CHANGED.send_robust(
             sender=None,
             user=user,
@@ -206,10 +359,3 @@ class CourseGradeFactory(object):
                 user=user,
                 course_id=course_data.course_key,
             )
-
-        log.info(
-            u'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
-        )
-
-        return course_grade
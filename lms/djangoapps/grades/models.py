@@ -10,8 +10,9 @@ persisted, course grades are also immune to changes in course content.
 
 import json
 import logging
+import threading
 from base64 import b64encode
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from hashlib import sha1
 
 from django.db import models
@@ -36,6 +37,41 @@ BLOCK_RECORD_LIST_VERSION = 1
 # grade calculation.
 BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'graded'])
 
+# Process-level index of BlockRecordList hashes, keyed by (course_key,
+# course_version) and then by the content of the block record list.  Most
+# learners in a course share the same visible blocks, so this saves
+# serializing and hashing the same lists over and over.  Only the most
+# recently used course versions are kept, so entries for outdated versions
+# of a course are dropped as newer ones are graded.
+BLOCK_RECORD_HASH_INDEX_VERSIONS = 32
+BLOCK_RECORD_HASH_INDEX_SIZE = 10000
+_BLOCK_RECORD_HASH_INDEX = OrderedDict()
+_BLOCK_RECORD_HASH_INDEX_LOCK = threading.Lock()
+
+
+def _block_record_hashes(course_key, course_version):
+    """
+    Returns the index of block record list hashes for the given version of
+    the course, creating it if needed.
+    """
+    index_key = (course_key, course_version)
+    with _BLOCK_RECORD_HASH_INDEX_LOCK:
+        hashes = _BLOCK_RECORD_HASH_INDEX.pop(index_key, None)
+        if hashes is None or len(hashes) >= BLOCK_RECORD_HASH_INDEX_SIZE:
+            hashes = {}
+        _BLOCK_RECORD_HASH_INDEX[index_key] = hashes
+        while len(_BLOCK_RECORD_HASH_INDEX) > BLOCK_RECORD_HASH_INDEX_VERSIONS:
+            _BLOCK_RECORD_HASH_INDEX.popitem(last=False)
+    return hashes
+
+
+def clear_block_record_hash_index():
+    """
+    Empties the process-level index of block record list hashes.
+    """
+    with _BLOCK_RECORD_HASH_INDEX_LOCK:
+        _BLOCK_RECORD_HASH_INDEX.clear()
+
 
 class BlockRecordList(tuple):
     """
@@ -113,11 +149,35 @@ class BlockRecordList(tuple):
         return cls(record_generator, course_key, version=data['version'])
 
     @classmethod
-    def from_list(cls, blocks, course_key):
+    def from_list(cls, blocks, course_key, course_version=None):
         """
         Return a BlockRecordList from the given list and course_key.
-        """
-        return cls(blocks, course_key)
+
+        If the course_version is given, the hash_value of the list is
+        looked up in, or else added to, the process-level index of hashes
+        for that version of the course.
+        """
+        block_list = cls(blocks, course_key)
+        if course_version is not None:
+            hashes = _block_record_hashes(course_key, course_version)
+            content_key = block_list._content_key()  # pylint: disable=protected-access
+            hash_value = hashes.get(content_key)
+            if hash_value is None:
+                hashes[content_key] = block_list.hash_value
+            else:
+                block_list.hash_value = hash_value
+        return block_list
+
+    def _content_key(self):
+        """
+        Returns a hashable key for the content of this list, which
+        distinguishes values that compare equal but serialize
+        differently, such as 1 and 1.0.
+        """
+        return (self.version,) + tuple(
+            (record, type(record.weight), type(record.raw_possible), type(record.graded))
+            for record in self
+        )
 
 
 class VisibleBlocks(models.Model):
@@ -236,6 +296,14 @@ class VisibleBlocks(models.Model):
             {visible_block.hashed: visible_block for visible_block in visible_blocks}
         )
 
+    @classmethod
+    def clear_cache(cls, course_key):
+        """
+        Removes the course's visible blocks from the request cache, so
+        that they are read again on next use.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
     @classmethod
     def _cache_key(cls, course_key):
         return u"visible_blocks_cache.{}".format(course_key)
@@ -392,11 +460,7 @@ class PersistentSubsectionGrade(TimeStampedModel):
             return
 
         PersistentSubsectionGradeOverride.prefetch(user_id, course_key)
-
-        map(cls._prepare_params, grade_params_iter)
-        VisibleBlocks.bulk_get_or_create([params['visible_blocks'] for params in grade_params_iter], course_key)
-        map(cls._prepare_params_visible_blocks_id, grade_params_iter)
-        map(cls._prepare_params_override, grade_params_iter)
+        cls._bulk_prepare_params(grade_params_iter, course_key)
 
         grades = [PersistentSubsectionGrade(**params) for params in grade_params_iter]
         grades = cls.objects.bulk_create(grades)
@@ -404,6 +468,79 @@ class PersistentSubsectionGrade(TimeStampedModel):
             cls._emit_grade_calculated_event(grade)
         return grades
 
+    @classmethod
+    def bulk_update_or_create_grades(cls, grade_params_iter, course_key, emit_events=True):
+        """
+        Bulk creation or update of grades, for any number of users in the course.
+
+        The existing grades are read with one query, and all the new grades
+        are created with another.  Existing grades are only written if their
+        values changed, and as in update_or_create_grade, an existing
+        first_attempted value is never replaced.
+
+        Pass emit_events=False to hold back the grade_calculated events, e.g.
+        until an enclosing transaction commits, and emit them later with
+        emit_grade_calculated_events.
+        """
+        grade_params_iter = list(grade_params_iter)
+        if not grade_params_iter:
+            return []
+
+        user_ids = {params['user_id'] for params in grade_params_iter}
+        PersistentSubsectionGradeOverride.bulk_prefetch(user_ids, course_key)
+        cls._bulk_prepare_params(grade_params_iter, course_key)
+
+        existing_grades = {
+            (grade.user_id, grade.full_usage_key): grade
+            for grade in cls.objects.filter(user_id__in=user_ids, course_id=course_key)
+        }
+        new_grades = []
+        updated_grades = []
+        for params in grade_params_iter:
+            grade = existing_grades.get((params['user_id'], params['usage_key']))
+            if grade is None:
+                new_grades.append(PersistentSubsectionGrade(**params))
+                continue
+
+            first_attempted = params.pop('first_attempted')
+            changes = {
+                field: value
+                for field, value in params.iteritems()
+                if field not in ('user_id', 'usage_key') and getattr(grade, field) != value
+            }
+            if first_attempted is not None and grade.first_attempted is None:
+                changes['first_attempted'] = first_attempted
+            if changes:
+                changes['modified'] = now()
+                cls.objects.filter(id=grade.id).update(**changes)
+                for field, value in changes.iteritems():
+                    setattr(grade, field, value)
+            updated_grades.append(grade)
+
+        grades = cls.objects.bulk_create(new_grades) + updated_grades
+        if emit_events:
+            cls.emit_grade_calculated_events(grades)
+        return grades
+
+    @classmethod
+    def emit_grade_calculated_events(cls, grades):
+        """
+        Emits the grade_calculated event of each of the given grades.
+        """
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+
+    @classmethod
+    def _bulk_prepare_params(cls, grade_params_iter, course_key):
+        """
+        Prepares the fields for many grade records at once, creating
+        any missing VisibleBlocks with a single query.
+        """
+        map(cls._prepare_params, grade_params_iter)
+        VisibleBlocks.bulk_get_or_create([params['visible_blocks'] for params in grade_params_iter], course_key)
+        map(cls._prepare_params_visible_blocks_id, grade_params_iter)
+        map(cls._prepare_params_override, grade_params_iter)
+
     @classmethod
     def _prepare_params(cls, params):
         """
@@ -412,7 +549,9 @@ class PersistentSubsectionGrade(TimeStampedModel):
         if not params.get('course_id', None):
             params['course_id'] = params['usage_key'].course_key
         params['course_version'] = params.get('course_version', None) or ""
-        params['visible_blocks'] = BlockRecordList.from_list(params['visible_blocks'], params['course_id'])
+        params['visible_blocks'] = BlockRecordList.from_list(
+            params['visible_blocks'], params['course_id'], params['course_version'],
+        )
 
     @classmethod
     def _prepare_params_visible_blocks_id(cls, params):
@@ -557,12 +696,89 @@ class PersistentCourseGrade(TimeStampedModel):
         cls._update_cache(course_id, user_id, grade)
         return grade
 
+    @classmethod
+    def bulk_update_or_create(cls, course_id, grade_params_list, emit_events=True):
+        """
+        Creates or updates the course grades of many users at once.
+
+        Each item of `grade_params_list` holds the `user_id` and the keyword
+        arguments that update_or_create would take.  Existing grades are read
+        with one query and new grades are created with another; existing
+        grades are only written if their values changed.  If `emit_events`
+        is False, the grade_calculated events are left for the caller to
+        emit with emit_grade_calculated_events.
+        Returns the list of PersistentCourseGrade objects.
+        """
+        if not grade_params_list:
+            return []
+
+        existing_grades = {
+            grade.user_id: grade
+            for grade in cls.objects.filter(
+                user_id__in=[params['user_id'] for params in grade_params_list],
+                course_id=course_id,
+            )
+        }
+        new_grades = []
+        updated_grades = []
+        for params in grade_params_list:
+            params = dict(params)
+            user_id = params.pop('user_id')
+            params.pop('course_id', None)
+            passed = params.pop('passed')
+            if params.get('course_version', None) is None:
+                params['course_version'] = ""
+
+            grade = existing_grades.get(user_id)
+            if grade is None:
+                grade = cls(user_id=user_id, course_id=course_id, **params)
+                if passed:
+                    grade.passed_timestamp = now()
+                new_grades.append(grade)
+                continue
+
+            changes = {
+                field: value
+                for field, value in params.iteritems()
+                if getattr(grade, field) != value
+            }
+            if passed and not grade.passed_timestamp:
+                changes['passed_timestamp'] = now()
+            if changes:
+                changes['modified'] = now()
+                cls.objects.filter(id=grade.id).update(**changes)
+                for field, value in changes.iteritems():
+                    setattr(grade, field, value)
+            updated_grades.append(grade)
+
+        grades = cls.objects.bulk_create(new_grades) + updated_grades
+        for grade in grades:
+            cls._update_cache(course_id, grade.user_id, grade)
+        if emit_events:
+            cls.emit_grade_calculated_events(grades)
+        return grades
+
+    @classmethod
+    def emit_grade_calculated_events(cls, grades):
+        """
+        Emits the grade_calculated event of each of the given grades.
+        """
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+
     @classmethod
     def _update_cache(cls, course_id, user_id, grade):
         course_cache = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_id))
         if course_cache is not None:
             course_cache[user_id] = grade
 
+    @classmethod
+    def clear_cache(cls, course_id):
+        """
+        Removes the course's prefetched grades from the request cache.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_id), None)
+
     @classmethod
     def _cache_key(cls, course_id):
         return u"grades_cache.{}".format(course_id)
@@ -602,6 +818,30 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_prefetch(cls, user_ids, course_key):
+        """
+        Prefetches the overrides of all the given users in the course with a single query.
+        """
+        overrides = {user_id: {} for user_id in user_ids}
+        for override in cls.objects.filter(
+                grade__user_id__in=overrides.keys(), grade__course_id=course_key
+        ).select_related('grade'):
+            overrides[override.grade.user_id][override.grade.usage_key] = override
+
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_overrides in overrides.iteritems():
+            cache[(user_id, str(course_key))] = user_overrides
+
+    @classmethod
+    def clear_cache(cls, course_key):
+        """
+        Removes the prefetched overrides of all users in the course from the request cache.
+        """
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for key in [key for key in cache if key[1] == str(course_key)]:
+            del cache[key]
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -620,3 +860,14 @@ class PersistentSubsectionGradeOverride(models.Model):
 def prefetch(user, course_key):
     PersistentSubsectionGradeOverride.prefetch(user.id, course_key)
     VisibleBlocks.bulk_read(course_key)
+
+
+def clear_prefetched_data(course_key):
+    """
+    Removes the course's visible blocks, course grades and overrides from
+    the request cache, e.g. when a transaction that added to them was
+    rolled back.
+    """
+    VisibleBlocks.clear_cache(course_key)
+    PersistentCourseGrade.clear_cache(course_key)
+    PersistentSubsectionGradeOverride.clear_cache(course_key)
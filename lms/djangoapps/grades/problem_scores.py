@@ -0,0 +1,215 @@
+"""
+Problem Scores Factory Class
+
+Computes learners' per-problem scores in bulk, for reports that only need
+those scores and the persisted course grade, without building a CourseGrade
+and its subsection grades for every learner.
+"""
+from collections import defaultdict, namedtuple
+from itertools import islice
+from logging import getLogger
+
+from six import text_type
+
+from courseware.model_data import ScoresClient
+from lms.djangoapps.course_blocks.api import get_course_blocks_for_users
+from student.models import anonymous_id_for_user
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
+
+from .config import assume_zero_if_absent, should_persist_grades
+from .course_data import CourseData
+from .course_grade import _uniqueify_and_keep_order
+from .course_grade_factory import CourseGradeFactory
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
+from .scores import possibly_scored
+from .subsection_grade import NonZeroSubsectionGrade
+
+log = getLogger(__name__)
+
+
+class ProblemScoresFactory(object):
+    """
+    Factory class to compute the problem scores of many learners in a course.
+    """
+    ProblemScoresResult = namedtuple('ProblemScoresResult', ['student', 'percent', 'problem_scores', 'error'])
+
+    # Number of users whose scores are read as a batch in iter.
+    USER_BATCH_SIZE = CourseGradeFactory.USER_BATCH_SIZE
+
+    def iter(self, users, course=None, collected_block_structure=None, course_key=None):
+        """
+        Given a course and an iterable of students (User), yield a
+        ProblemScoresResult for every student.  ProblemScoresResult is a
+        named tuple of:
+
+            (student, percent, problem_scores, error)
+
+        where percent is the student's course grade and problem_scores maps
+        the locations of the problems the student can see to their
+        ProblemScores, as in CourseGrade.problem_scores.  If an error
+        occurred, percent and problem_scores are None and error is the
+        exception.
+
+        The scores of learners with a persisted course grade are read in
+        bulk for each batch of learners.  All other learners are graded with
+        CourseGradeFactory, as before.
+        """
+        course_data = CourseData(
+            user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
+        )
+        course_key = course_data.course_key
+        if not should_persist_grades(course_key) or assume_zero_if_absent(course_key):
+            for result in CourseGradeFactory().iter(
+                    users, course_data.course, course_data.collected_structure, course_key,
+            ):
+                yield self._result_from_course_grade(result)
+            return
+
+        users = iter(users)
+        while True:
+            users_batch = list(islice(users, self.USER_BATCH_SIZE))
+            if not users_batch:
+                break
+
+            course_blocks_batch = get_course_blocks_for_users(
+                users_batch,
+                course_data.location,
+                collected_block_structure=course_data.collected_structure,
+            )
+            PersistentCourseGrade.prefetch(course_key, users_batch)
+            bulk_scores = _BulkProblemScores(course_data, users_batch, course_blocks_batch)
+            for user in users_batch:
+                yield self._iter_result(user, course_data, course_blocks_batch, bulk_scores)
+
+    def _iter_result(self, user, course_data, course_blocks_batch, bulk_scores):
+        try:
+            try:
+                persistent_grade = PersistentCourseGrade.read(user.id, course_data.course_key)
+            except PersistentCourseGrade.DoesNotExist:
+                course_grade = CourseGradeFactory().read(
+                    user,
+                    course=course_data.course,
+                    collected_block_structure=course_data.collected_structure,
+                    course_key=course_data.course_key,
+                    course_blocks_batch=course_blocks_batch,
+                )
+                return self.ProblemScoresResult(user, course_grade.percent, course_grade.problem_scores, None)
+            return self.ProblemScoresResult(
+                user, persistent_grade.percent_grade, bulk_scores.problem_scores(user), None,
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            # Keep marching on even if this student couldn't be graded for
+            # some reason, but log it for future reference.
+            log.exception(
+                'Cannot grade student %s in course %s because of exception: %s',
+                user.id,
+                course_data.course_key,
+                text_type(exc)
+            )
+            return self.ProblemScoresResult(user, None, None, exc)
+
+    def _result_from_course_grade(self, grade_result):
+        """
+        Returns the ProblemScoresResult for the given CourseGradeFactory.GradeResult.
+        """
+        course_grade = grade_result.course_grade
+        if not course_grade:
+            return self.ProblemScoresResult(grade_result.student, None, None, grade_result.error)
+        return self.ProblemScoresResult(grade_result.student, course_grade.percent, course_grade.problem_scores, None)
+
+
+class _BulkProblemScores(object):
+    """
+    The problem scores of a batch of learners, computed from their persisted
+    subsection grades and the scores read for all of them at once, exactly
+    as CourseGrade.problem_scores computes them for each learner.
+    """
+    def __init__(self, course_data, users, course_blocks_batch):
+        self.course_data = course_data
+        self.course_blocks_batch = course_blocks_batch
+        course_key = course_data.course_key
+        user_ids = [user.id for user in users]
+
+        scorable_locations = [
+            block_key for block_key in course_data.collected_structure if possibly_scored(block_key)
+        ]
+        self._csm_scores = ScoresClient.bulk_create_for_locations(course_key, user_ids, scorable_locations)
+        self._submissions_scores = _bulk_submissions_scores(course_key, users)
+
+        self._subsection_grades = defaultdict(dict)
+        for grade in PersistentSubsectionGrade.objects.filter(course_id=course_key, user_id__in=user_ids):
+            self._subsection_grades[grade.user_id][grade.full_usage_key] = grade
+
+        self._visible_blocks = VisibleBlocks.bulk_read(course_key)
+        self._block_records = {}
+
+    def problem_scores(self, user):
+        """
+        Returns a dict of the user's problem scores keyed by their locations.
+        """
+        structure = self.course_blocks_batch.get_transformed(user.id)
+        submissions_scores = self._submissions_scores[user.id]
+        csm_scores = self._csm_scores[user.id]
+        saved_subsection_grades = self._subsection_grades[user.id]
+
+        problem_scores = {}
+        for chapter_key in structure.get_children(self.course_data.location):
+            for subsection_key in _uniqueify_and_keep_order(structure.get_children(chapter_key)):
+                saved_grade = saved_subsection_grades.get(subsection_key)
+                if saved_grade:
+                    blocks = [
+                        (block.locator, block)
+                        for block in self._get_block_records(saved_grade.visible_blocks_id)
+                    ]
+                else:
+                    blocks = [
+                        (block_key, None)
+                        for block_key in structure.post_order_traversal(
+                            filter_func=possibly_scored,
+                            start_node=subsection_key,
+                        )
+                    ]
+                for block_key, persisted_block in blocks:
+                    problem_score = NonZeroSubsectionGrade._compute_block_score(  # pylint: disable=protected-access
+                        block_key, structure, submissions_scores, csm_scores, persisted_block,
+                    )
+                    if problem_score:
+                        problem_scores[block_key] = problem_score
+        return problem_scores
+
+    def _get_block_records(self, visible_blocks_id):
+        """
+        Returns the BlockRecordList with the given hash, parsing it
+        only once for all the learners in the batch.
+        """
+        block_records = self._block_records.get(visible_blocks_id)
+        if block_records is None:
+            visible_blocks = self._visible_blocks.get(visible_blocks_id)
+            if visible_blocks is None:
+                visible_blocks = VisibleBlocks.objects.get(hashed=visible_blocks_id)
+            block_records = self._block_records[visible_blocks_id] = visible_blocks.blocks
+        return block_records
+
+
+def _bulk_submissions_scores(course_key, users):
+    """
+    Returns the submissions API scores of the given users in the course,
+    keyed by user id, read with a single query.  Each user's scores are in
+    the form returned by submissions_api.get_scores.
+    """
+    user_ids_by_anonymous_id = {
+        anonymous_id_for_user(user, course_key, save=False): user.id for user in users
+    }
+    scores = {user.id: {} for user in users}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=text_type(course_key),
+        student_item__student_id__in=list(user_ids_by_anonymous_id),
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        if summary.latest.is_hidden():
+            continue
+        student_item = summary.student_item
+        user_id = user_ids_by_anonymous_id[student_item.student_id]
+        scores[user_id][student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
@@ -7,11 +7,18 @@ from logging import getLogger
 from courseware.model_data import get_score, set_score
 from django.dispatch import receiver
 from openedx.core.djangoapps.course_groups.signals.signals import COHORT_MEMBERSHIP_UPDATED
+from openedx.core.djangoapps.request_cache import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import user_by_anonymous_id
 from student.signals import ENROLLMENT_TRACK_UPDATED
 from submissions.models import score_reset, score_set
-from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
+from track.event_transaction_utils import (
+    create_new_event_transaction_id,
+    get_event_transaction_id,
+    get_event_transaction_type,
+    set_event_transaction_id,
+    set_event_transaction_type
+)
 from util.date_utils import to_timestamp
 from xblock.scorable import ScorableXBlockMixin, Score
 
@@ -30,6 +37,8 @@ from ..tasks import RECALCULATE_GRADE_DELAY_SECONDS, recalculate_subsection_grad
 
 log = getLogger(__name__)
 
+DEFERRED_SUBSECTION_UPDATES_CACHE = 'grades.deferred_subsection_updates'
+
 
 @receiver(score_set)
 def submissions_score_set_handler(sender, **kwargs):  # pylint: disable=unused-argument
@@ -205,24 +214,89 @@ def problem_raw_score_changed_handler(sender, **kwargs):  # pylint: disable=unus
 def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argument
     """
     Handles the PROBLEM_WEIGHTED_SCORE_CHANGED or SUBSECTION_OVERRIDE_CHANGED signals by
-    enqueueing a subsection update operation to occur asynchronously.
+    emitting the grade event and enqueueing a subsection update operation to occur
+    asynchronously.  Inside defer_subsection_updates, both are held back until it exits.
+    """
+    deferred_updates = get_cache(DEFERRED_SUBSECTION_UPDATES_CACHE).get('updates')
+    if deferred_updates is not None:
+        deferred_updates.append((kwargs, get_event_transaction_id(), get_event_transaction_type()))
+    else:
+        _enqueue_subsection_update(kwargs)
+
+
+def _enqueue_subsection_update(kwargs):
+    """
+    Emits the grade event and enqueues the subsection update for the
+    kwargs of a PROBLEM_WEIGHTED_SCORE_CHANGED or SUBSECTION_OVERRIDE_CHANGED
+    signal.
     """
     events.grade_updated(**kwargs)
-    recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=unicode(get_event_transaction_id()),
-            event_transaction_type=unicode(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-        ),
-        countdown=RECALCULATE_GRADE_DELAY_SECONDS,
+    task_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=unicode(get_event_transaction_id()),
+        event_transaction_type=unicode(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
     )
+    recalculate_subsection_grade_v3.apply_async(kwargs=task_kwargs, countdown=RECALCULATE_GRADE_DELAY_SECONDS)
+
+
+def _set_event_transaction(event_transaction_id, event_transaction_type):
+    """
+    Sets the event transaction id and type to the given values, or to a
+    new id if there was none.
+    """
+    if event_transaction_id is None:
+        create_new_event_transaction_id()
+    else:
+        set_event_transaction_id(unicode(event_transaction_id))
+    set_event_transaction_type(event_transaction_type)
+
+
+@contextmanager
+def defer_subsection_updates():
+    """
+    Context manager which holds back the grade events and subsection grade
+    updates for score changes made inside it, and emits and enqueues them
+    all when it exits.
+
+    Use it around a transaction that changes many scores, so that none of
+    the update tasks start, and no event reports a grade change, before the
+    new scores are committed.  If the context exits with an exception, the
+    held back events and updates are dropped.
+    """
+    request_cache = get_cache(DEFERRED_SUBSECTION_UPDATES_CACHE)
+    if request_cache.get('updates') is not None:
+        # Already deferred by an enclosing context, which will enqueue them.
+        yield
+        return
+
+    request_cache['updates'] = []
+    try:
+        yield
+        deferred_updates = request_cache['updates']
+    finally:
+        request_cache['updates'] = None
+    if not deferred_updates:
+        return
+
+    # Each event and update belongs to the event transaction that was
+    # current when its score changed, which is switched to only when it
+    # changed between scores, as grade_updated may also update it.
+    event_transaction = get_event_transaction_id(), get_event_transaction_type()
+    current_event_transaction = None
+    for kwargs, event_transaction_id, event_transaction_type in deferred_updates:
+        if (event_transaction_id, event_transaction_type) != current_event_transaction:
+            current_event_transaction = event_transaction_id, event_transaction_type
+            _set_event_transaction(*current_event_transaction)
+        _enqueue_subsection_update(kwargs)
+    if event_transaction != current_event_transaction:
+        _set_event_transaction(*event_transaction)
 
 
 @receiver(SUBSECTION_SCORE_CHANGED)
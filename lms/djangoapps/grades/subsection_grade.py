@@ -246,6 +246,24 @@ class CreateSubsectionGrade(NonZeroSubsectionGrade):
         ]
         return PersistentSubsectionGrade.bulk_create_grades(params, student.id, course_key)
 
+    @classmethod
+    def bulk_update_or_create_models(cls, students_and_subsection_grades, course_key, emit_events=True):
+        """
+        Saves or updates the subsection grades of many students in persisted
+        models, as update_or_create_model does with force_update_subsections.
+
+        students_and_subsection_grades is an iterable of
+        (student, subsection_grades) pairs.  See
+        PersistentSubsectionGrade.bulk_update_or_create_grades for emit_events.
+        """
+        params = [
+            subsection_grade._persisted_model_params(student)  # pylint: disable=protected-access
+            for student, subsection_grades in students_and_subsection_grades
+            for subsection_grade in subsection_grades
+            if subsection_grade
+        ]
+        return PersistentSubsectionGrade.bulk_update_or_create_grades(params, course_key, emit_events=emit_events)
+
     def _should_persist_per_attempted(self, score_deleted=False, force_update_subsections=False):
         """
         Returns whether the SubsectionGrade's model should be
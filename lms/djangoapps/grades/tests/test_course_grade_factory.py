@@ -17,6 +17,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
+from ..models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
@@ -212,6 +213,57 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         self.assertEqual(mock_update.called, force_update)
 
+    def test_iter_force_update_persists_in_bulk(self):
+        users = [self.request.user, UserFactory.create()]
+        with mock_get_score(1, 2):
+            results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=True))
+        self.assertEqual([result.student for result in results], users)
+        self.assertEqual([result.error for result in results], [None, None])
+
+        for user in users:
+            self.assertEqual(PersistentCourseGrade.read(user.id, self.course.id).percent_grade, 0.5)
+            self.assertEqual(
+                {grade.full_usage_key for grade in PersistentSubsectionGrade.bulk_read_grades(user.id, self.course.id)},
+                {self.sequence.location, self.sequence2.location},
+            )
+
+    def test_iter_force_update_emits_events_once(self):
+        users = [self.request.user, UserFactory.create()]
+        with mock_get_score(1, 2):
+            with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+                with patch.object(
+                    PersistentCourseGrade, 'bulk_update_or_create', side_effect=Exception('Bulk update failed')
+                ):
+                    results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=True))
+        self.assertEqual([result.error for result in results], [None, None])
+        # The events of the failed bulk update are dropped, and each user's
+        # grades are emitted once when they are updated individually.
+        emitted_events = [
+            (event_name, event['user_id'], event.get('block_id'))
+            for event_name, event in [call[0] for call in tracker_mock.emit.call_args_list]
+        ]
+        self.assertEqual(len(emitted_events), len(set(emitted_events)))
+        for user in users:
+            self.assertIn((u'edx.grades.course.grade_calculated', unicode(user.id), None), emitted_events)
+
+    def test_iter_force_update_falls_back_with_fresh_caches(self):
+        users = [self.request.user, UserFactory.create()]
+        with mock_get_score(1, 2):
+            with patch.object(
+                PersistentCourseGrade, 'bulk_update_or_create', side_effect=Exception('Bulk update failed')
+            ):
+                results = list(CourseGradeFactory().iter(users=users, course=self.course, force_update=True))
+        self.assertEqual([result.error for result in results], [None, None])
+
+        # The VisibleBlocks created by the failed batch were rolled back, and
+        # the grades saved one user at a time point at rows that exist.
+        for user in users:
+            self.assertEqual(PersistentCourseGrade.read(user.id, self.course.id).percent_grade, 0.5)
+            subsection_grades = PersistentSubsectionGrade.bulk_read_grades(user.id, self.course.id)
+            self.assertEqual(len(subsection_grades), 2)
+            for grade in subsection_grades:
+                self.assertTrue(VisibleBlocks.objects.filter(hashed=grade.visible_blocks_id).exists())
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
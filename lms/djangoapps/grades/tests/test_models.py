@@ -23,7 +23,8 @@ from lms.djangoapps.grades.models import (
     PersistentCourseGrade,
     PersistentSubsectionGrade,
     PersistentSubsectionGradeOverride,
-    VisibleBlocks
+    VisibleBlocks,
+    clear_block_record_hash_index
 )
 from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
 
@@ -57,6 +58,31 @@ class BlockRecordListTestCase(TestCase):
             brs
         )
 
+    def _block_records(self, weight):
+        """
+        Returns a list of block records with the given weight.
+        """
+        locator = BlockUsageLocator(course_key=self.course_key, block_type='problem', block_id='block_id_a')
+        return [BlockRecord(locator=locator, weight=weight, raw_possible=10, graded=True)]
+
+    def test_hash_index(self):
+        clear_block_record_hash_index()
+        first = BlockRecordList.from_list(self._block_records(1), self.course_key, 'version_1')
+        second = BlockRecordList.from_list(self._block_records(1), self.course_key, 'version_1')
+        self.assertEqual(first.hash_value, second.hash_value)
+        self.assertIn('json_value', first.__dict__)
+        self.assertNotIn('json_value', second.__dict__)
+
+        # Values that are equal but serialize differently have different hashes.
+        as_float = BlockRecordList.from_list(self._block_records(1.0), self.course_key, 'version_1')
+        self.assertNotEqual(first.hash_value, as_float.hash_value)
+        self.assertEqual(as_float.hash_value, BlockRecordList(self._block_records(1.0), self.course_key).hash_value)
+
+        # Another version of the course has its own index.
+        other_version = BlockRecordList.from_list(self._block_records(1), self.course_key, 'version_2')
+        self.assertEqual(first.hash_value, other_version.hash_value)
+        self.assertIn('json_value', other_version.__dict__)
+
 
 class GradesModelTestCase(TestCase):
     """
@@ -294,6 +320,67 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
         self.assertEqual(grade.earned_all, 0.0)
         self.assertEqual(grade.earned_graded, 0.0)
 
+    def _bulk_params(self, user_ids, **overrides):
+        """
+        Returns copies of self.params for each of the given users.
+        """
+        params_list = []
+        for user_id in user_ids:
+            params = dict(self.params, user_id=user_id, **overrides)
+            params['subtree_edited_timestamp'] = datetime(2016, 8, 1, 18, 53, 24, tzinfo=pytz.UTC)
+            params_list.append(params)
+        return params_list
+
+    def test_bulk_update_or_create_grades(self):
+        PersistentSubsectionGrade.update_or_create_grade(**self.params)
+
+        grades = PersistentSubsectionGrade.bulk_update_or_create_grades(
+            self._bulk_params([12345, 23456, 34567], earned_all=7.0),
+            self.course_key,
+        )
+        self.assertEqual(len(grades), 3)
+        for user_id in (12345, 23456, 34567):
+            grade = PersistentSubsectionGrade.read_grade(user_id, self.usage_key)
+            self.assertEqual(grade.earned_all, 7.0)
+            self.assertEqual(grade.visible_blocks.blocks, self.block_records)
+        self.assertEqual(PersistentSubsectionGrade.objects.filter(usage_key=self.usage_key).count(), 3)
+
+    def test_bulk_update_or_create_grades_unchanged(self):
+        PersistentSubsectionGrade.bulk_update_or_create_grades(self._bulk_params([12345, 23456]), self.course_key)
+        modified = {grade.user_id: grade.modified for grade in PersistentSubsectionGrade.objects.all()}
+        PersistentSubsectionGrade.bulk_update_or_create_grades(self._bulk_params([12345, 23456]), self.course_key)
+        self.assertEqual(
+            modified,
+            {grade.user_id: grade.modified for grade in PersistentSubsectionGrade.objects.all()},
+        )
+
+    def test_bulk_update_first_attempted_not_changed(self):
+        PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        later = datetime(2010, 1, 1, tzinfo=pytz.UTC)
+        [grade] = PersistentSubsectionGrade.bulk_update_or_create_grades(
+            self._bulk_params([12345], first_attempted=later), self.course_key,
+        )
+        self.assertEqual(grade.first_attempted, self.params['first_attempted'])
+
+        [grade] = PersistentSubsectionGrade.bulk_update_or_create_grades(
+            self._bulk_params([12345], first_attempted=None), self.course_key,
+        )
+        self.assertEqual(grade.first_attempted, self.params['first_attempted'])
+
+    def test_bulk_update_or_create_grades_override(self):
+        grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        PersistentSubsectionGradeOverride(grade=grade, earned_all_override=0.0, earned_graded_override=0.0).save()
+        PersistentSubsectionGrade.bulk_update_or_create_grades(self._bulk_params([12345, 23456]), self.course_key)
+        self.assertEqual(PersistentSubsectionGrade.read_grade(12345, self.usage_key).earned_all, 0.0)
+        self.assertEqual(PersistentSubsectionGrade.read_grade(23456, self.usage_key).earned_all, 6.0)
+
+    def test_bulk_update_or_create_event(self):
+        with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+            [grade] = PersistentSubsectionGrade.bulk_update_or_create_grades(
+                self._bulk_params([12345]), self.course_key,
+            )
+        self._assert_tracker_emitted_event(tracker_mock, grade)
+
     def _assert_tracker_emitted_event(self, tracker_mock, grade):
         """
         Helper function to ensure that the mocked event tracker
@@ -440,6 +527,34 @@ class PersistentCourseGradesTest(GradesModelTestCase):
             grade = PersistentCourseGrade.update_or_create(**self.params)
         self._assert_tracker_emitted_event(tracker_mock, grade)
 
+    def test_bulk_update_or_create(self):
+        created_grade = PersistentCourseGrade.update_or_create(**dict(self.params, passed=False))
+        self.assertIsNone(created_grade.passed_timestamp)
+
+        grades = PersistentCourseGrade.bulk_update_or_create(
+            self.course_key,
+            [dict(self.params, user_id=user_id, percent_grade=88.8) for user_id in (12345, 23456)],
+        )
+        self.assertEqual(len(grades), 2)
+        for user_id in (12345, 23456):
+            grade = PersistentCourseGrade.objects.get(user_id=user_id, course_id=self.course_key)
+            self.assertEqual(grade.percent_grade, 88.8)
+            self.assertIsInstance(grade.passed_timestamp, datetime)
+        self.assertEqual(PersistentCourseGrade.objects.get(user_id=12345).id, created_grade.id)
+
+    def test_bulk_update_keeps_passed_timestamp(self):
+        passed_timestamp = PersistentCourseGrade.update_or_create(**self.params).passed_timestamp
+        [grade] = PersistentCourseGrade.bulk_update_or_create(
+            self.course_key, [dict(self.params, percent_grade=20.0, letter_grade=u'', passed=False)],
+        )
+        self.assertEqual(grade.letter_grade, u'')
+        self.assertEqual(grade.passed_timestamp, passed_timestamp)
+
+    def test_bulk_update_or_create_event(self):
+        with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+            [grade] = PersistentCourseGrade.bulk_update_or_create(self.course_key, [self.params])
+        self._assert_tracker_emitted_event(tracker_mock, grade)
+
     def _assert_tracker_emitted_event(self, tracker_mock, grade):
         """
         Helper function to ensure that the mocked event tracker
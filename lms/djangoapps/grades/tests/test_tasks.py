@@ -17,8 +17,10 @@ from mock import MagicMock, patch
 
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
+from lms.djangoapps.grades.events import GRADES_RESCORE_EVENT_TYPE
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.services import GradesService
+from lms.djangoapps.grades.signals.handlers import defer_subsection_updates
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
 from lms.djangoapps.grades.tasks import (
     RECALCULATE_GRADE_DELAY_SECONDS,
@@ -29,7 +31,11 @@ from lms.djangoapps.grades.tasks import (
 from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
 from student.models import CourseEnrollment, anonymous_id_for_user
 from student.tests.factories import UserFactory
-from track.event_transaction_utils import create_new_event_transaction_id, get_event_transaction_id
+from track.event_transaction_utils import (
+    create_new_event_transaction_id,
+    get_event_transaction_id,
+    set_event_transaction_type
+)
 from util.date_utils import to_timestamp
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
@@ -167,6 +173,65 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
             PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
             mock_task_apply.assert_called_once_with(countdown=RECALCULATE_GRADE_DELAY_SECONDS, kwargs=local_task_args)
 
+    def test_deferred_subsection_updates(self):
+        """
+        Ensures that the tasks enqueued inside defer_subsection_updates are
+        only enqueued when it exits, and not at all if it raises.
+        """
+        self.set_up_course()
+        send_args = self.problem_weighted_score_changed_kwargs
+        with self.mock_csm_get_score() and patch(
+            'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async',
+            return_value=None
+        ) as mock_task_apply:
+            with defer_subsection_updates():
+                PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+                PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+                self.assertFalse(mock_task_apply.called)
+            self.assertEqual(mock_task_apply.call_count, 2)
+
+            mock_task_apply.reset_mock()
+            with self.assertRaises(ValueError):
+                with defer_subsection_updates():
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+                    raise ValueError
+            self.assertFalse(mock_task_apply.called)
+
+            # Nothing is held back once the context has exited.
+            PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+            self.assertEqual(mock_task_apply.call_count, 1)
+
+    def test_deferred_grade_events(self):
+        """
+        Ensures that the grade events for the score changes made inside
+        defer_subsection_updates are only emitted when it exits, each in
+        the event transaction of its score change, and not at all if it raises.
+        """
+        self.set_up_course()
+        send_args = self.problem_weighted_score_changed_kwargs
+        with patch(
+            'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async',
+            return_value=None
+        ), patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+            event_transaction_ids = []
+            with defer_subsection_updates():
+                for _ in range(2):
+                    event_transaction_ids.append(unicode(create_new_event_transaction_id()))
+                    set_event_transaction_type(GRADES_RESCORE_EVENT_TYPE)
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+                self.assertFalse(tracker_mock.emit.called)
+            self.assertEqual(
+                [event_data['event_transaction_id'] for (_, event_data), _ in tracker_mock.emit.call_args_list],
+                event_transaction_ids,
+            )
+
+            tracker_mock.reset_mock()
+            with self.assertRaises(ValueError):
+                with defer_subsection_updates():
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
+                    raise ValueError
+            self.assertFalse(tracker_mock.emit.called)
+
     @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
     def test_triggers_subsection_score_signal(self, mock_subsection_signal):
         """
@@ -17,12 +17,13 @@ import hashlib
 import json
 import logging
 import os.path
+from tempfile import TemporaryFile
 from uuid import uuid4
 
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from opaque_keys.edx.django.models import CourseKeyField
 from six import text_type
@@ -268,12 +269,15 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be a generator. The CSV is written to a temporary file
+        as the rows are produced, so they never all need to be in memory.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        with TemporaryFile() as output_file:
+            csvwriter = csv.writer(output_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            output_file.seek(0)
+            self.store(course_id, filename, File(output_file))
 
     def links_for(self, course_id):
         """
@@ -44,9 +44,10 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
 )
 from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
+    perform_module_state_batch_update,
     perform_module_state_update,
     override_score_module_state,
-    rescore_problem_module_state,
+    rescore_problem_module_state_batch,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -75,9 +76,9 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    batch_update_fcn = partial(rescore_problem_module_state_batch, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_module_state_batch_update, batch_update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
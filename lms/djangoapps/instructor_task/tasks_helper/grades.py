@@ -5,7 +5,7 @@ import logging
 import re
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, izip_longest
 from time import time
 
 from lazy import lazy
@@ -19,6 +19,7 @@ from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCe
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.grades.problem_scores import ProblemScoresFactory
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -211,10 +212,11 @@ class CourseGradeReport(object):
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-
-        context.update_status(u'Uploading grades')
+        # The success rows are streamed to the report store as each batch
+        # of users is graded, so only one batch is held in memory at a time.
+        context.update_status(u'Compiling and uploading grades')
+        error_rows = []
+        success_rows = self._compile(context, batched_rows, error_rows)
         self._upload(context, success_headers, success_rows, error_headers, error_rows)
 
         return context.update_status(u'Completed grades')
@@ -248,29 +250,36 @@ class CourseGradeReport(object):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, error_rows):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        A generator of the success rows for the given batched_rows and context.
+
+        The error rows of each batch are appended to error_rows, and the
+        metrics on task status are updated, as the batches are consumed.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = izip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        context.task_progress.succeeded = context.task_progress.failed = 0
+        context.task_progress.attempted = context.task_progress.total = 0
+        for success_batch, error_batch in batched_rows:
+            error_rows.extend(error_batch)
 
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
-        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
-        context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
+            # update metrics on task status
+            context.task_progress.succeeded += len(success_batch)
+            context.task_progress.failed += len(error_batch)
+            context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+            context.task_progress.total = context.task_progress.attempted
+
+            for row in success_batch:
+                yield row
 
     def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
         Creates and uploads a CSV for the given headers and rows.
+
+        success_rows may be a generator that fills error_rows as it is
+        consumed, so the error report is uploaded last.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
+        upload_csv_to_report_store(chain([success_headers], success_rows), 'grade_report', context.course_id, date)
         if len(error_rows) > 0:
             error_rows = [error_headers] + error_rows
             upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
@@ -297,7 +306,8 @@ class CourseGradeReport(object):
 
         users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
         users = users.select_related('profile')
-        return grouper(users)
+        # Iterate without caching, so the users of earlier batches can be freed.
+        return grouper(users.iterator())
 
     def _user_grades(self, course_grade, context):
         """
@@ -481,11 +491,11 @@ class ProblemGradeReport(object):
         # whether each user is currently enrolled in the course.
         CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
 
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
+        for student, percent, problem_scores, error in ProblemScoresFactory().iter(enrolled_students, course):
             student_fields = [getattr(student, field_name) for field_name in header_row]
             task_progress.attempted += 1
 
-            if not course_grade:
+            if problem_scores is None:
                 err_msg = text_type(error)
                 # There was an error grading this student.
                 if not err_msg:
@@ -499,7 +509,7 @@ class ProblemGradeReport(object):
             earned_possible_values = []
             for block_location in graded_scorable_blocks:
                 try:
-                    problem_score = course_grade.problem_scores[block_location]
+                    problem_score = problem_scores[block_location]
                 except KeyError:
                     earned_possible_values.append([u'Not Available', u'Not Available'])
                 else:
@@ -508,7 +518,7 @@ class ProblemGradeReport(object):
                     else:
                         earned_possible_values.append([u'Not Attempted', problem_score.possible])
 
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
+            rows.append(student_fields + [enrollment_status, percent] + _flatten(earned_possible_values))
 
             task_progress.succeeded += 1
             if task_progress.attempted % status_interval == 0:
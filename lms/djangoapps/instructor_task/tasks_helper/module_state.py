@@ -16,6 +16,7 @@ from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.models import StudentModule
 from courseware.module_render import get_module_for_descriptor_internal
 from lms.djangoapps.grades.events import GRADES_OVERRIDE_EVENT_TYPE, GRADES_RESCORE_EVENT_TYPE
+from lms.djangoapps.grades.signals.handlers import defer_subsection_updates
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
 from track.views import task_track
 from util.db import outer_atomic
@@ -29,6 +30,9 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# The number of StudentModules rescored together, in one transaction.
+RESCORE_BATCH_SIZE = 100
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -59,6 +63,67 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
+    problems, modules_to_update = _get_problems_and_modules_to_update(course_id, task_input, filter_fcn, action_name)
+
+    task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
+    task_progress.update_task_state()
+
+    for module_to_update in modules_to_update:
+        task_progress.attempted += 1
+        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+            update_status = update_fcn(module_descriptor, module_to_update, task_input)
+            _record_update_status(task_progress, update_status)
+
+    return task_progress.update_task_state()
+
+
+def perform_module_state_batch_update(batch_update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                      batch_size=None):
+    """
+    Performs generic update by visiting StudentModule instances in batches with the batch_update_fcn provided.
+
+    This behaves like `perform_module_state_update`, except that the StudentModules are passed to
+    `batch_update_fcn` `batch_size` at a time (RESCORE_BATCH_SIZE by default).  It is passed two
+    arguments:  a list of (module_descriptor, StudentModule) pairs, and the task_input being passed
+    through.  It returns a list with the update status of each pair.
+
+    Within each batch, the StudentModules of each problem are ordered by their random seed, so that
+    students who share a seed are updated one after another.  Problem instances with the same seed
+    run the same scripts, so they can reuse each other's cached parsed problem and script results.
+
+    """
+    start_time = time()
+    batch_size = batch_size or RESCORE_BATCH_SIZE
+    problems, modules_to_update = _get_problems_and_modules_to_update(course_id, task_input, filter_fcn, action_name)
+    if hasattr(modules_to_update, 'select_related'):
+        modules_to_update = modules_to_update.select_related('student')
+
+    task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
+    task_progress.update_task_state()
+
+    for batch in _batches_by_seed(modules_to_update, batch_size):
+        task_progress.attempted += len(batch)
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.batch', tags=[u'action:{name}'.format(name=action_name)]):
+            update_statuses = batch_update_fcn(
+                [(problems[unicode(module.module_state_key)], module) for module in batch],
+                task_input,
+            )
+            for update_status in update_statuses:
+                _record_update_status(task_progress, update_status)
+
+    return task_progress.update_task_state()
+
+
+def _get_problems_and_modules_to_update(course_id, task_input, filter_fcn, action_name):
+    """
+    Returns the problem descriptors named in `task_input`, keyed by their serialized usage keys,
+    and the StudentModules to update for them.
+    """
     usage_keys = []
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
@@ -83,107 +148,133 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     modules_to_update = _get_modules_to_update(
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
     )
+    return problems, modules_to_update
 
-    task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
-    task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update, task_input)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+def _record_update_status(task_progress, update_status):
+    """
+    Counts `update_status`, as returned by an update function, in `task_progress`.
+    """
+    if update_status == UPDATE_STATUS_SUCCEEDED:
+        # If the update_fcn returns true, then it performed some kind of work.
+        # Logging of failures is left to the update_fcn itself.
+        task_progress.succeeded += 1
+    elif update_status == UPDATE_STATUS_FAILED:
+        task_progress.failed += 1
+    elif update_status == UPDATE_STATUS_SKIPPED:
+        task_progress.skipped += 1
+    else:
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
-    return task_progress.update_task_state()
 
+def _batches_by_seed(student_modules, batch_size):
+    """
+    Yields lists of at most `batch_size` of `student_modules`, each ordered by problem and then by
+    the random seed saved in the module's state.
+    """
+    def seed_order(student_module):
+        """
+        Sort key putting the StudentModules of each problem with the same seed together.
+        """
+        try:
+            seed = json.loads(student_module.state).get('seed') if student_module.state else None
+        except ValueError:
+            seed = None
+        return (unicode(student_module.module_state_key), seed)
+
+    batch = []
+    for student_module in student_modules:
+        batch.append(student_module)
+        if len(batch) == batch_size:
+            yield sorted(batch, key=seed_order)
+            batch = []
+    if batch:
+        yield sorted(batch, key=seed_order)
+
+
+def rescore_problem_module_state_batch(xmodule_instance_args, descriptors_and_modules, task_input):
+    '''
+    Takes a list of (XModule descriptor, StudentModule) pairs from one course, and
+    performs rescoring on each student's problem submission.
+
+    The course is loaded once for the whole batch, and all the rescored states and
+    scores are written in a single transaction.  The subsection grade updates for
+    the new scores are enqueued together once that transaction has been committed.
 
-@outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
+    Throws exceptions if the rescoring is fatal and should be aborted, in which case
+    nothing in the batch is saved.  In particular, raises UpdateProblemModuleStateError
+    if a module doesn't support rescoring.
+
+    Returns the update status of each pair, in order:  UPDATE_STATUS_FAILED if the
+    module couldn't be instantiated or rescoring it failed, UPDATE_STATUS_SKIPPED
+    if the student hasn't submitted an answer, and UPDATE_STATUS_SUCCEEDED otherwise.
     '''
-    Takes an XModule descriptor and a corresponding StudentModule object, and
-    performs rescoring on the student's problem submission.
+    if not descriptors_and_modules:
+        return []
+    course_id = descriptors_and_modules[0][1].course_id
 
-    Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
-    In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
-    or if the module doesn't support rescoring.
+    with defer_subsection_updates():
+        with outer_atomic():
+            with modulestore().bulk_operations(course_id):
+                course = get_course_by_id(course_id)
+                return [
+                    _rescore_student_module(xmodule_instance_args, module_descriptor, student_module, task_input, course)
+                    for module_descriptor, student_module in descriptors_and_modules
+                ]
 
-    Returns True if problem was successfully rescored for the given student, and False
-    if problem encountered some kind of error in rescoring.
+
+def _rescore_student_module(xmodule_instance_args, module_descriptor, student_module, task_input, course):
+    '''
+    Rescores the problem submission in `student_module` in the already loaded `course`.
+
+    See rescore_problem_module_state_batch for the exceptions raised and values returned.
     '''
     # unpack the StudentModule:
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
 
-    with modulestore().bulk_operations(course_id):
-        course = get_course_by_id(course_id)
-        # TODO: Here is a call site where we could pass in a loaded course.  I
-        # think we certainly need it since grading is happening here, and field
-        # overrides would be important in handling that correctly
-        instance = _get_module_instance_for_task(
-            course_id,
-            student,
-            module_descriptor,
-            xmodule_instance_args,
-            grade_bucket_type='rescore',
-            course=course
-        )
-
-        if instance is None:
-            # Either permissions just changed, or someone is trying to be clever
-            # and load something they shouldn't have access to.
-            msg = "No module {location} for student {student}--access denied?".format(
-                location=usage_key,
-                student=student
-            )
-            TASK_LOG.warning(msg)
-            return UPDATE_STATUS_FAILED
-
-        if not hasattr(instance, 'rescore'):
-            # This should not happen, since it should be already checked in the
-            # caller, but check here to be sure.
-            msg = "Specified module {0} of type {1} does not support rescoring.".format(usage_key, instance.__class__)
-            raise UpdateProblemModuleStateError(msg)
-
-        # We check here to see if the problem has any submissions. If it does not, we don't want to rescore it
-        if not instance.has_submitted_answer():
-            return UPDATE_STATUS_SKIPPED
-
-        # Set the tracking info before this call, because it makes downstream
-        # calls that create events.  We retrieve and store the id here because
-        # the request cache will be erased during downstream calls.
-        create_new_event_transaction_id()
-        set_event_transaction_type(GRADES_RESCORE_EVENT_TYPE)
-
-        # specific events from CAPA are not propagated up the stack. Do we want this?
-        try:
-            instance.rescore(only_if_higher=task_input['only_if_higher'])
-        except (LoncapaProblemError, StudentInputError, ResponseError):
-            TASK_LOG.warning(
-                u"error processing rescore call for course %(course)s, problem %(loc)s "
-                u"and student %(student)s",
-                dict(
-                    course=course_id,
-                    loc=usage_key,
-                    student=student
-                )
-            )
-            return UPDATE_STATUS_FAILED
+    instance = _get_module_instance_for_task(
+        course_id,
+        student,
+        module_descriptor,
+        xmodule_instance_args,
+        grade_bucket_type='rescore',
+        course=course
+    )
 
-        instance.save()
-        TASK_LOG.debug(
-            u"successfully processed rescore call for course %(course)s, problem %(loc)s "
+    if instance is None:
+        # Either permissions just changed, or someone is trying to be clever
+        # and load something they shouldn't have access to.
+        msg = "No module {location} for student {student}--access denied?".format(
+            location=usage_key,
+            student=student
+        )
+        TASK_LOG.warning(msg)
+        return UPDATE_STATUS_FAILED
+
+    if not hasattr(instance, 'rescore'):
+        # This should not happen, since it should be already checked in the
+        # caller, but check here to be sure.
+        msg = "Specified module {0} of type {1} does not support rescoring.".format(usage_key, instance.__class__)
+        raise UpdateProblemModuleStateError(msg)
+
+    # We check here to see if the problem has any submissions. If it does not, we don't want to rescore it
+    if not instance.has_submitted_answer():
+        return UPDATE_STATUS_SKIPPED
+
+    # Set the tracking info before this call, because it makes downstream
+    # calls that create events.  We retrieve and store the id here because
+    # the request cache will be erased during downstream calls.
+    create_new_event_transaction_id()
+    set_event_transaction_type(GRADES_RESCORE_EVENT_TYPE)
+
+    # specific events from CAPA are not propagated up the stack. Do we want this?
+    try:
+        instance.rescore(only_if_higher=task_input['only_if_higher'])
+    except (LoncapaProblemError, StudentInputError, ResponseError):
+        TASK_LOG.warning(
+            u"error processing rescore call for course %(course)s, problem %(loc)s "
             u"and student %(student)s",
             dict(
                 course=course_id,
@@ -191,8 +282,20 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
                 student=student
             )
         )
+        return UPDATE_STATUS_FAILED
+
+    instance.save()
+    TASK_LOG.debug(
+        u"successfully processed rescore call for course %(course)s, problem %(loc)s "
+        u"and student %(student)s",
+        dict(
+            course=course_id,
+            loc=usage_key,
+            student=student
+        )
+    )
 
-        return UPDATE_STATUS_SUCCEEDED
+    return UPDATE_STATUS_SUCCEEDED
 
 
 @outer_atomic
@@ -92,6 +92,17 @@ class DjangoStorageReportStoreLocalTestCase(ReportStoreTestMixin, TestReportMixi
         with override_settings(GRADES_DOWNLOAD=test_settings):
             return ReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that store_rows() accepts a generator of rows.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row{}'.format(index), u'caf\xe9'] for index in range(3))
+        report_store.store_rows(self.course_id, 'rows.csv', rows)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'rows.csv')) as csv_file:
+            self.assertEqual(csv_file.read(), 'row0,caf\xc3\xa9\r\nrow1,caf\xc3\xa9\r\nrow2,caf\xc3\xa9\r\n')
+
 
 class DjangoStorageReportStoreS3TestCase(MockS3Mixin, ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
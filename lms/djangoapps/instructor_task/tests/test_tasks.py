@@ -489,6 +489,50 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    def test_rescoring_in_batches(self):
+        """
+        Tests rescores a problem in batches, with the students in each batch ordered by seed.
+        """
+        mock_instance = MagicMock()
+        getattr(mock_instance, 'rescore').return_value = None
+        mock_instance.has_submitted_answer.return_value = True
+
+        seeds = [3, 1, 2, 1, 3]
+        students = self._create_students_with_no_state(len(seeds))
+        for student, seed in zip(students, seeds):
+            StudentModuleFactory.create(
+                course_id=self.course.id,
+                module_state_key=self.location,
+                student=student,
+                state=json.dumps({'seed': seed, 'done': True}),
+            )
+        seeds_by_student = {student.id: seed for student, seed in zip(students, seeds)}
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module, patch(
+            'lms.djangoapps.instructor_task.tasks_helper.module_state.RESCORE_BATCH_SIZE', 3
+        ), patch(
+            'lms.djangoapps.instructor_task.tasks_helper.module_state.get_course_by_id',
+            return_value=self.course,
+        ) as mock_get_course:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        rescored_seeds = [seeds_by_student[call[1]['user'].id] for call in mock_get_module.call_args_list]
+        self.assertEqual(rescored_seeds, [1, 2, 3, 1, 3])
+        # The course is loaded once for each batch.
+        self.assertEqual(mock_get_course.call_count, 2)
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=len(seeds),
+            attempted=len(seeds),
+            succeeded=len(seeds),
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+
 
 @attr(shard=3)
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
@@ -33,6 +33,8 @@ from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
 from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
+from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
+from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
@@ -76,8 +78,15 @@ from shoppingcart.models import (
     Order,
     PaidCourseRegistration
 )
-from student.models import ALLOWEDTOENROLL_TO_ENROLLED, CourseEnrollment, CourseEnrollmentAllowed, ManualEnrollmentAudit
+from student.models import (
+    ALLOWEDTOENROLL_TO_ENROLLED,
+    CourseEnrollment,
+    CourseEnrollmentAllowed,
+    ManualEnrollmentAudit,
+    anonymous_id_for_user
+)
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
+from submissions import api as submissions_api
 from survey.models import SurveyAnswer, SurveyForm
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
@@ -762,6 +771,61 @@ class TestProblemGradeReport(TestReportMixin, InstructorTaskModuleTestCase):
             ))
         ])
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_persisted_grades_read_in_bulk(self, _get_current_task):
+        """
+        Verify that learners with a persisted course grade are reported
+        without computing a CourseGrade for them.
+        """
+        vertical = ItemFactory.create(
+            parent_location=self.problem_section.location,
+            category='vertical',
+            metadata={'graded': True},
+            display_name='Problem Vertical'
+        )
+        self.define_option_problem(u'Problem1', parent=vertical)
+
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            self.submit_student_answer(self.student_1.username, u'Problem1', ['Option 1'])
+            CourseGradeFactory().update(self.student_1, self.course)
+            self.assertFalse(PersistentCourseGrade.objects.filter(user_id=self.student_2.id).exists())
+
+            with patch.object(CourseGradeFactory, 'read', wraps=CourseGradeFactory().read) as mock_read:
+                with patch('submissions.api.get_scores', wraps=submissions_api.get_scores) as mock_get_scores:
+                    result = ProblemGradeReport.generate(None, None, self.course.id, None, 'graded')
+            self.assertEqual([call[0][0] for call in mock_read.call_args_list], [self.student_2])
+            # The submissions scores of the persisted learners are read for the whole batch.
+            self.assertNotIn(
+                anonymous_id_for_user(self.student_1, self.course.id),
+                [call[0][1] for call in mock_get_scores.call_args_list],
+            )
+
+        self.assertDictContainsSubset({'action_name': 'graded', 'attempted': 2, 'succeeded': 2, 'failed': 0}, result)
+        problem_name = u'Homework 1: Subsection - Problem1'
+        header_row = self.csv_header_row + [problem_name + ' (Earned)', problem_name + ' (Possible)']
+        self.verify_rows_in_csv([
+            dict(zip(
+                header_row,
+                [
+                    unicode(self.student_1.id),
+                    self.student_1.email,
+                    self.student_1.username,
+                    ENROLLED_IN_COURSE,
+                    '0.01', '1.0', '2.0',
+                ]
+            )),
+            dict(zip(
+                header_row,
+                [
+                    unicode(self.student_2.id),
+                    self.student_2.email,
+                    self.student_2.username,
+                    ENROLLED_IN_COURSE,
+                    '0.0', u'Not Attempted', '2.0',
+                ]
+            ))
+        ])
+
     @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
     @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
     @ddt.data(u'Cannot grade student', '')
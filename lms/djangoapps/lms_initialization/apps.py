@@ -6,6 +6,7 @@ included early in the INSTALLED_APPS list.
 """
 
 import analytics
+from capa.safe_exec import configure_worker_pool
 from django.apps import AppConfig
 from django.conf import settings
 
@@ -23,6 +24,7 @@ class LMSInitializationConfig(AppConfig):
         settings have loaded, but before most other djangoapp initializations.
         """
         self._initialize_analytics()
+        self._initialize_safe_exec_worker_pool()
 
     def _initialize_analytics(self):
         """
@@ -30,3 +32,11 @@ class LMSInitializationConfig(AppConfig):
         """
         if settings.LMS_SEGMENT_KEY:
             analytics.write_key = settings.LMS_SEGMENT_KEY
+
+    def _initialize_safe_exec_worker_pool(self):
+        """
+        Start using persistent sandboxes for safe_exec, if configured.
+        """
+        pool_settings = settings.CODE_JAIL.get('worker_pool', {})
+        if pool_settings.get('size'):
+            configure_worker_pool(pool_settings['size'], pool_settings.get('max_runs', 100))
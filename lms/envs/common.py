@@ -866,6 +866,12 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Maximum size, in bytes, of the per-process LRU cache of split modulestore
+# course structures that sits in front of the 'course_structure_cache'.
+# Set to 0 to disable it.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -888,6 +894,8 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        # Load the definitions of a rendered subtree's blocks in a single query
+                        'prefetch_definitions': True,
                     }
                 },
                 {
@@ -918,6 +926,15 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Persistent, pre-warmed sandboxes for code that needs no extra files.
+    'worker_pool': {
+        # How many sandboxes to keep running?  0 means start a new one for
+        # every execution.
+        'size': 0,
+        # How many executions can a sandbox serve before it's replaced?
+        'max_runs': 100,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
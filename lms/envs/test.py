@@ -223,6 +223,9 @@ CACHES = {
     },
 }
 
+# Don't keep course structures around between tests
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
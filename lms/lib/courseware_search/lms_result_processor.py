@@ -43,7 +43,13 @@ class LmsSearchResultProcessor(SearchResultProcessor):
         course_key = self.get_course_key()
         if course_key not in self._course_blocks:
             root_block_usage_key = self.get_module_store().make_course_usage_key(course_key)
-            self._course_blocks[course_key] = get_course_blocks(user, root_block_usage_key)
+            # Only the keys of the accessible blocks are used, so the
+            # data of other transformers need not be loaded.
+            self._course_blocks[course_key] = get_course_blocks(
+                user,
+                root_block_usage_key,
+                load_all_transformer_data=False,
+            )
         return self._course_blocks[course_key]
 
     @property
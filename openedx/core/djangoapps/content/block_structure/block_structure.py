@@ -6,9 +6,13 @@ Module with family of classes for block structures.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _BlockRelationsMap - Data structure for all blocks' relations,
+        keyed by usage key.
+    _IndexedBlockRelations - Alternative data structure for all blocks'
+        relations, with integer block ids and array-backed adjacency.
     _BlockData - Data structure for a single block's data.
 """
-from copy import deepcopy
+from array import array
 from functools import partial
 from logging import getLogger
 
@@ -40,6 +44,476 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _BlockRelationsMap(dict):
+    """
+    Default data structure for the relations of all blocks in a block
+    structure: a map of a block's usage key to its _BlockRelations.
+
+    The existence of a block in the structure is determined by its
+    presence in this map.
+
+    This class and _IndexedBlockRelations implement the same interface,
+    so BlockStructure is agnostic to which of them it is backed by.
+    """
+    def copy(self):
+        """
+        Returns a copy of this instance.  Unlike a deep copy, the copy
+        shares the usage keys, since they are immutable.
+        """
+        new_copy = _BlockRelationsMap()
+        for usage_key, relations in self.iteritems():
+            new_relations = _BlockRelations()
+            new_relations.parents = list(relations.parents)
+            new_relations.children = list(relations.children)
+            dict.__setitem__(new_copy, usage_key, new_relations)
+        return new_copy
+
+    def get_parents(self, usage_key):
+        """
+        Returns the list of usage keys of the given block's parents.
+        """
+        return self[usage_key].parents
+
+    def get_children(self, usage_key):
+        """
+        Returns the list of usage keys of the given block's children.
+        """
+        return self[usage_key].children
+
+    def clear_parents(self, usage_key):
+        """
+        Removes the parents of the given block, without updating the
+        children of those parents.
+        """
+        self[usage_key].parents = []
+
+    def add_block(self, usage_key):
+        """
+        Adds the given usage_key, if it isn't already present.
+        """
+        if usage_key not in self:
+            self[usage_key] = _BlockRelations()
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding either block if
+        it isn't already present.
+        """
+        self.add_block(parent_key)
+        self.add_block(child_key)
+
+        self[child_key].parents.append(parent_key)
+        self[parent_key].children.append(child_key)
+
+    def remove_block(self, usage_key):
+        """
+        Removes the given block and all its relationships.
+
+        Returns:
+            tuple ([UsageKey], [UsageKey]) - The removed block's parents
+                and children.
+        """
+        relations = self.pop(usage_key)
+
+        # Remove block from its children.
+        for child in relations.children:
+            self[child].parents.remove(usage_key)
+
+        # Remove block from its parents.
+        for parent in relations.parents:
+            self[parent].children.remove(usage_key)
+
+        return relations.parents, relations.children
+
+    def topological_traversal(self, start_node, **kwargs):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        return traverse_topologically(
+            start_node=start_node,
+            get_parents=self._get_parents_if_present,
+            get_children=self._get_children_if_present,
+            **kwargs
+        )
+
+    def post_order_traversal(self, start_node, **kwargs):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        return traverse_post_order(
+            start_node=start_node,
+            get_children=self._get_children_if_present,
+            **kwargs
+        )
+
+    def pruned(self, root_block_usage_key):
+        """
+        Returns a new _BlockRelationsMap with only those blocks that are
+        reachable from the given root.
+        """
+        # Create a new block relations map to store only those blocks
+        # that are still linked
+        pruned_block_relations = _BlockRelationsMap()
+
+        # Build the structure from the leaves up by doing a post-order
+        # traversal of the old structure, thereby encountering only
+        # reachable blocks.
+        for block_key in self.post_order_traversal(root_block_usage_key):
+            # If the block is in the old structure,
+            if block_key in self:
+                # Add it to the new pruned structure
+                pruned_block_relations.add_block(block_key)
+
+                # Add a relationship to only those old children that
+                # were also added to the new pruned structure.
+                for child in self[block_key].children:
+                    if child in pruned_block_relations:
+                        pruned_block_relations.add_relation(block_key, child)
+
+        return pruned_block_relations
+
+    def _get_parents_if_present(self, usage_key):
+        """
+        Returns the given block's parents, or an empty list if it isn't
+        present.
+        """
+        return self[usage_key].parents if usage_key in self else []
+
+    def _get_children_if_present(self, usage_key):
+        """
+        Returns the given block's children, or an empty list if it isn't
+        present.
+        """
+        return self[usage_key].children if usage_key in self else []
+
+
+class _IndexedBlockRelations(object):
+    """
+    Alternative data structure for the relations of all blocks in a
+    block structure, implementing the same interface as
+    _BlockRelationsMap.
+
+    Each block is mapped to a dense integer id, and the parents and
+    children of the blocks are stored as integer arrays in a compressed
+    sparse row layout: the children of the block with id i are
+    children[children_offsets[i]:children_offsets[i + 1]], and likewise
+    for parents.
+
+    The arrays are treated as immutable, so copies can share them.
+    Relations of blocks that are modified after construction are
+    recorded as lists of ids in override maps. Traversals run over the
+    integer ids, so usage keys are only hashed when entering the
+    structure.
+    """
+    def __init__(self, usage_keys, parents_offsets, parents, children_offsets, children):
+        """
+        Arguments:
+            usage_keys ([UsageKey]) - The usage keys of the blocks,
+                ordered by their ids.
+
+            parents_offsets, parents, children_offsets, children
+                (array) - The parents and children of the blocks, in
+                the layout described above.
+        """
+        # List of usage keys, indexed by block id.
+        # list [UsageKey]
+        self._usage_keys = list(usage_keys)
+
+        # Map of a block's usage key to its block id.
+        # dict {UsageKey: int}
+        self._ids = {usage_key: block_id for block_id, usage_key in enumerate(self._usage_keys)}
+
+        # Whether the block with the given id is present in the structure.
+        # bytearray
+        self._present = bytearray(b'\x01') * len(self._usage_keys)
+        self._num_present = len(self._usage_keys)
+
+        self._parents_offsets = parents_offsets
+        self._parents = parents
+        self._children_offsets = children_offsets
+        self._children = children
+
+        # Maps of a block id to the ids of its parents or children, for
+        # blocks whose relations were modified after construction.
+        # dict {int: [int]}
+        self._parents_overrides = {}
+        self._children_overrides = {}
+
+    @classmethod
+    def from_relations(cls, block_relations):
+        """
+        Returns a new _IndexedBlockRelations with the relations of the
+        given _BlockRelationsMap (or equivalent dict).
+        """
+        usage_keys = list(block_relations.iterkeys())
+        ids = {usage_key: block_id for block_id, usage_key in enumerate(usage_keys)}
+
+        parents_offsets, parents = array('l', [0]), array('l')
+        children_offsets, children = array('l', [0]), array('l')
+        for usage_key in usage_keys:
+            relations = block_relations[usage_key]
+            parents.extend(ids[parent] for parent in relations.parents)
+            parents_offsets.append(len(parents))
+            children.extend(ids[child] for child in relations.children)
+            children_offsets.append(len(children))
+
+        return cls(usage_keys, parents_offsets, parents, children_offsets, children)
+
+    def copy(self):
+        """
+        Returns a copy of this instance that shares its immutable arrays.
+        """
+        new_copy = _IndexedBlockRelations.__new__(_IndexedBlockRelations)
+        new_copy.__dict__.update(self.__dict__)
+        new_copy._usage_keys = list(self._usage_keys)
+        new_copy._ids = dict(self._ids)
+        new_copy._present = bytearray(self._present)
+        new_copy._parents_overrides = {
+            block_id: list(parents) for block_id, parents in self._parents_overrides.iteritems()
+        }
+        new_copy._children_overrides = {
+            block_id: list(children) for block_id, children in self._children_overrides.iteritems()
+        }
+        return new_copy
+
+    def __deepcopy__(self, memo):
+        # Usage keys are immutable, so a copy is as good as a deep copy.
+        return self.copy()
+
+    def __contains__(self, usage_key):
+        block_id = self._ids.get(usage_key)
+        return block_id is not None and self._present[block_id]
+
+    def __len__(self):
+        return self._num_present
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def iterkeys(self):
+        """
+        Returns an iterator of the usage keys of all present blocks.
+        """
+        return (
+            usage_key for block_id, usage_key in enumerate(self._usage_keys) if self._present[block_id]
+        )
+
+    def iteritems(self):
+        """
+        Returns an iterator of (UsageKey, _BlockRelations) pairs for all
+        present blocks, compatible with _BlockRelationsMap.iteritems.
+        """
+        for usage_key in self.iterkeys():
+            relations = _BlockRelations()
+            relations.parents = self.get_parents(usage_key)
+            relations.children = self.get_children(usage_key)
+            yield usage_key, relations
+
+    def get_parents(self, usage_key):
+        """
+        Returns a new list of usage keys of the given block's parents.
+        """
+        return [self._usage_keys[parent] for parent in self._get_parent_ids(self._get_id(usage_key))]
+
+    def get_children(self, usage_key):
+        """
+        Returns a new list of usage keys of the given block's children.
+        """
+        return [self._usage_keys[child] for child in self._get_child_ids(self._get_id(usage_key))]
+
+    def clear_parents(self, usage_key):
+        """
+        Removes the parents of the given block, without updating the
+        children of those parents.
+        """
+        self._parents_overrides[self._get_id(usage_key)] = []
+
+    def add_block(self, usage_key):
+        """
+        Adds the given usage_key, if it isn't already present.
+        """
+        block_id = self._ids.get(usage_key)
+        if block_id is None:
+            block_id = len(self._usage_keys)
+            self._ids[usage_key] = block_id
+            self._usage_keys.append(usage_key)
+            self._present.append(1)
+        elif not self._present[block_id]:
+            self._present[block_id] = 1
+        else:
+            return block_id
+
+        self._num_present += 1
+        self._parents_overrides[block_id] = []
+        self._children_overrides[block_id] = []
+        return block_id
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding either block if
+        it isn't already present.
+        """
+        parent_id = self.add_block(parent_key)
+        child_id = self.add_block(child_key)
+
+        self._writable_parent_ids(child_id).append(parent_id)
+        self._writable_child_ids(parent_id).append(child_id)
+
+    def remove_block(self, usage_key):
+        """
+        Removes the given block and all its relationships.
+
+        Returns:
+            tuple ([UsageKey], [UsageKey]) - The removed block's parents
+                and children.
+        """
+        block_id = self._get_id(usage_key)
+        parent_ids = list(self._get_parent_ids(block_id))
+        child_ids = list(self._get_child_ids(block_id))
+
+        for child_id in child_ids:
+            self._writable_parent_ids(child_id).remove(block_id)
+        for parent_id in parent_ids:
+            self._writable_child_ids(parent_id).remove(block_id)
+
+        self._present[block_id] = 0
+        self._num_present -= 1
+        self._parents_overrides[block_id] = []
+        self._children_overrides[block_id] = []
+
+        return (
+            [self._usage_keys[parent_id] for parent_id in parent_ids],
+            [self._usage_keys[child_id] for child_id in child_ids],
+        )
+
+    def topological_traversal(self, start_node, filter_func=None, **kwargs):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        if start_node not in self:
+            return _BlockRelationsMap().topological_traversal(start_node, filter_func=filter_func, **kwargs)
+
+        return self._usage_keys_of(traverse_topologically(
+            start_node=self._get_id(start_node),
+            get_parents=self._get_parent_ids,
+            get_children=self._get_child_ids,
+            filter_func=self._id_filter(filter_func),
+            **kwargs
+        ))
+
+    def post_order_traversal(self, start_node, filter_func=None):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        if start_node not in self:
+            return _BlockRelationsMap().post_order_traversal(start_node, filter_func=filter_func)
+
+        return self._usage_keys_of(traverse_post_order(
+            start_node=self._get_id(start_node),
+            get_children=self._get_child_ids,
+            filter_func=self._id_filter(filter_func),
+        ))
+
+    def pruned(self, root_block_usage_key):
+        """
+        Returns a new _IndexedBlockRelations with only those blocks that
+        are reachable from the given root.
+        """
+        if root_block_usage_key not in self:
+            return _BlockRelationsMap()
+
+        pruned_block_relations = self.copy()
+        reachable = bytearray(len(self._usage_keys))
+        for block_id in traverse_post_order(self._get_id(root_block_usage_key), get_children=self._get_child_ids):
+            reachable[block_id] = 1
+
+        for block_id, is_present in enumerate(self._present):
+            if not is_present:
+                continue
+
+            if not reachable[block_id]:
+                pruned_block_relations._present[block_id] = 0
+                pruned_block_relations._num_present -= 1
+                pruned_block_relations._parents_overrides[block_id] = []
+                pruned_block_relations._children_overrides[block_id] = []
+
+            else:
+                parent_ids = self._get_parent_ids(block_id)
+                if not all(reachable[parent_id] for parent_id in parent_ids):
+                    pruned_block_relations._parents_overrides[block_id] = [
+                        parent_id for parent_id in parent_ids if reachable[parent_id]
+                    ]
+
+        return pruned_block_relations
+
+    def _get_id(self, usage_key):
+        """
+        Returns the id of the given block. Raises KeyError if the block
+        isn't present.
+        """
+        block_id = self._ids[usage_key]
+        if not self._present[block_id]:
+            raise KeyError(usage_key)
+        return block_id
+
+    def _get_parent_ids(self, block_id):
+        """
+        Returns the ids of the parents of the block with the given id.
+        """
+        try:
+            return self._parents_overrides[block_id]
+        except KeyError:
+            return self._parents[self._parents_offsets[block_id]:self._parents_offsets[block_id + 1]]
+
+    def _get_child_ids(self, block_id):
+        """
+        Returns the ids of the children of the block with the given id.
+        """
+        try:
+            return self._children_overrides[block_id]
+        except KeyError:
+            return self._children[self._children_offsets[block_id]:self._children_offsets[block_id + 1]]
+
+    def _writable_parent_ids(self, block_id):
+        """
+        Returns a mutable list of the ids of the parents of the block
+        with the given id, recording it as an override.
+        """
+        if block_id not in self._parents_overrides:
+            self._parents_overrides[block_id] = list(self._get_parent_ids(block_id))
+        return self._parents_overrides[block_id]
+
+    def _writable_child_ids(self, block_id):
+        """
+        Returns a mutable list of the ids of the children of the block
+        with the given id, recording it as an override.
+        """
+        if block_id not in self._children_overrides:
+            self._children_overrides[block_id] = list(self._get_child_ids(block_id))
+        return self._children_overrides[block_id]
+
+    def _id_filter(self, filter_func):
+        """
+        Returns a filter function over block ids for the given filter
+        function over usage keys.
+        """
+        if filter_func is None:
+            return None
+        usage_keys = self._usage_keys
+        return lambda block_id: filter_func(usage_keys[block_id])
+
+    def _usage_keys_of(self, block_ids):
+        """
+        Returns a generator of the usage keys of the given block ids.
+        """
+        usage_keys = self._usage_keys
+        return (usage_keys[block_id] for block_id in block_ids)
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -56,14 +530,14 @@ class BlockStructure(object):
         # UsageKey
         self.root_block_usage_key = root_block_usage_key
 
-        # Map of a block's usage key to its block relations. The
-        # existence of a block in the structure is determined by its
-        # presence in this map.
-        # dict {UsageKey: _BlockRelations}
-        self._block_relations = {}
+        # Relations of the blocks in the structure. The existence of a
+        # block in the structure is determined by its presence in this
+        # map.
+        # _BlockRelationsMap or _IndexedBlockRelations
+        self._block_relations = _BlockRelationsMap()
 
         # Add the root block.
-        self._add_block(self._block_relations, root_block_usage_key)
+        self._block_relations.add_block(root_block_usage_key)
 
     def __iter__(self):
         """
@@ -91,7 +565,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
-        return self._block_relations[usage_key].parents if usage_key in self else []
+        return self._block_relations.get_parents(usage_key) if usage_key in self else []
 
     def get_children(self, usage_key):
         """
@@ -105,7 +579,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
-        return self._block_relations[usage_key].children if usage_key in self else []
+        return self._block_relations.get_children(usage_key) if usage_key in self else []
 
     def set_root_block(self, usage_key):
         """
@@ -120,7 +594,7 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._block_relations.clear_parents(usage_key)
 
     def __contains__(self, usage_key):
         """
@@ -167,10 +641,8 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
-        return traverse_topologically(
+        return self._block_relations.topological_traversal(
             start_node=start_node or self.root_block_usage_key,
-            get_parents=self.get_parents,
-            get_children=self.get_children,
             filter_func=filter_func,
             yield_descendants_of_unyielded=yield_descendants_of_unyielded,
         )
@@ -192,9 +664,8 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
-        return traverse_post_order(
+        return self._block_relations.post_order_traversal(
             start_node=start_node or self.root_block_usage_key,
-            get_children=self.get_children,
             filter_func=filter_func,
         )
 
@@ -205,76 +676,25 @@ class BlockStructure(object):
         """
         Mutates this block structure by removing any unreachable blocks.
         """
+        self._block_relations = self._block_relations.pruned(self.root_block_usage_key)
 
-        # Create a new block relations map to store only those blocks
-        # that are still linked
-        pruned_block_relations = {}
-        old_block_relations = self._block_relations
-
-        # Build the structure from the leaves up by doing a post-order
-        # traversal of the old structure, thereby encountering only
-        # reachable blocks.
-        for block_key in self.post_order_traversal():
-            # If the block is in the old structure,
-            if block_key in old_block_relations:
-                # Add it to the new pruned structure
-                self._add_block(pruned_block_relations, block_key)
-
-                # Add a relationship to only those old children that
-                # were also added to the new pruned structure.
-                for child in old_block_relations[block_key].children:
-                    if child in pruned_block_relations:
-                        self._add_to_relations(pruned_block_relations, block_key, child)
-
-        # Replace this structure's relations with the newly pruned one.
-        self._block_relations = pruned_block_relations
-
-    def _add_relation(self, parent_key, child_key):
+    def _index_relations(self):
         """
-        Adds a parent to child relationship in this block structure.
-
-        Arguments:
-            parent_key (UsageKey) - Usage key of the parent block.
-            child_key (UsageKey) - Usage key of the child block.
+        Switches this block structure's relations to the integer-indexed
+        _IndexedBlockRelations representation.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        if not isinstance(self._block_relations, _IndexedBlockRelations):
+            self._block_relations = _IndexedBlockRelations.from_relations(self._block_relations)
 
-    @staticmethod
-    def _add_to_relations(block_relations, parent_key, child_key):
+    def _add_relation(self, parent_key, child_key):
         """
-        Adds a parent to child relationship in the given block
-        relations map.
+        Adds a parent to child relationship in this block structure.
 
         Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
-
             parent_key (UsageKey) - Usage key of the parent block.
-
             child_key (UsageKey) - Usage key of the child block.
         """
-        BlockStructure._add_block(block_relations, parent_key)
-        BlockStructure._add_block(block_relations, child_key)
-
-        block_relations[child_key].parents.append(parent_key)
-        block_relations[parent_key].children.append(child_key)
-
-    @staticmethod
-    def _add_block(block_relations, usage_key):
-        """
-        Adds the given usage_key to the given block_relations map.
-
-        Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
-
-            usage_key (UsageKey) - Usage key of the block that is to
-                be added to the given block_relations.
-        """
-        if usage_key not in block_relations:
-            block_relations[usage_key] = _BlockRelations()
+        self._block_relations.add_relation(parent_key, child_key)
 
 
 class FieldData(object):
@@ -326,7 +746,14 @@ class TransformerData(FieldData):
     """
     Data structure to encapsulate collected data for a transformer.
     """
-    pass
+    def copy(self):
+        """
+        Returns a shallow copy of this instance, sharing the values of
+        its fields.
+        """
+        new_copy = TransformerData()
+        new_copy.fields = dict(self.fields)
+        return new_copy
 
 
 class TransformerDataMap(dict):
@@ -347,6 +774,16 @@ class TransformerDataMap(dict):
         key = self._translate_key(key)
         dict.__delitem__(self, key)
 
+    def copy(self):
+        """
+        Returns a copy of this map, with shallow copies of each of its
+        TransformerData.
+        """
+        new_copy = TransformerDataMap()
+        for transformer_name, transformer_data in self.iteritems():
+            dict.__setitem__(new_copy, transformer_name, transformer_data.copy())
+        return new_copy
+
     def get_or_create(self, key):
         """
         Returns the TransformerData associated with the given
@@ -391,6 +828,16 @@ class BlockData(FieldData):
         # Map of transformer name to its block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def copy(self):
+        """
+        Returns a shallow copy of this instance, sharing the values of
+        its fields and its transformers' fields.
+        """
+        new_copy = BlockData(self.location)
+        new_copy.fields = dict(self.fields)
+        new_copy.transformer_data = self.transformer_data.copy()
+        return new_copy
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -414,19 +861,35 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Set of usage keys of the blocks whose BlockData may be mutated
+        # in place by this instance, or None if all of them may be.  The
+        # others are shared with copies of this instance.
+        # set {UsageKey} or None
+        self._owned_block_keys = None
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
-        deep-copy of this instance's contents.
+        copy-on-write copy of this instance's contents.
+
+        The BlockData of the blocks are shared by both instances until
+        either instance updates a block, at which point that instance
+        first makes its own copy of the block's BlockData.  Removing a
+        block does not affect the other instance either.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        new_copy = BlockStructureFactory.create_new(
             self.root_block_usage_key,
-            deepcopy(self._block_relations),
-            deepcopy(self.transformer_data),
-            deepcopy(self._block_data_map),
+            self._block_relations.copy(),
+            self.transformer_data.copy(),
+            dict(self._block_data_map),
         )
 
+        # Neither instance owns the shared BlockData anymore.
+        self._owned_block_keys = set()
+        new_copy._owned_block_keys = set()  # pylint: disable=protected-access
+        return new_copy
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
@@ -578,9 +1041,11 @@ class BlockStructureBlockData(BlockStructure):
         """
         try:
             transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
-            delattr(transformer_block_data, key)
-        except (AttributeError, KeyError):
-            pass
+        except KeyError:
+            return
+
+        if key in transformer_block_data.fields:
+            delattr(self._get_or_create_block(usage_key).transformer_data[transformer], key)
 
     def remove_block(self, usage_key, keep_descendants):
         """
@@ -602,19 +1067,8 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
-        children = self._block_relations[usage_key].children
-        parents = self._block_relations[usage_key].parents
-
-        # Remove block from its children.
-        for child in children:
-            self._block_relations[child].parents.remove(usage_key)
-
-        # Remove block from its parents.
-        for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
-
-        # Remove block.
-        self._block_relations.pop(usage_key, None)
+        # Remove block and its relations.
+        parents, children = self._block_relations.remove_block(usage_key)
         self._block_data_map.pop(usage_key, None)
 
         # Recreate the graph connections if descendants are to be kept.
@@ -736,16 +1190,24 @@ class BlockStructureBlockData(BlockStructure):
 
     def _get_or_create_block(self, usage_key):
         """
-        Returns the BlockData associated with the given usage_key.
-        If not found, creates and returns a new BlockData and
-        maps it to the given key.
+        Returns the BlockData associated with the given usage_key,
+        for updating.  If not found, creates and returns a new BlockData
+        and maps it to the given key.  If shared with a copy of this
+        instance, replaces it with a copy of its own first.
         """
         try:
-            return self._block_data_map[usage_key]
+            block_data = self._block_data_map[usage_key]
         except KeyError:
             block_data = BlockData(usage_key)
-            self._block_data_map[usage_key] = block_data
-            return block_data
+        else:
+            if self._owned_block_keys is None or usage_key in self._owned_block_keys:
+                return block_data
+            block_data = block_data.copy()
+
+        self._block_data_map[usage_key] = block_data
+        if self._owned_block_keys is not None:
+            self._owned_block_keys.add(usage_key)
+        return block_data
 
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
@@ -770,6 +1232,17 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         # set(string)
         self._requested_xblock_fields = set()
 
+        # Set of usage keys of the blocks whose data is to be collected
+        # during an incremental collect, or None if the data of all
+        # blocks is to be collected.  The previously collected data of
+        # any other blocks is already in the block structure.
+        # set(UsageKey) or None
+        self._blocks_to_collect = None
+
+        # The modulestore from which xBlocks are loaded on demand during
+        # an incremental collect.
+        self._modulestore = None
+
     def request_xblock_fields(self, *field_names):
         """
         Records request for collecting data for the given xBlock fields.
@@ -794,7 +1267,34 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
             usage_key (UsageKey) - Usage key of the block whose
                 xBlock object is to be returned.
         """
-        return self._xblock_map[usage_key]
+        try:
+            return self._xblock_map[usage_key]
+        except KeyError:
+            if self._modulestore is None:
+                raise
+            xblock = self._modulestore.get_item(usage_key)
+            self._add_xblock(usage_key, xblock)
+            return xblock
+
+    def topological_traversal(self, *args, **kwargs):
+        """
+        See BlockStructure.topological_traversal.  During an incremental
+        collect, only the blocks whose data is to be collected are
+        yielded.
+        """
+        return self._blocks_to_collect_from(
+            super(BlockStructureModulestoreData, self).topological_traversal(*args, **kwargs)
+        )
+
+    def post_order_traversal(self, *args, **kwargs):
+        """
+        See BlockStructure.post_order_traversal.  During an incremental
+        collect, only the blocks whose data is to be collected are
+        yielded.
+        """
+        return self._blocks_to_collect_from(
+            super(BlockStructureModulestoreData, self).post_order_traversal(*args, **kwargs)
+        )
 
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
@@ -819,11 +1319,44 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         Iterates through all instantiated xBlocks that were added and
         collects all xBlock fields that were requested.
         """
+        if self._blocks_to_collect is not None:
+            # Load any xBlocks whose data is to be collected that were
+            # not accessed by the transformers.
+            for usage_key in self._blocks_to_collect:
+                self.get_xblock(usage_key)
+
         for xblock_usage_key, xblock in self._xblock_map.iteritems():
             block_data = self._get_or_create_block(xblock_usage_key)
             for field_name in self._requested_xblock_fields:
                 self._set_xblock_field(block_data, xblock, field_name)
 
+    def _start_incremental_collect(self, blocks_to_collect, modulestore):
+        """
+        Restricts the blocks whose data is collected to the given
+        blocks, whose xBlocks are loaded on demand from the given
+        modulestore.
+        """
+        self._blocks_to_collect = blocks_to_collect
+        self._modulestore = modulestore
+
+    def _end_incremental_collect(self):
+        """
+        Lifts the restriction of _start_incremental_collect, once the
+        data is collected.
+        """
+        self._blocks_to_collect = None
+        self._modulestore = None
+
+    def _blocks_to_collect_from(self, block_keys):
+        """
+        Returns the given iterable of block keys, restricted to the
+        blocks whose data is to be collected.
+        """
+        blocks_to_collect = self._blocks_to_collect
+        if blocks_to_collect is None:
+            return block_keys
+        return (block_key for block_key in block_keys if block_key in blocks_to_collect)
+
     def _set_xblock_field(self, block_data, xblock, field_name):
         """
         Updates the given block's xBlock fields data with the xBlock
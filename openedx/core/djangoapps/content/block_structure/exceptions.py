@@ -32,6 +32,14 @@ class TransformerDataIncompatible(BlockStructureException):
     pass
 
 
+class SerializedDataIncompatible(BlockStructureException):
+    """
+    Exception for when serialized block structure data was written in
+    a format that the current code cannot read.
+    """
+    pass
+
+
 class BlockStructureNotFound(BlockStructureException):
     """
     Exception for when a Block Structure is not found.
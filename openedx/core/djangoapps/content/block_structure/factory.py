@@ -1,7 +1,10 @@
 """
 Module for factory class for BlockStructure objects.
 """
-from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData, _BlockRelationsMap
+from .transformers import BLOCK_VERSION_FIELD
 
 
 class BlockStructureFactory(object):
@@ -58,7 +61,83 @@ class BlockStructureFactory(object):
         return block_structure
 
     @classmethod
-    def create_from_store(cls, root_block_usage_key, block_structure_store):
+    def create_from_modulestore_incrementally(
+            cls,
+            root_block_usage_key,
+            modulestore,
+            block_versions,
+            previous_block_structure,
+    ):
+        """
+        Creates and returns a block structure from the modulestore
+        starting at the given root_block_usage_key, for collecting data
+        for only those blocks that are affected by the changes to the
+        content since the given previous block structure was collected.
+
+        The affected blocks are the root block, the changed blocks, and
+        their ancestors and descendants.  The previously collected data
+        of all other blocks is copied from the previous block structure.
+        No xBlocks are instantiated up front; the xBlocks of the affected
+        blocks are loaded on demand.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the root
+                of the block structure that is to be created.
+
+            modulestore (ModuleStoreRead) - The modulestore that
+                contains the data for the xBlocks within the block
+                structure starting at root_block_usage_key.
+
+            block_versions (dict {UsageKey: (version, [UsageKey])}) -
+                The current version and children of each block in the
+                modulestore.  See the modulestore's get_block_versions.
+
+            previous_block_structure (BlockStructureBlockData) - A
+                block structure that was previously collected, including
+                the version of each block.
+
+        Returns:
+            BlockStructureModulestoreData - The created block structure,
+                restricted to collecting the affected blocks.
+        """
+        block_structure = BlockStructureModulestoreData(root_block_usage_key)
+        if root_block_usage_key not in block_versions:
+            raise ItemNotFoundError(root_block_usage_key)
+
+        # Add the relations of all blocks reachable from the root,
+        # skipping dangling references to blocks that no longer exist,
+        # as the modulestore's get_children does.
+        blocks_visited = {root_block_usage_key}
+        blocks_to_visit = [root_block_usage_key]
+        while blocks_to_visit:
+            block_key = blocks_to_visit.pop()
+            for child_key in block_versions[block_key][1]:
+                if child_key not in block_versions:
+                    continue
+                block_structure._add_relation(block_key, child_key)  # pylint: disable=protected-access
+                if child_key not in blocks_visited:
+                    blocks_visited.add(child_key)
+                    blocks_to_visit.append(child_key)
+
+        changed_blocks = {
+            block_key for block_key in blocks_visited
+            if block_key not in previous_block_structure or block_versions[block_key][0] != (
+                previous_block_structure.get_xblock_field(block_key, BLOCK_VERSION_FIELD)
+            )
+        }
+        affected_blocks = {root_block_usage_key}
+        affected_blocks.update(_reachable(changed_blocks, block_structure.get_children))
+        affected_blocks.update(_reachable(changed_blocks, block_structure.get_parents))
+
+        block_structure.transformer_data = previous_block_structure.transformer_data.copy()
+        for block_key in blocks_visited - affected_blocks:
+            block_structure._block_data_map[block_key] = previous_block_structure[block_key].copy()  # pylint: disable=protected-access
+
+        block_structure._start_incremental_collect(affected_blocks, modulestore)  # pylint: disable=protected-access
+        return block_structure
+
+    @classmethod
+    def create_from_store(cls, root_block_usage_key, block_structure_store, transformer_names=None):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key from the given store, if it's found in the store.
@@ -75,6 +154,10 @@ class BlockStructureFactory(object):
                 store from which the block structure is to be
                 deserialized.
 
+            transformer_names (set of strings) - The names of the
+                transformers whose collected block-level data is to be
+                loaded. If None, data of all transformers is loaded.
+
         Returns:
             BlockStructure - The deserialized block structure starting
                 at root_block_usage_key, if found in the cache.
@@ -83,15 +166,34 @@ class BlockStructureFactory(object):
             BlockStructureNotFound - If the root_block_usage_key is not found
                 in the store.
         """
-        return block_structure_store.get(root_block_usage_key)
+        return block_structure_store.get(root_block_usage_key, transformer_names)
 
     @classmethod
     def create_new(cls, root_block_usage_key, block_relations, transformer_data, block_data_map):
         """
         Returns a new block structure for given the arguments.
         """
+        if type(block_relations) is dict:  # pylint: disable=unidiomatic-typecheck
+            # Relations deserialized from the older pickle format.
+            block_relations = _BlockRelationsMap(block_relations)
+
         block_structure = BlockStructureBlockData(root_block_usage_key)
         block_structure._block_relations = block_relations  # pylint: disable=protected-access
         block_structure.transformer_data = transformer_data
         block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
         return block_structure
+
+
+def _reachable(block_keys, get_next_keys):
+    """
+    Returns the set of the given block keys and of all block keys that
+    are reachable from them by repeatedly calling get_next_keys.
+    """
+    reachable = set(block_keys)
+    blocks_to_visit = list(block_keys)
+    while blocks_to_visit:
+        for next_key in get_next_keys(blocks_to_visit.pop()):
+            if next_key not in reachable:
+                reachable.add(next_key)
+                blocks_to_visit.append(next_key)
+    return reachable
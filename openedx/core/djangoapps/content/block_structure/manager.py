@@ -2,15 +2,134 @@
 Top-level module for the Block Structure framework with a class for managing
 BlockStructures.
 """
+from collections import OrderedDict
 from contextlib import contextmanager
+import threading
 
 from . import config
+from .block_structure import BlockStructureBlockData
 from .exceptions import UsageKeyNotInBlockStructure, TransformerDataIncompatible, BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
+from .transformer_registry import TransformerRegistry
 from .transformers import BlockStructureTransformers
 
 
+class _TransformedStructureCache(object):
+    """
+    An in-process cache of the block structures resulting from
+    user-independent transforms, evicting the least recently used
+    structure when it holds more than max_entries.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._structures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the block structure for the given key, or None if not
+        found. The returned structure must not be mutated.
+        """
+        with self._lock:
+            block_structure = self._structures.pop(key, None)
+            if block_structure is not None:
+                self._structures[key] = block_structure
+            return block_structure
+
+    def set(self, key, block_structure):
+        """
+        Caches the given block structure for the given key.
+        """
+        with self._lock:
+            self._structures.pop(key, None)
+            self._structures[key] = block_structure
+            while len(self._structures) > self.max_entries:
+                self._structures.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all cached block structures.
+        """
+        with self._lock:
+            self._structures.clear()
+
+
+class BlockStructureTransformBatch(object):
+    """
+    Transforms a block structure for any of a batch of usage_infos,
+    sharing the work and data that is common to all of them.
+    See BlockStructureManager.get_transformed_batch.
+    """
+    def __init__(
+            self,
+            manager,
+            transformers,
+            usage_infos,
+            starting_block_usage_key,
+            collected_block_structure,
+            load_all_transformer_data,
+    ):
+        self.manager = manager
+        self.usage_infos = usage_infos
+        self._transformers = transformers
+        self._starting_block_usage_key = starting_block_usage_key
+        self._collected_block_structure = collected_block_structure
+        self._load_all_transformer_data = load_all_transformer_data
+
+        # The block structure transformed with the user-independent
+        # transformers, and the remaining transformers; set when the
+        # batch is prepared.
+        self._block_structure = None
+        self._remaining_transformers = None
+
+    def get_transformed(self, key):
+        """
+        Returns a newly transformed block structure for the usage_info
+        with the given key.
+
+        Raises:
+            KeyError if there is no usage_info for the key in the batch.
+        """
+        usage_info = self.usage_infos[key]
+        if self._block_structure is None:
+            self._prepare()
+
+        block_structure = self._block_structure.copy()
+        self._remaining_transformers.usage_info = usage_info
+        self._remaining_transformers.transform(block_structure)
+        return block_structure
+
+    def _prepare(self):
+        """
+        Applies the user-independent transformers and has the remaining
+        transformers bulk-load their data for all of the usage_infos.
+        """
+        # pylint: disable=protected-access
+        block_structure, remaining_transformers = self.manager._get_user_independent_transformed(
+            self._transformers,
+            self._starting_block_usage_key,
+            self._collected_block_structure,
+            self._load_all_transformer_data,
+            split=True,
+        )
+        remaining_transformers.prepare_batch(self.usage_infos.values(), block_structure)
+        self._block_structure, self._remaining_transformers = block_structure, remaining_transformers
+
+
+# The maximum number of memoized results of user-independent transforms
+# to keep in each process.
+MAX_MEMOIZED_TRANSFORMS = 64
+
+_MEMOIZED_TRANSFORMS = _TransformedStructureCache(MAX_MEMOIZED_TRANSFORMS)
+
+# The maximum fraction of the blocks of a block structure that may be
+# affected by changes to the content for its data to be collected
+# incrementally.  Beyond it, loading the entire course at once is faster
+# than loading the affected blocks one at a time.
+MAX_INCREMENTAL_COLLECT_RATIO = 0.5
+
+
 class BlockStructureManager(object):
     """
     Top-level class for managing Block Structures.
@@ -34,7 +153,13 @@ class BlockStructureManager(object):
         self.modulestore = modulestore
         self.store = BlockStructureStore(cache)
 
-    def get_transformed(self, transformers, starting_block_usage_key=None, collected_block_structure=None):
+    def get_transformed(
+            self,
+            transformers,
+            starting_block_usage_key=None,
+            collected_block_structure=None,
+            load_all_transformer_data=True,
+    ):
         """
         Returns the transformed Block Structure for the root_block_usage_key,
         starting at starting_block_usage_key, getting block data from the cache
@@ -43,6 +168,12 @@ class BlockStructureManager(object):
         Details: Similar to the get_collected method, except the transformers'
         transform methods are also called.
 
+        If the MEMOIZE_USER_INDEPENDENT_TRANSFORMS switch is enabled, the
+        result of applying the USER_INDEPENDENT transformers at the start
+        of the given collection is memoized in-process, keyed by the
+        version of the collected content and by the transformers' versions
+        and configuration, so the remaining transformers start from it.
+
         Arguments:
             transformers (BlockStructureTransformers) - Collection of
                 transformers to apply.
@@ -56,11 +187,138 @@ class BlockStructureManager(object):
                 get_collected.  Can be optionally provided if already available,
                 for optimization.
 
+            load_all_transformer_data (bool) - Whether the collected
+                block-level data of all registered transformers is to
+                be loaded, rather than only that of the given
+                transformers. Callers that do not read the data of
+                other transformers from the returned block structure
+                can pass False to avoid fetching and deserializing it.
+
         Returns:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        block_structure, transformers = self._get_user_independent_transformed(
+            transformers,
+            starting_block_usage_key,
+            collected_block_structure,
+            load_all_transformer_data,
+            split=config.waffle().is_enabled(config.MEMOIZE_USER_INDEPENDENT_TRANSFORMS),
+        )
+        transformers.transform(block_structure)
+        return block_structure
+
+    def get_transformed_batch(
+            self,
+            transformers,
+            usage_infos,
+            starting_block_usage_key=None,
+            collected_block_structure=None,
+            load_all_transformer_data=True,
+    ):
+        """
+        Returns a BlockStructureTransformBatch, which transforms the Block
+        Structure for the root_block_usage_key, starting at
+        starting_block_usage_key, for any of the given usage_infos.
+
+        Details: Equivalent to calling get_transformed for each of the
+        usage_infos, except that:
+            * the collected block structure is retrieved only once,
+            * the USER_INDEPENDENT transformers at the start of the
+              given collection are applied only once, and
+            * the remaining transformers are given the opportunity to
+              bulk-load their data for all of the usage_infos at once,
+              via their prepare_batch methods.
+
+        Nothing is retrieved nor transformed until a transformed block
+        structure is first requested from the batch.
+
+        Arguments:
+            transformers (BlockStructureTransformers) - Collection of
+                transformers to apply.
+
+            usage_infos (dict {key: usage_info}) - The usage_info
+                objects for which the block structure is to be
+                transformed, by the keys with which they are requested
+                from the batch.
+
+            See get_transformed for the remaining arguments.
+        """
+        return BlockStructureTransformBatch(
+            self,
+            transformers,
+            usage_infos,
+            starting_block_usage_key,
+            collected_block_structure,
+            load_all_transformer_data,
+        )
+
+    def _get_user_independent_transformed(
+            self,
+            transformers,
+            starting_block_usage_key,
+            collected_block_structure,
+            load_all_transformer_data,
+            split,
+    ):
+        """
+        Returns a mutable copy of the collected block structure, starting
+        at starting_block_usage_key, and the transformers that remain to
+        be applied to it.
+
+        If split is True, the copy has already been transformed with the
+        USER_INDEPENDENT transformers at the start of the given
+        collection, using their memoized result if available.
+        """
+        transformer_names = None if load_all_transformer_data else transformers.get_transformer_data_names()
+
+        if split:
+            user_independent_transformers, transformers = transformers.split_user_independent()
+        else:
+            user_independent_transformers = BlockStructureTransformers(usage_info=transformers.usage_info)
+
+        memoize = (
+            not user_independent_transformers.is_empty() and
+            config.waffle().is_enabled(config.MEMOIZE_USER_INDEPENDENT_TRANSFORMS)
+        )
+
+        stored_memo_key = None
+        if memoize and not collected_block_structure:
+            # Look the result up by the version of the stored block
+            # structure first, so that the collected block structure is
+            # neither fetched nor deserialized when it is memoized.
+            stored_memo_key = self._get_memo_key(
+                self.store.get_content_version(self.root_block_usage_key),
+                user_independent_transformers,
+                starting_block_usage_key,
+                transformer_names,
+            )
+            memoized_block_structure = _MEMOIZED_TRANSFORMS.get(stored_memo_key) if stored_memo_key else None
+            if memoized_block_structure is not None:
+                return memoized_block_structure.copy(), transformers
+
+        if collected_block_structure:
+            block_structure = collected_block_structure
+        else:
+            block_structure = self.get_collected(transformer_names)
+
+        memo_key = None
+        if memoize:
+            # The result is always memoized by the version of the content
+            # it was actually transformed from.
+            memo_key = self._get_memo_key(
+                _content_version(block_structure),
+                user_independent_transformers,
+                starting_block_usage_key,
+                transformer_names,
+            )
+            if memo_key and memo_key != stored_memo_key:
+                memoized_block_structure = _MEMOIZED_TRANSFORMS.get(memo_key)
+                if memoized_block_structure is not None:
+                    return memoized_block_structure.copy(), transformers
+
+        if block_structure is collected_block_structure:
+            block_structure = collected_block_structure.copy()
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
@@ -73,10 +331,15 @@ class BlockStructureManager(object):
                     unicode(self.root_block_usage_key),
                 )
             block_structure.set_root_block(starting_block_usage_key)
-        transformers.transform(block_structure)
-        return block_structure
 
-    def get_collected(self):
+        if not user_independent_transformers.is_empty():
+            user_independent_transformers.transform(block_structure)
+            if memo_key:
+                _MEMOIZED_TRANSFORMS.set(memo_key, block_structure.copy())
+
+        return block_structure, transformers
+
+    def get_collected(self, transformer_names=None):
         """
         Returns the collected Block Structure for the root_block_usage_key,
         getting block data from the cache and modulestore, as needed.
@@ -85,6 +348,13 @@ class BlockStructureManager(object):
         the modulestore is accessed if needed (at cache miss), and the
         transformers data is collected if needed.
 
+        Arguments:
+            transformer_names (set of strings) - The names of the
+                transformers whose collected block-level data is to be
+                loaded from the store. If None, data of all registered
+                transformers is loaded. A newly collected block
+                structure always has data of all transformers.
+
         Returns:
             BlockStructureBlockData - A collected block structure,
                 starting at root_block_usage_key, with collected data
@@ -94,6 +364,7 @@ class BlockStructureManager(object):
             block_structure = BlockStructureFactory.create_from_store(
                 self.root_block_usage_key,
                 self.store,
+                transformer_names,
             )
             BlockStructureTransformers.verify_versions(block_structure)
 
@@ -120,14 +391,58 @@ class BlockStructureManager(object):
         the modulestore.
         """
         with self._bulk_operations():
-            block_structure = BlockStructureFactory.create_from_modulestore(
-                self.root_block_usage_key,
-                self.modulestore,
-            )
-            BlockStructureTransformers.collect(block_structure)
+            block_structure = None
+            if config.waffle().is_enabled(config.INCREMENTAL_COLLECT):
+                block_structure = self._collect_incrementally()
+
+            if block_structure is None:
+                block_structure = BlockStructureFactory.create_from_modulestore(
+                    self.root_block_usage_key,
+                    self.modulestore,
+                )
+                BlockStructureTransformers.collect(block_structure)
+
             self.store.add(block_structure)
             return block_structure
 
+    def _collect_incrementally(self):
+        """
+        Returns a newly collected block structure, for which the data
+        of only those blocks that are affected by changes to the content
+        since the block structure in the store was collected is
+        collected again.
+
+        Returns None if the data cannot be collected incrementally, in
+        which case all of it is to be collected.
+        """
+        if not BlockStructureTransformers.supports_incremental_collect():
+            return None
+
+        try:
+            previous_block_structure = self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+        if not BlockStructureTransformers.is_collected_by_current_versions(previous_block_structure):
+            return None
+
+        block_versions = self.modulestore.get_block_versions(self.root_block_usage_key.course_key)
+        if not block_versions:
+            return None
+
+        block_structure = BlockStructureFactory.create_from_modulestore_incrementally(
+            self.root_block_usage_key,
+            self.modulestore,
+            block_versions,
+            previous_block_structure,
+        )
+        # pylint: disable=protected-access
+        if len(block_structure._blocks_to_collect) > MAX_INCREMENTAL_COLLECT_RATIO * len(block_structure):
+            return None
+
+        BlockStructureTransformers.collect(block_structure)
+        block_structure._end_incremental_collect()
+        return block_structure
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -135,6 +450,30 @@ class BlockStructureManager(object):
         """
         self.store.delete(self.root_block_usage_key)
 
+    def _get_memo_key(self, content_version, user_independent_transformers, starting_block_usage_key, transformer_names):
+        """
+        Returns the key identifying the result of transforming the
+        collected block structure with the given content_version, as
+        collected by the current transformers, with the given
+        user-independent transformers, starting at
+        starting_block_usage_key.
+
+        Returns None if the result cannot be identified, because the
+        version of the content is unknown.
+        """
+        if not content_version:
+            return None
+
+        return (
+            self.root_block_usage_key,
+            starting_block_usage_key,
+            content_version,
+            BlockStructureBlockData.VERSION,
+            TransformerRegistry.get_write_version_hash(),
+            user_independent_transformers.transform_cache_key(),
+            frozenset(transformer_names) if transformer_names is not None else None,
+        )
+
     @contextmanager
     def _bulk_operations(self):
         """
@@ -146,3 +485,15 @@ class BlockStructureManager(object):
             course_key = None
         with self.modulestore.bulk_operations(course_key):
             yield
+
+
+def _content_version(block_structure):
+    """
+    Returns the version of the content of the given collected block
+    structure, in the form it is stored with, or None if it is unknown or
+    the data was not collected by the current transformers.
+    """
+    course_version = block_structure.get_xblock_field(block_structure.root_block_usage_key, 'course_version')
+    if not course_version or not BlockStructureTransformers.is_collected_by_current_versions(block_structure):
+        return None
+    return unicode(course_version)
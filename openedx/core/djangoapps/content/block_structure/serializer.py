@@ -0,0 +1,365 @@
+"""
+Module for the compact, versioned serialization of BlockStructure data.
+
+The compact format avoids pickling the block structure's object graph
+as-is, which repeats each block's usage key once for every relation and
+data entry that refers to it. Instead:
+
+    * Each usage key is interned into a table and referred to by its
+      integer index in that table.
+    * Parent and child relations are stored as flat integer arrays with
+      offsets (similar to a compressed sparse row representation).
+    * Collected xBlock fields and transformer block fields are stored
+      column-wise, as an array of block indices and a list of values
+      per field.
+
+The block-level data of each transformer is serialized into its own
+section, separately from the rest of the structure, so that readers can
+fetch and decode only the sections of the transformers they use. The
+names of the sections are listed in the (uncompressed) header of the
+serialized data.
+
+Serialized data is prefixed with a header carrying the format version,
+so data written with the older zlib-pickle format (which has no such
+header) is still readable.
+
+For storage in a single file, the serialized data and its sections can
+be packed into a container with an index of the sections' positions.
+"""
+from array import array
+import cPickle as pickle
+import struct
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import (
+    BlockData,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+    _BlockRelationsMap,
+    _IndexedBlockRelations,
+)
+from .exceptions import SerializedDataIncompatible
+
+
+# Prefix of all data serialized in the compact format. zlib streams
+# (and hence zpickle'd data) always start with 0x78, so the prefix is
+# never ambiguous with data serialized in the older format.
+COMPACT_FORMAT_PREFIX = b'BSC'
+
+# The version of the compact format. Incrementally update this value
+# whenever the layout of the serialized payload changes.
+COMPACT_FORMAT_VERSION = 2
+
+# Prefix of a container of serialized data and its sections.
+CONTAINER_PREFIX = b'BSP'
+
+# Type code of the integer arrays used in the payload.
+_INDEX_TYPECODE = 'l'
+
+# Layout of the length fields in headers.
+_LENGTH_FORMAT = '>I'
+_LENGTH_SIZE = struct.calcsize(_LENGTH_FORMAT)
+
+
+def serialize(block_relations, transformer_data, block_data_map):
+    """
+    Returns the compact serialization of the given block structure data.
+
+    Arguments:
+        block_relations (dict {UsageKey: _BlockRelations}) - The
+            relations of the block structure.
+
+        transformer_data (TransformerDataMap) - The block structure's
+            non-block-specific transformer data.
+
+        block_data_map (dict {UsageKey: BlockData}) - The block
+            structure's collected block data.
+
+    Returns:
+        tuple (bytes, dict {string: bytes}) - The serialized data, and
+            a map of transformer name to the serialized section of that
+            transformer's block-level data.
+    """
+    usage_keys = []
+    key_indices = {}
+
+    def _intern(usage_key):
+        """
+        Returns the index of the given usage_key in the key table,
+        adding it to the table if needed.
+        """
+        try:
+            return key_indices[usage_key]
+        except KeyError:
+            key_indices[usage_key] = index = len(usage_keys)
+            usage_keys.append(usage_key)
+            return index
+
+    # Intern the keys of all blocks with relations first, so that they
+    # are numbered densely from 0 and relation_indices is the identity.
+    relation_items = list(block_relations.iteritems())
+    relation_indices = array(_INDEX_TYPECODE, (_intern(usage_key) for usage_key, __ in relation_items))
+    parents_offsets, parents = array(_INDEX_TYPECODE, [0]), array(_INDEX_TYPECODE)
+    children_offsets, children = array(_INDEX_TYPECODE, [0]), array(_INDEX_TYPECODE)
+    for __, relations in relation_items:
+        parents.extend(_intern(parent) for parent in relations.parents)
+        parents_offsets.append(len(parents))
+        children.extend(_intern(child) for child in relations.children)
+        children_offsets.append(len(children))
+
+    block_data_indices = array(_INDEX_TYPECODE)
+    xblock_field_columns = {}
+    transformer_block_columns = {}
+    for usage_key, block_data in block_data_map.iteritems():
+        index = _intern(usage_key)
+        block_data_indices.append(index)
+        _add_to_columns(xblock_field_columns, index, block_data.fields)
+
+        for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+            transformer_indices, transformer_columns = transformer_block_columns.setdefault(
+                transformer_name, (array(_INDEX_TYPECODE), {}),
+            )
+            transformer_indices.append(index)
+            _add_to_columns(transformer_columns, index, transformer_block_data.fields)
+
+    payload = (
+        usage_keys,
+        (relation_indices, parents_offsets, parents, children_offsets, children),
+        {name: data.fields for name, data in transformer_data.iteritems()},
+        block_data_indices,
+        xblock_field_columns,
+    )
+    sections = {name: zpickle(columns) for name, columns in transformer_block_columns.iteritems()}
+    return _compact_header(sorted(sections)) + zpickle(payload), sections
+
+
+def deserialize(serialized_data, sections=None, indexed=False):
+    """
+    Deserializes the given data, serialized either in the compact
+    format or in the older zlib-pickle format.
+
+    Arguments:
+        serialized_data (bytes) - The data to deserialize.
+
+        sections (dict {string: bytes}) - The sections of the
+            transformers whose block-level data is to be deserialized,
+            as returned by serialize. Block-level data of transformers
+            without a given section is not loaded. Ignored for data in
+            the older format, which always includes all the data.
+
+        indexed (bool) - Whether to return the block relations as an
+            _IndexedBlockRelations rather than a _BlockRelationsMap.
+
+    Returns:
+        tuple (block_relations, transformer_data, block_data_map) - See
+            the arguments to serialize.
+
+    Raises:
+        SerializedDataIncompatible if the data was serialized with an
+            unknown version of the compact format.
+    """
+    if not is_compact(serialized_data):
+        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+        if indexed:
+            block_relations = _IndexedBlockRelations.from_relations(block_relations)
+        return block_relations, transformer_data, block_data_map
+
+    __, payload_start = _parse_compact_header(serialized_data)
+    (
+        usage_keys,
+        (relation_indices, parents_offsets, parents, children_offsets, children),
+        transformer_fields,
+        block_data_indices,
+        xblock_field_columns,
+    ) = zunpickle(serialized_data[payload_start:])
+
+    num_relations = len(relation_indices)
+    if indexed and relation_indices == array(_INDEX_TYPECODE, xrange(num_relations)):
+        # The relations are already laid out as needed by
+        # _IndexedBlockRelations, so the arrays can be used as-is.
+        block_relations = _IndexedBlockRelations(
+            usage_keys[:num_relations], parents_offsets, parents, children_offsets, children,
+        )
+    else:
+        block_relations = _BlockRelationsMap()
+        for position, index in enumerate(relation_indices):
+            relations = _BlockRelations()
+            relations.parents = [
+                usage_keys[parent] for parent in parents[parents_offsets[position]:parents_offsets[position + 1]]
+            ]
+            relations.children = [
+                usage_keys[child] for child in children[children_offsets[position]:children_offsets[position + 1]]
+            ]
+            block_relations[usage_keys[index]] = relations
+        if indexed:
+            block_relations = _IndexedBlockRelations.from_relations(block_relations)
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, fields in transformer_fields.iteritems():
+        dict.__setitem__(transformer_data, transformer_name, _transformer_data(fields))
+
+    block_data_by_index = {index: BlockData(usage_keys[index]) for index in block_data_indices}
+    for field_name, (indices, values) in xblock_field_columns.iteritems():
+        for index, value in zip(indices, values):
+            block_data_by_index[index].fields[field_name] = value
+
+    for transformer_name, section in (sections or {}).iteritems():
+        transformer_indices, columns = zunpickle(section)
+        transformer_data_by_index = {}
+        for index in transformer_indices:
+            transformer_data_by_index[index] = transformer_block_data = TransformerData()
+            dict.__setitem__(block_data_by_index[index].transformer_data, transformer_name, transformer_block_data)
+        for field_name, (indices, values) in columns.iteritems():
+            for index, value in zip(indices, values):
+                transformer_data_by_index[index].fields[field_name] = value
+
+    block_data_map = {usage_keys[index]: block_data for index, block_data in block_data_by_index.iteritems()}
+    return block_relations, transformer_data, block_data_map
+
+
+def get_section_names(serialized_data):
+    """
+    Returns the names of the sections of the given serialized data,
+    without decoding the rest of the data.
+
+    Raises:
+        SerializedDataIncompatible if the data was serialized with an
+            unknown version of the compact format.
+    """
+    if not is_compact(serialized_data):
+        return []
+    section_names, __ = _parse_compact_header(serialized_data)
+    return section_names
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given data was serialized in the compact format,
+    of any version.
+    """
+    return serialized_data.startswith(COMPACT_FORMAT_PREFIX)
+
+
+def serialize_as_pickle(block_relations, transformer_data, block_data_map):
+    """
+    Returns the (older) zlib-pickle serialization of the given block
+    structure data. See serialize for the arguments and return value;
+    data in this format has no sections.
+    """
+    # Always pickle the relations as a plain dict of _BlockRelations, as
+    # expected by readers of this format.
+    block_relations = {usage_key: relations for usage_key, relations in block_relations.iteritems()}
+    return zpickle((block_relations, transformer_data, block_data_map)), {}
+
+
+def pack(serialized_data, sections):
+    """
+    Returns a single container of the given serialized data and its
+    sections, with an index so that each section is separately
+    addressable within the container.
+
+    Data without sections is returned as-is.
+    """
+    if not sections:
+        return serialized_data
+
+    index = [(name, len(section)) for name, section in sections.iteritems()]
+    index_data = pickle.dumps((len(serialized_data), index), pickle.HIGHEST_PROTOCOL)
+    return b''.join(
+        [CONTAINER_PREFIX, struct.pack(_LENGTH_FORMAT, len(index_data)), index_data, serialized_data] +
+        [sections[name] for name, __ in index]
+    )
+
+
+def unpack(packed_data, section_filter=None):
+    """
+    Returns the serialized data and the sections in the given container,
+    as packed by pack.
+
+    Arguments:
+        packed_data (bytes) - The container, or serialized data without
+            sections.
+
+        section_filter ((string) -> bool) - Function that returns
+            whether the section with the given name is to be returned.
+            If None, all sections are returned.
+
+    Returns:
+        tuple (bytes, dict {string: bytes})
+    """
+    if not packed_data.startswith(CONTAINER_PREFIX):
+        return packed_data, {}
+
+    index_start = len(CONTAINER_PREFIX) + _LENGTH_SIZE
+    index_length, = struct.unpack(_LENGTH_FORMAT, packed_data[len(CONTAINER_PREFIX):index_start])
+    data_length, index = pickle.loads(packed_data[index_start:index_start + index_length])
+
+    offset = index_start + index_length
+    serialized_data = packed_data[offset:offset + data_length]
+    offset += data_length
+
+    sections = {}
+    for name, length in index:
+        if section_filter is None or section_filter(name):
+            sections[name] = packed_data[offset:offset + length]
+        offset += length
+    return serialized_data, sections
+
+
+def _compact_header(section_names):
+    """
+    Returns the header prefixed to data serialized in the compact format.
+    """
+    names_data = pickle.dumps(section_names, pickle.HIGHEST_PROTOCOL)
+    return b''.join([
+        COMPACT_FORMAT_PREFIX,
+        chr(COMPACT_FORMAT_VERSION),
+        struct.pack(_LENGTH_FORMAT, len(names_data)),
+        names_data,
+    ])
+
+
+def _parse_compact_header(serialized_data):
+    """
+    Returns the section names listed in the header of the given data,
+    serialized in the compact format, and the position of its payload.
+
+    Raises:
+        SerializedDataIncompatible if the data was serialized with an
+            unknown version of the compact format.
+    """
+    version_position = len(COMPACT_FORMAT_PREFIX)
+    format_version = ord(serialized_data[version_position])
+    if format_version != COMPACT_FORMAT_VERSION:
+        raise SerializedDataIncompatible(
+            'Unsupported block structure serialization format version {}; expected {}.'.format(
+                format_version, COMPACT_FORMAT_VERSION,
+            )
+        )
+
+    names_start = version_position + 1 + _LENGTH_SIZE
+    names_length, = struct.unpack(_LENGTH_FORMAT, serialized_data[version_position + 1:names_start])
+    payload_start = names_start + names_length
+    return pickle.loads(serialized_data[names_start:payload_start]), payload_start
+
+
+def _add_to_columns(columns, index, fields):
+    """
+    Appends the given fields of the block at the given index to the
+    given column-wise map of field name to (block indices, values).
+    """
+    for field_name, value in fields.iteritems():
+        indices, values = columns.setdefault(field_name, (array(_INDEX_TYPECODE), []))
+        indices.append(index)
+        values.append(value)
+
+
+def _transformer_data(fields):
+    """
+    Returns a new TransformerData with the given fields.
+    """
+    transformer_data = TransformerData()
+    transformer_data.fields = fields
+    return transformer_data
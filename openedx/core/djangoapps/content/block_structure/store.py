@@ -4,11 +4,9 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 from logging import getLogger
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
-
-from . import config
+from . import config, serializer
 from .block_structure import BlockStructureBlockData
-from .exceptions import BlockStructureNotFound
+from .exceptions import BlockStructureNotFound, SerializedDataIncompatible
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
 from .transformer_registry import TransformerRegistry
@@ -61,12 +59,12 @@ class BlockStructureStore(object):
             block_structure (BlockStructure) - The block structure
                 that is to be cached and stored.
         """
-        serialized_data = self._serialize(block_structure)
+        serialized_data, sections = self._serialize(block_structure)
 
-        bs_model = self._update_or_create_model(block_structure, serialized_data)
-        self._add_to_cache(serialized_data, bs_model)
+        bs_model = self._update_or_create_model(block_structure, serializer.pack(serialized_data, sections))
+        self._add_to_cache(serialized_data, sections, bs_model)
 
-    def get(self, root_block_usage_key):
+    def get(self, root_block_usage_key, transformer_names=None):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key, if found in the cache or storage.
@@ -79,6 +77,13 @@ class BlockStructureStore(object):
                 root of the block structure that is to be retrieved
                 from the store.
 
+            transformer_names (set of strings) - The names of the
+                transformers whose collected block-level data is to be
+                loaded. Block-level data of other transformers is
+                neither fetched from the cache nor deserialized, when
+                the data was serialized in the compact format. If None,
+                data of all transformers is loaded.
+
         Returns:
             BlockStructure - The deserialized block structure starting
             at root_block_usage_key, if found.
@@ -88,14 +93,16 @@ class BlockStructureStore(object):
             found.
         """
         bs_model = self._get_model(root_block_usage_key)
+        section_filter = _section_filter(transformer_names)
 
         try:
-            serialized_data = self._get_from_cache(bs_model)
+            serialized_data, sections = self._get_from_cache(bs_model, section_filter)
         except BlockStructureNotFound:
-            serialized_data = self._get_from_store(bs_model)
-            self._add_to_cache(serialized_data, bs_model)
+            serialized_data, sections = self._get_from_store(bs_model)
+            self._add_to_cache(serialized_data, sections, bs_model)
+            sections = {name: section for name, section in sections.iteritems() if section_filter(name)}
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        return self._deserialize(serialized_data, sections, root_block_usage_key)
 
     def delete(self, root_block_usage_key):
         """
@@ -107,7 +114,17 @@ class BlockStructureStore(object):
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
-        self._cache.delete(self._encode_root_cache_key(bs_model))
+        cache_key = self._encode_root_cache_key(bs_model)
+        section_names = []
+        serialized_data = self._cache.get(cache_key)
+        if serialized_data:
+            try:
+                section_names = serializer.get_section_names(serialized_data)
+            except SerializedDataIncompatible:
+                pass
+        self._cache.delete_many(
+            [cache_key] + [self._encode_section_cache_key(cache_key, name) for name in section_names]
+        )
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -126,6 +143,29 @@ class BlockStructureStore(object):
 
         return False
 
+    def get_content_version(self, root_block_usage_key):
+        """
+        Returns the version of the content of the block structure in
+        storage for the given key, without reading its data.
+
+        Returns None if storage backing is disabled, if the block structure
+        is not found or if it was not collected by the current schemas.
+        """
+        if not _is_storage_backing_enabled():
+            return None
+
+        try:
+            bs_model = self._get_model(root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
+        if (
+                bs_model.transformers_schema_version != TransformerRegistry.get_write_version_hash() or
+                bs_model.block_structure_schema_version != unicode(BlockStructureBlockData.VERSION)
+        ):
+            return None
+        return bs_model.data_version or None
+
     def _get_model(self, root_block_usage_key):
         """
         Returns the model associated with the given key.
@@ -151,19 +191,39 @@ class BlockStructureStore(object):
         else:
             return StubModel(block_structure.root_block_usage_key)
 
-    def _add_to_cache(self, serialized_data, bs_model):
+    def _add_to_cache(self, serialized_data, sections, bs_model):
         """
-        Adds the given serialized_data for the given BlockStructureModel
-        to the cache.
+        Adds the given serialized_data and its sections for the given
+        BlockStructureModel to the cache.
+
+        Each section is cached under its own key, so that it can be
+        fetched independently of the others. The sections are cached
+        before the serialized data that lists them, so a reader that
+        finds the serialized data also finds its sections.
         """
         cache_key = self._encode_root_cache_key(bs_model)
-        self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
-        logger.info("BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
+        timeout = config.cache_timeout_in_seconds()
+        if sections:
+            self._cache.set_many(
+                {
+                    self._encode_section_cache_key(cache_key, name): section
+                    for name, section in sections.iteritems()
+                },
+                timeout=timeout,
+            )
+        self._cache.set(cache_key, serialized_data, timeout=timeout)
+        logger.info(
+            "BlockStructure: Added to cache; %s, size: %d, sections size: %d",
+            bs_model,
+            len(serialized_data),
+            sum(len(section) for section in sections.itervalues()),
+        )
 
-    def _get_from_cache(self, bs_model):
+    def _get_from_cache(self, bs_model, section_filter):
         """
         Returns the serialized data for the given BlockStructureModel
-        from the cache.
+        from the cache, along with those of its sections that pass the
+        given section_filter.
         Raises:
              BlockStructureNotFound if not found.
         """
@@ -173,21 +233,42 @@ class BlockStructureStore(object):
         if not serialized_data:
             logger.info("BlockStructure: Not found in cache; %s.", bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)
-        else:
-            logger.info("BlockStructure: Read from cache; %s, size: %d", bs_model, len(serialized_data))
-        return serialized_data
+
+        try:
+            section_names = serializer.get_section_names(serialized_data)
+        except SerializedDataIncompatible as error:
+            logger.info("BlockStructure: %s; %s.", error, bs_model)
+            raise BlockStructureNotFound(bs_model.data_usage_key)
+
+        section_keys = {
+            self._encode_section_cache_key(cache_key, name): name
+            for name in section_names if section_filter(name)
+        }
+        cached_sections = self._cache.get_many(section_keys.keys()) if section_keys else {}
+        if len(cached_sections) != len(section_keys):
+            logger.info("BlockStructure: Sections not found in cache; %s.", bs_model)
+            raise BlockStructureNotFound(bs_model.data_usage_key)
+
+        sections = {section_keys[key]: section for key, section in cached_sections.iteritems()}
+        logger.info(
+            "BlockStructure: Read from cache; %s, size: %d, sections size: %d",
+            bs_model,
+            len(serialized_data),
+            sum(len(section) for section in sections.itervalues()),
+        )
+        return serialized_data, sections
 
     def _get_from_store(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
-        from storage.
+        from storage, along with all of its sections.
         Raises:
              BlockStructureNotFound if not found.
         """
         if not _is_storage_backing_enabled():
             raise BlockStructureNotFound(bs_model.data_usage_key)
 
-        return bs_model.get_serialized_data()
+        return serializer.unpack(bs_model.get_serialized_data())
 
     def _serialize(self, block_structure):
         """
@@ -198,13 +279,28 @@ class BlockStructureStore(object):
             block_structure.transformer_data,
             block_structure._block_data_map,
         )
-        return zpickle(data_to_cache)
+        if config.waffle().is_enabled(config.COMPACT_SERIALIZATION):
+            return serializer.serialize(*data_to_cache)
+        return serializer.serialize_as_pickle(*data_to_cache)
 
-    def _deserialize(self, serialized_data, root_block_usage_key):
+    def _deserialize(self, serialized_data, sections, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Raises:
+            BlockStructureNotFound if the data was serialized in a
+            format that can no longer be read.
         """
-        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+        try:
+            block_relations, transformer_data, block_data_map = serializer.deserialize(
+                serialized_data,
+                sections=sections,
+                indexed=config.waffle().is_enabled(config.INDEXED_BLOCK_RELATIONS),
+            )
+        except SerializedDataIncompatible as error:
+            logger.info("BlockStructure: %s; %s.", error, unicode(root_block_usage_key))
+            raise BlockStructureNotFound(root_block_usage_key)
+
         return BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
@@ -227,6 +323,17 @@ class BlockStructureStore(object):
                 root_usage_key=unicode(bs_model.data_usage_key),
             )
 
+    @staticmethod
+    def _encode_section_cache_key(root_cache_key, section_name):
+        """
+        Returns the cache key to use for the section with the given
+        name of the data cached at the given root_cache_key.
+        """
+        return u"{root_cache_key}.section.{section_name}".format(
+            root_cache_key=root_cache_key,
+            section_name=section_name,
+        )
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
@@ -251,6 +358,22 @@ class BlockStructureStore(object):
         }
 
 
+def _section_filter(transformer_names):
+    """
+    Returns a function that returns whether the section with the given
+    name is needed to load the data of the given transformers.
+
+    The sections of nested transformers (named with the name of their
+    outer transformer followed by a ':') are loaded along with the
+    outer transformer.
+    """
+    if transformer_names is None:
+        return lambda section_name: True
+
+    prefixes = tuple(name + ':' for name in transformer_names)
+    return lambda section_name: section_name in transformer_names or section_name.startswith(prefixes)
+
+
 def _is_storage_backing_enabled():
     """
     Returns whether storage backing for Block Structures is enabled.
@@ -100,6 +100,16 @@ class MockModulestore(object):
             raise ItemNotFoundError
         return item
 
+    def get_block_versions(self, course_key):  # pylint: disable=unused-argument
+        """
+        Returns the version, from the update_version field, and the
+        children of each of the mock XBlocks.
+        """
+        return {
+            block_key: (block.field_map.get('update_version'), block.children)
+            for block_key, block in self.blocks.iteritems()
+        }
+
     @contextmanager
     def bulk_operations(self, ignore):  # pylint: disable=unused-argument
         """
@@ -140,6 +150,28 @@ class MockCache(object):
         """
         del self.map[key]
 
+    def set_many(self, data, timeout):
+        """
+        Associates each of the keys in the given map with its value in
+        the cache.
+        """
+        self.map.update(data)
+        self.timeout_from_last_call = timeout
+
+    def get_many(self, keys):
+        """
+        Returns a map of those of the given keys that are found in the
+        cache to their values.
+        """
+        return {key: self.map[key] for key in keys if key in self.map}
+
+    def delete_many(self, keys):
+        """
+        Deletes those of the given keys that are found in the cache.
+        """
+        for key in keys:
+            self.map.pop(key, None)
+
 
 class MockModulestoreFactory(object):
     """
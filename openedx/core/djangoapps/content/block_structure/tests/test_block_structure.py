@@ -23,13 +23,21 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
     Tests for BlockStructure
     """
     @ddt.data(
-        [],
-        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
-        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
-        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+        *itertools.product(
+            [True, False],
+            [
+                [],
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+        )
     )
-    def test_relations(self, children_map):
+    @ddt.unpack
+    def test_relations(self, indexed, children_map):
         block_structure = self.create_block_structure(children_map, BlockStructure)
+        if indexed:
+            block_structure._index_relations()
 
         # get_children
         for parent, children in enumerate(children_map):
@@ -44,6 +52,29 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             self.assertIn(node, block_structure)
         self.assertNotIn(len(children_map) + 1, block_structure)
 
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_indexed_traversals(self, children_map):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        indexed_block_structure = self.create_block_structure(children_map, BlockStructure)
+        indexed_block_structure._index_relations()
+
+        self.assertEqual(
+            list(block_structure.topological_traversal()),
+            list(indexed_block_structure.topological_traversal()),
+        )
+        self.assertEqual(
+            list(block_structure.post_order_traversal()),
+            list(indexed_block_structure.post_order_traversal()),
+        )
+        self.assertEqual(
+            list(block_structure.topological_traversal(filter_func=lambda block: block != 1)),
+            list(indexed_block_structure.topological_traversal(filter_func=lambda block: block != 1)),
+        )
+
 
 @attr(shard=2)
 @ddt.ddt
@@ -165,16 +196,19 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
                 ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
                 ChildrenMapTestMixin.DAG_CHILDREN_MAP,
             ],
+            [True, False],
         )
     )
     @ddt.unpack
-    def test_remove_block(self, keep_descendants, block_to_remove, children_map):
+    def test_remove_block(self, keep_descendants, block_to_remove, children_map, indexed):
         ### skip test if invalid
         if (block_to_remove >= len(children_map)) or (keep_descendants and block_to_remove == 0):
             return
 
         ### create structure
         block_structure = self.create_block_structure(children_map)
+        if indexed:
+            block_structure._index_relations()
         parents_map = self.get_parents_map(children_map)
 
         ### verify blocks pre-exist
@@ -219,12 +253,16 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
 
         self.assert_block_structure(block_structure, pruned_children_map, missing_blocks)
 
-    def test_remove_block_traversal(self):
+    @ddt.data(True, False)
+    def test_remove_block_traversal(self, indexed):
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        if indexed:
+            block_structure._index_relations()
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
-    def test_copy(self):
+    @ddt.data(True, False)
+    def test_copy(self, indexed):
         def _set_value(structure, value):
             """
             Sets a test transformer block field to the given value in the given structure.
@@ -239,6 +277,8 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
 
         # create block structure and verify blocks pre-exist
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        if indexed:
+            block_structure._index_relations()
         self.assert_block_structure(block_structure, [[1], [2], [3], []])
         _set_value(block_structure, 'original_value')
 
@@ -268,3 +308,28 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEquals(_get_value(block_structure), 'edit1')
         self.assertEquals(_get_value(new_copy), 'edit2')
+
+    def test_copy_on_write(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', 'original_value')
+
+        # unchanged blocks are shared by the copies
+        new_copy = block_structure.copy()
+        for block in block_structure:
+            self.assertIs(block_structure[block], new_copy[block])
+
+        # only updated blocks are copied
+        new_copy.set_transformer_block_field(1, 'transformer', 'test_key', 'edit1')
+        new_copy.remove_transformer_block_field(2, 'transformer', 'test_key')
+        self.assertIs(block_structure[0], new_copy[0])
+        self.assertIsNot(block_structure[1], new_copy[1])
+        self.assertIsNot(block_structure[2], new_copy[2])
+        self.assertEquals(block_structure.get_transformer_block_field(1, 'transformer', 'test_key'), 'original_value')
+        self.assertEquals(block_structure.get_transformer_block_field(2, 'transformer', 'test_key'), 'original_value')
+        self.assertEquals(new_copy.get_transformer_block_field(1, 'transformer', 'test_key'), 'edit1')
+        self.assertIsNone(new_copy.get_transformer_block_field(2, 'transformer', 'test_key'))
+
+        # the original no longer owns the blocks shared with the copy
+        block_structure.set_transformer_block_field(0, 'transformer', 'test_key', 'edit2')
+        self.assertEquals(new_copy.get_transformer_block_field(0, 'transformer', 'test_key'), 'original_value')
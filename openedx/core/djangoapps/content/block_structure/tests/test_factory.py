@@ -5,6 +5,7 @@ from django.test import TestCase
 from nose.plugins.attrib import attr
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
+from ..block_structure import BlockStructureBlockData
 from ..store import BlockStructureStore
 from ..exceptions import BlockStructureNotFound
 from ..factory import BlockStructureFactory
@@ -36,6 +37,17 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
                 modulestore=self.modulestore,
             )
 
+    def test_from_modulestore_incrementally_dangling_child(self):
+        self.modulestore.blocks[1].children.append(len(self.children_map) + 1)
+        block_structure = BlockStructureFactory.create_from_modulestore_incrementally(
+            root_block_usage_key=0,
+            modulestore=self.modulestore,
+            block_versions=self.modulestore.get_block_versions(course_key=None),
+            previous_block_structure=BlockStructureBlockData(root_block_usage_key=0),
+        )
+        self.assert_block_structure(block_structure, self.children_map)
+        self.assertNotIn(len(self.children_map) + 1, block_structure)
+
     def test_from_cache(self):
         store = BlockStructureStore(MockCache())
         block_structure = self.create_block_structure(self.children_map)
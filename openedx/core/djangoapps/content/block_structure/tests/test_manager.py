@@ -1,14 +1,24 @@
 """
 Tests for manager.py
 """
+import itertools
+
 import ddt
 from django.test import TestCase
+from mock import patch
 from nose.plugins.attrib import attr
 
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import (
+    COMPACT_SERIALIZATION,
+    INCREMENTAL_COLLECT,
+    MEMOIZE_USER_INDEPENDENT_TRANSFORMS,
+    RAISE_ERROR_WHEN_NOT_FOUND,
+    STORAGE_BACKING_FOR_CACHE,
+    waffle,
+)
 from ..exceptions import UsageKeyNotInBlockStructure, BlockStructureNotFound
-from ..manager import BlockStructureManager
+from ..manager import _MEMOIZED_TRANSFORMS, BlockStructureManager
 from ..transformers import BlockStructureTransformers
 from .helpers import (
     MockModulestoreFactory, MockCache, MockTransformer,
@@ -89,6 +99,51 @@ class TestTransformer1(MockTransformer):
         return data_key + 't1.val1.' + unicode(block_key)
 
 
+class UserIndependentTransformer(TestTransformer1):
+    """
+    Test Transformer class that declares itself user-independent and
+    counts the calls to its transform method.
+    """
+    USER_INDEPENDENT = True
+    transform_call_count = 0
+
+    def transform(self, usage_info, block_structure):
+        super(UserIndependentTransformer, self).transform(usage_info, block_structure)
+        UserIndependentTransformer.transform_call_count += 1
+
+
+class IncrementalTransformer(TestTransformer1):
+    """
+    Test Transformer class that supports incremental collects and
+    records the blocks it collects data for.
+    """
+    SUPPORTS_INCREMENTAL_COLLECT = True
+    collected_blocks = []
+
+    @classmethod
+    def collect(cls, block_structure):
+        super(IncrementalTransformer, cls).collect(block_structure)
+        cls.collected_blocks = list(block_structure.topological_traversal())
+
+
+class BatchTransformer(TestTransformer1):
+    """
+    Test Transformer class that records the usage_infos it is prepared
+    and called with.
+    """
+    def __init__(self):
+        super(BatchTransformer, self).__init__()
+        self.prepared_usage_infos = []
+        self.transformed_usage_infos = []
+
+    def prepare_batch(self, usage_infos, block_structure):
+        self.prepared_usage_infos.append(sorted(usage_infos))
+
+    def transform(self, usage_info, block_structure):
+        super(BatchTransformer, self).transform(usage_info, block_structure)
+        self.transformed_usage_infos.append(usage_info)
+
+
 @attr(shard=2)
 @ddt.ddt
 class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
@@ -132,6 +187,73 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
+    def test_get_transformed_without_all_transformer_data(self):
+        with mock_registered_transformers(self.registered_transformers):
+            with waffle().override(COMPACT_SERIALIZATION, active=True):
+                self.bs_manager.get_collected()
+                block_structure = self.bs_manager.get_transformed(
+                    self.transformers,
+                    load_all_transformer_data=False,
+                )
+        self.assert_block_structure(block_structure, self.children_map)
+        TestTransformer1.assert_collected(block_structure)
+        TestTransformer1.assert_transformed(block_structure)
+        self.assertEquals(TestTransformer1.collect_call_count, 1)
+
+    @ddt.data(*itertools.product([True, False], repeat=2))
+    @ddt.unpack
+    def test_get_transformed_memoized(self, memoize, with_storage_backing):
+        UserIndependentTransformer.transform_call_count = 0
+        _MEMOIZED_TRANSFORMS.clear()
+        self.addCleanup(_MEMOIZED_TRANSFORMS.clear)
+        self.modulestore.blocks[self.block_key_factory(0)].field_map['course_version'] = 'version1'
+        self.registered_transformers = [UserIndependentTransformer()]
+        with mock_registered_transformers(self.registered_transformers):
+            transformers = BlockStructureTransformers(self.registered_transformers)
+            with waffle().override(MEMOIZE_USER_INDEPENDENT_TRANSFORMS, active=memoize), \
+                    waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing), \
+                    patch.object(self.bs_manager, 'get_collected', wraps=self.bs_manager.get_collected) as get_collected:
+                for __ in range(2):
+                    block_structure = self.bs_manager.get_transformed(transformers)
+                    self.assert_block_structure(block_structure, self.children_map)
+                    UserIndependentTransformer.assert_transformed(block_structure)
+
+                # the stored block structure isn't even fetched when its
+                # version is known to be memoized
+                self.assertEquals(get_collected.call_count, 1 if memoize and with_storage_backing else 2)
+
+                # a new version of the content is transformed again
+                self.modulestore.blocks[self.block_key_factory(0)].field_map['course_version'] = 'version2'
+                self.bs_manager.clear()
+                self.bs_manager.get_transformed(transformers)
+
+        self.assertEquals(UserIndependentTransformer.transform_call_count, 2 if memoize else 3)
+
+    def test_get_transformed_batch(self):
+        UserIndependentTransformer.transform_call_count = 0
+        batch_transformer = BatchTransformer()
+        self.registered_transformers = [UserIndependentTransformer(), batch_transformer]
+        with mock_registered_transformers(self.registered_transformers):
+            transformers = BlockStructureTransformers(self.registered_transformers)
+            batch = self.bs_manager.get_transformed_batch(transformers, {'a': 'usage_a', 'b': 'usage_b'})
+
+            # nothing is done until a block structure is requested
+            self.assertEquals(batch_transformer.prepared_usage_infos, [])
+            self.assertEquals(self.cache.set_call_count, 0)
+
+            for key in ['b', 'a', 'b']:
+                block_structure = batch.get_transformed(key)
+                self.assert_block_structure(block_structure, self.children_map)
+                UserIndependentTransformer.assert_transformed(block_structure)
+
+            with self.assertRaises(KeyError):
+                batch.get_transformed('c')
+
+        self.assertEquals(self.cache.set_call_count, 1)
+        self.assertEquals(UserIndependentTransformer.transform_call_count, 1)
+        self.assertEquals(batch_transformer.prepared_usage_infos, [['usage_a', 'usage_b']])
+        self.assertEquals(batch_transformer.transformed_usage_infos, ['usage_b', 'usage_a', 'usage_b'])
+
     def test_get_transformed_with_starting_block(self):
         with mock_registered_transformers(self.registered_transformers):
             block_structure = self.bs_manager.get_transformed(
@@ -191,6 +313,39 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
 
                 self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
 
+    @ddt.data(True, False)
+    def test_update_collected_incrementally(self, incremental):
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.modulestore = MockModulestoreFactory.create(self.children_map, self.block_key_factory)
+        self.bs_manager = BlockStructureManager(self.block_key_factory(0), self.modulestore, self.cache)
+        for block in self.modulestore.blocks.itervalues():
+            block.field_map['update_version'] = 'version1'
+        self.registered_transformers = [IncrementalTransformer()]
+
+        with waffle().override(INCREMENTAL_COLLECT, active=incremental):
+            with mock_registered_transformers(self.registered_transformers):
+                # the first collect is never incremental
+                self.bs_manager.get_collected()
+                self.assertEquals(len(IncrementalTransformer.collected_blocks), 7)
+
+                # block 4 changed, affecting only itself and its ancestors
+                self.modulestore.blocks[self.block_key_factory(4)].field_map['update_version'] = 'version2'
+                self.modulestore.get_items_call_count = 0
+                self.bs_manager._update_collected()  # pylint: disable=protected-access
+                block_structure = self.bs_manager.get_collected()
+
+        expected_collected_blocks = [0, 2, 4] if incremental else range(7)
+        self.assertEquals(
+            set(IncrementalTransformer.collected_blocks),
+            {self.block_key_factory(block) for block in expected_collected_blocks},
+        )
+        if incremental:
+            # only the xBlocks of the affected blocks are loaded
+            self.assertEquals(self.modulestore.get_items_call_count, 3)
+        self.assert_block_structure(block_structure, self.children_map)
+        IncrementalTransformer.assert_collected(block_structure)
+        self.assertEquals(block_structure.get_xblock_field(self.block_key_factory(4), 'update_version'), 'version2')
+
     def test_get_collected_transformer_version(self):
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
 
@@ -0,0 +1,190 @@
+"""
+Tests for serializer.py
+"""
+# pylint: disable=protected-access
+import unittest
+
+import ddt
+from django.test import TestCase
+from nose.plugins.attrib import attr
+from nose.plugins.skip import SkipTest
+
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import SampleCourseFactory, ToyCourseFactory
+
+from .. import serializer
+from ..api import get_course_in_cache
+from ..exceptions import SerializedDataIncompatible
+from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockTransformer
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact block structure serialization.
+    """
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map, with
+        mock xBlock fields and transformer data collected for it.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        block_structure.set_transformer_data(MockTransformer, 'course_level', ['some', 'data'])
+        for block_key in range(len(children_map)):
+            usage_key = self.block_key_factory(block_key)
+            block_data = block_structure._get_or_create_block(usage_key)
+            block_data.display_name = 'Block {}'.format(block_key)
+            if block_key % 2:
+                block_data.graded = True
+                block_structure.set_transformer_block_field(usage_key, MockTransformer, 'odd', block_key)
+        return block_structure
+
+    def round_trip(self, block_structure, serialize=serializer.serialize):
+        """
+        Serializes and deserializes the given block structure's data.
+        """
+        serialized_data, sections = serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        return serializer.deserialize(serialized_data, sections)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_structure(children_map)
+        block_relations, transformer_data, block_data_map = self.round_trip(block_structure)
+
+        self.assertEqual(set(block_relations), set(block_structure._block_relations))
+        for usage_key, relations in block_structure._block_relations.iteritems():
+            self.assertEqual(block_relations[usage_key].parents, relations.parents)
+            self.assertEqual(block_relations[usage_key].children, relations.children)
+
+        self.assertEqual(set(transformer_data), set(block_structure.transformer_data))
+        self.assertEqual(
+            transformer_data[MockTransformer].fields,
+            block_structure.transformer_data[MockTransformer].fields,
+        )
+
+        self.assertEqual(set(block_data_map), set(block_structure._block_data_map))
+        for usage_key, block_data in block_structure._block_data_map.iteritems():
+            self.assertEqual(block_data_map[usage_key].location, usage_key)
+            self.assertEqual(block_data_map[usage_key].fields, block_data.fields)
+            self.assertEqual(set(block_data_map[usage_key].transformer_data), set(block_data.transformer_data))
+            for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+                self.assertEqual(
+                    block_data_map[usage_key].transformer_data[transformer_name].fields,
+                    transformer_block_data.fields,
+                )
+
+    def test_is_compact(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        data = (block_structure._block_relations, block_structure.transformer_data, block_structure._block_data_map)
+        self.assertTrue(serializer.is_compact(serializer.serialize(*data)[0]))
+        self.assertFalse(serializer.is_compact(serializer.serialize_as_pickle(*data)[0]))
+
+    def test_partial_load(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data, sections = serializer.serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        self.assertEqual(serializer.get_section_names(serialized_data), [MockTransformer.name()])
+
+        __, transformer_data, block_data_map = serializer.deserialize(serialized_data)
+        # non-block-specific transformer data is always loaded
+        self.assertEqual(transformer_data[MockTransformer].fields['course_level'], ['some', 'data'])
+        for usage_key, block_data in block_structure._block_data_map.iteritems():
+            self.assertEqual(block_data_map[usage_key].fields, block_data.fields)
+            self.assertEqual(block_data_map[usage_key].transformer_data, {})
+
+        __, __, block_data_map = serializer.deserialize(serialized_data, sections)
+        self.assertEqual(block_data_map[self.block_key_factory(1)].transformer_data[MockTransformer].odd, 1)
+
+    @ddt.data(True, False)
+    def test_pack(self, with_sections):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data, sections = serializer.serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        if not with_sections:
+            sections = {}
+        packed_data = serializer.pack(serialized_data, sections)
+        self.assertEqual(serializer.unpack(packed_data), (serialized_data, sections))
+        self.assertEqual(serializer.unpack(packed_data, lambda name: False), (serialized_data, {}))
+
+    def test_pickle_fallback(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        block_relations, __, block_data_map = self.round_trip(
+            block_structure,
+            serialize=serializer.serialize_as_pickle,
+        )
+        self.assertEqual(set(block_relations), set(block_structure._block_relations))
+        self.assertEqual(set(block_data_map), set(block_structure._block_data_map))
+
+    def test_unknown_version(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data, __ = serializer.serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        prefix_length = len(serializer.COMPACT_FORMAT_PREFIX)
+        serialized_data = (
+            serialized_data[:prefix_length] +
+            chr(serializer.COMPACT_FORMAT_VERSION + 1) +
+            serialized_data[prefix_length + 1:]
+        )
+        with self.assertRaises(SerializedDataIncompatible):
+            serializer.deserialize(serialized_data)
+
+
+@ddt.ddt
+# Use this attribute to skip this test on regular unittest CI runs.
+@unittest.skip
+class SerializerBenchmark(ModuleStoreTestCase):
+    """
+    Compares the size and decode time of the compact serialization
+    with those of the zlib-pickle serialization, on collected block
+    structures of the test course fixtures.
+    """
+    perf_test = True
+    NUM_DECODES = 100
+
+    @ddt.data(SampleCourseFactory, ToyCourseFactory)
+    def test_benchmark(self, course_factory):
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        course = course_factory.create()
+        block_structure = get_course_in_cache(course.id)
+        data = (block_structure._block_relations, block_structure.transformer_data, block_structure._block_data_map)
+
+        for serialize in (serializer.serialize_as_pickle, serializer.serialize):
+            serialized_data, sections = serialize(*data)
+            desc = "SerializerDecode:{}:{}:{} blocks:{} bytes:{} decodes".format(
+                course_factory.__name__,
+                serialize.__name__,
+                len(block_structure),
+                len(serializer.pack(serialized_data, sections)),
+                self.NUM_DECODES,
+            )
+            with CodeBlockTimer(desc):
+                for _ in xrange(self.NUM_DECODES):
+                    serializer.deserialize(serialized_data, sections)
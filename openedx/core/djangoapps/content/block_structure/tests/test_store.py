@@ -1,12 +1,14 @@
 """
 Tests for block_structure/cache.py
 """
+import itertools
+
 import ddt
 from nose.plugins.attrib import attr
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import COMPACT_SERIALIZATION, INDEXED_BLOCK_RELATIONS, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
@@ -59,11 +61,73 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             self.assertIsNotNone(stored_value)
             self.assert_block_structure(stored_value, self.children_map)
 
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_add_and_get_compact_serialization(self, with_storage_backing, write_compact):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COMPACT_SERIALIZATION, active=write_compact):
+                self.store.add(self.block_structure)
+
+            # data is readable regardless of the switch's current value
+            with waffle().override(COMPACT_SERIALIZATION, active=not write_compact):
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                '{} val'.format(MockTransformer.name()),
+            )
+
     @ddt.data(True, False)
-    def test_delete(self, with_storage_backing):
+    def test_add_and_get_indexed(self, write_compact):
+        with waffle().override(COMPACT_SERIALIZATION, active=write_compact):
+            self.store.add(self.block_structure)
+        with waffle().override(INDEXED_BLOCK_RELATIONS, active=True):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_get_partial(self, with_storage_backing, clear_cache):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COMPACT_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
+            if clear_cache:
+                if not with_storage_backing:
+                    return
+                self.mock_cache.map.clear()
+
+            root_block_usage_key = self.block_structure.root_block_usage_key
+            stored_value = self.store.get(root_block_usage_key, transformer_names=set())
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertIsNone(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test')
+            )
+
+            stored_value = self.store.get(root_block_usage_key, transformer_names={MockTransformer.name()})
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                '{} val'.format(MockTransformer.name()),
+            )
+
+    def test_missing_section(self):
+        with waffle().override(COMPACT_SERIALIZATION, active=True):
             self.store.add(self.block_structure)
+        section_keys = [key for key in self.mock_cache.map if '.section.' in key]
+        self.assertEqual(len(section_keys), 1)
+        self.mock_cache.delete(section_keys[0])
+
+        # the structure can be read without the missing section, but not with it
+        self.store.get(self.block_structure.root_block_usage_key, transformer_names=set())
+        with self.assertRaises(BlockStructureNotFound):
+            self.store.get(self.block_structure.root_block_usage_key)
+
+    @ddt.data(True, False)
+    def test_delete(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COMPACT_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
             self.store.delete(self.block_structure.root_block_usage_key)
+            self.assertEqual(self.mock_cache.map, {})
             with self.assertRaises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
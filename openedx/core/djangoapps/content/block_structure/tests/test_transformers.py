@@ -54,6 +54,41 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
         self.assertEquals(self.transformers._transformers['no_filter'], [])  # pylint: disable=protected-access
         self.assertEquals(self.transformers._transformers['supports_filter'], [])  # pylint: disable=protected-access
 
+    def test_split_user_independent(self):
+        class UserIndependentTransformer(MockTransformer):
+            """
+            Mock transformer that declares itself user-independent.
+            """
+            USER_INDEPENDENT = True
+
+        class UserIndependentFilteringTransformer(MockFilteringTransformer):
+            """
+            Mock filtering transformer that declares itself user-independent.
+            """
+            USER_INDEPENDENT = True
+
+        leading, filtering, dependent, trailing = (
+            UserIndependentTransformer(),
+            UserIndependentFilteringTransformer(),
+            MockTransformer(),
+            UserIndependentTransformer(),
+        )
+        with mock_registered_transformers([leading, filtering, dependent, trailing]):
+            self.transformers += [leading, filtering, dependent, trailing]
+
+        user_independent, remaining = self.transformers.split_user_independent()
+        self.assertEquals(user_independent.get_transformers(), [filtering, leading])
+        self.assertEquals(remaining.get_transformers(), [dependent, trailing])
+        self.assertIs(remaining.usage_info, self.transformers.usage_info)
+
+        # user-dependent filters are applied before any transformers without filters
+        transformers = BlockStructureTransformers()
+        with mock_registered_transformers([leading, MockFilteringTransformer()]):
+            transformers += [leading, MockFilteringTransformer()]
+        user_independent, remaining = transformers.split_user_independent()
+        self.assertTrue(user_independent.is_empty())
+        self.assertEquals(len(remaining.get_transformers()), 2)
+
     def test_collect(self):
         with mock_registered_transformers(self.registered_transformers):
             with patch(
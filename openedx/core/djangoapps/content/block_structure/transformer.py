@@ -55,6 +55,30 @@ class BlockStructureTransformer(object):
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Whether the output of the transformer's transform method depends
+    # only on the block structure's collected data and on the
+    # transformer's configuration (see transform_cache_key) - and
+    # neither on the given usage_info nor on the current time.
+    #
+    # The block_structure framework may memoize the result of applying
+    # the user-independent transformers at the start of a collection of
+    # transformers, so it is computed once for all users rather than
+    # for each request.
+    USER_INDEPENDENT = False
+
+    # Whether the transformer's collect method supports being run
+    # incrementally, when only some of the blocks have changed since
+    # the data was previously collected.  During an incremental
+    # collect, the traversal methods of the block structure yield only
+    # the changed blocks, their ancestors and their descendants, while
+    # the previously collected data of all other blocks is kept as is.
+    #
+    # A transformer supports this if the data it collects for a block
+    # depends only on the block itself, its ancestors and its
+    # descendants - and its non-block-specific data only on the root
+    # block.
+    SUPPORTS_INCREMENTAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -70,6 +94,27 @@ class BlockStructureTransformer(object):
         """
         raise NotImplementedError
 
+    @classmethod
+    def transformer_data_dependencies(cls):
+        """
+        Returns the names of any other transformers whose collected
+        block-level data is read by this transformer's transform method.
+
+        When a block structure is transformed without loading the
+        collected data of all registered transformers, only the data of
+        the requested transformers and of their dependencies is loaded.
+        """
+        return set()
+
+    def transform_cache_key(self):
+        """
+        Returns a hashable value that identifies the output of this
+        user-independent transformer's transform method for a given
+        block structure. Transformers whose output depends on their
+        configuration should include that configuration in the value.
+        """
+        return (self.name(), self.READ_VERSION)
+
     @classmethod
     def collect(cls, block_structure):
         """
@@ -105,6 +150,25 @@ class BlockStructureTransformer(object):
         """
         pass
 
+    def prepare_batch(self, usage_infos, block_structure):
+        """
+        Called once before the transform method is called for each of
+        the given usage_infos, on copies of the given block_structure,
+        when block structures are transformed for a batch of users.
+
+        Transformers that access user-specific data in their transform
+        method can override this method to bulk-load that data for all
+        of the usage_infos at once, rather than one at a time.
+
+        Arguments:
+            usage_infos (list) - The usage_info objects for which the
+                block_structure is to be transformed.
+
+            block_structure (BlockStructureBlockData) - The block
+                structure to be transformed. It must not be mutated.
+        """
+        pass
+
     @abstractmethod
     def transform(self, usage_info, block_structure):
         """
@@ -11,6 +11,13 @@ from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# The xBlock fields of the root block that identify the version of its content.
+CONTENT_VERSION_FIELDS = ('course_version', 'subtree_edited_on')
+
+# The xBlock field that identifies the version of a block's content, in
+# modulestores that track the versions of individual blocks.
+BLOCK_VERSION_FIELD = 'update_version'
+
 
 class BlockStructureTransformers(object):
     """
@@ -64,17 +71,90 @@ class BlockStructureTransformers(object):
             )
 
         for transformer in transformers:
-            if isinstance(transformer, FilteringTransformerMixin):
-                self._transformers['supports_filter'].append(transformer)
-            else:
-                self._transformers['no_filter'].append(transformer)
+            self._add(transformer)
         return self
 
+    def _add(self, transformer):
+        """
+        Adds the given transformer to the collection, without verifying
+        its registration.
+        """
+        if isinstance(transformer, FilteringTransformerMixin):
+            self._transformers['supports_filter'].append(transformer)
+        else:
+            self._transformers['no_filter'].append(transformer)
+
+    def get_transformer_data_names(self):
+        """
+        Returns the names of the transformers whose collected block-level
+        data is needed to transform with the transformers in the collection.
+        """
+        names = set()
+        for transformer in self.get_transformers():
+            names.add(transformer.name())
+            names.update(transformer.transformer_data_dependencies())
+        return names
+
+    def split_user_independent(self):
+        """
+        Splits the collection into two collections, such that
+        transforming with the first and then with the second is
+        equivalent to transforming with this collection, and the first
+        contains only transformers that are USER_INDEPENDENT.
+
+        Since transformers with filters are applied before all others,
+        and are independent of each other, the user-independent ones
+        among them can always be applied first. Transformers without
+        filters are included only up to the first one that is not
+        user-independent, and only if all filters are included.
+
+        Returns:
+            tuple (BlockStructureTransformers, BlockStructureTransformers)
+        """
+        user_independent = BlockStructureTransformers(usage_info=self.usage_info)
+        remaining = BlockStructureTransformers(usage_info=self.usage_info)
+
+        for transformer in self._transformers['supports_filter']:
+            collection = user_independent if transformer.USER_INDEPENDENT else remaining
+            collection._add(transformer)  # pylint: disable=protected-access
+
+        for transformer in self._transformers['no_filter']:
+            collection = user_independent if transformer.USER_INDEPENDENT and remaining.is_empty() else remaining
+            collection._add(transformer)  # pylint: disable=protected-access
+
+        return user_independent, remaining
+
+    def is_empty(self):
+        """
+        Returns whether the collection has no transformers.
+        """
+        return not self.get_transformers()
+
+    def transform_cache_key(self):
+        """
+        Returns a hashable value that identifies the output of
+        transforming with the (user-independent) transformers in this
+        collection. See BlockStructureTransformer.transform_cache_key.
+        """
+        return tuple(transformer.transform_cache_key() for transformer in self.get_transformers())
+
+    def get_transformers(self):
+        """
+        Returns the transformers in the collection, in the order in
+        which they are applied.
+        """
+        return self._transformers['supports_filter'] + self._transformers['no_filter']
+
     @classmethod
     def collect(cls, block_structure):
         """
         Collects data for each registered transformer.
         """
+        # Collect the version of the content, which identifies the
+        # collected data for memoization of user-independent transforms,
+        # and the versions of the blocks, for incremental collects.
+        block_structure.request_xblock_fields(BLOCK_VERSION_FIELD, *CONTENT_VERSION_FIELDS)
+
         for transformer in TransformerRegistry.get_registered_transformers():
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
@@ -82,6 +162,28 @@ class BlockStructureTransformers(object):
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def supports_incremental_collect(cls):
+        """
+        Returns whether all registered transformers support collecting
+        their data incrementally.
+        """
+        return all(
+            transformer.SUPPORTS_INCREMENTAL_COLLECT
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
+    @classmethod
+    def is_collected_by_current_versions(cls, block_structure):
+        """
+        Returns whether the data in the block structure was collected by
+        the current versions of all registered transformers.
+        """
+        return all(
+            block_structure._get_transformer_data_version(transformer) == transformer.WRITE_VERSION  # pylint: disable=protected-access
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -105,6 +207,15 @@ class BlockStructureTransformers(object):
             )
         return True
 
+    def prepare_batch(self, usage_infos, block_structure):
+        """
+        Gives each transformer in the collection the opportunity to
+        bulk-load its data for all of the given usage_infos, before the
+        given block_structure is transformed for each of them.
+        """
+        for transformer in self.get_transformers():
+            transformer.prepare_batch(usage_infos, block_structure)
+
     def transform(self, block_structure):
         """
         The given block structure is transformed by each transformer in the
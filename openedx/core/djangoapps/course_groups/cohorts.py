@@ -159,6 +159,7 @@ def get_cohort_id(user, course_key, use_cached=False):
 
 
 COHORT_CACHE_NAMESPACE = u"cohorts.get_cohort"
+GROUP_INFO_CACHE_NAMESPACE = u"cohorts.get_group_info_for_cohort"
 
 
 def _cohort_cache_key(user_id, course_key):
@@ -168,24 +169,30 @@ def _cohort_cache_key(user_id, course_key):
     return u"{}.{}".format(user_id, course_key)
 
 
-def bulk_cache_cohorts(course_key, users):
+def bulk_cache_cohorts(course_key, users, assign=False):
     """
     Pre-fetches and caches the cohort assignments for the
     given users, for later fast retrieval by get_cohort.
+
+    If assign is True, the users who aren't in a cohort of a cohorted
+    course yet are assigned one, as get_cohort would, but in bulk.
     """
     # before populating the cache with another bulk set of data,
     # remove previously cached entries to keep memory usage low.
     clear_cache(COHORT_CACHE_NAMESPACE)
     cache = get_cache(COHORT_CACHE_NAMESPACE)
+    users = list(users)
 
     if is_course_cohorted(course_key):
         cohorts_by_user = {
-            membership.user: membership
+            membership.user: membership.course_user_group
             for membership in
-            CohortMembership.objects.filter(user__in=users, course_id=course_key).select_related('user')
+            CohortMembership.objects.filter(
+                user__in=users, course_id=course_key,
+            ).select_related('user', 'course_user_group')
         }
-        for user, membership in cohorts_by_user.iteritems():
-            cache[_cohort_cache_key(user.id, course_key)] = membership.course_user_group
+        for user, cohort in cohorts_by_user.iteritems():
+            cache[_cohort_cache_key(user.id, course_key)] = cohort
         uncohorted_users = filter(lambda u: u not in cohorts_by_user, users)
     else:
         uncohorted_users = users
@@ -193,6 +200,78 @@ def bulk_cache_cohorts(course_key, users):
     for user in uncohorted_users:
         cache[_cohort_cache_key(user.id, course_key)] = None
 
+    if assign:
+        bulk_assign_cohorts(course_key, uncohorted_users)
+
+
+def bulk_assign_cohorts(course_key, users):
+    """
+    Assigns those of the given users whose cohorts were cached by
+    bulk_cache_cohorts, and who aren't in a cohort of a cohorted course
+    yet, to one, as get_cohort would, but in bulk.  Other users are left
+    for get_cohort to assign.
+    """
+    cache = get_cache(COHORT_CACHE_NAMESPACE)
+    uncohorted_users = []
+    for user in users:
+        cache_key = _cohort_cache_key(user.id, course_key)
+        if cache_key in cache and cache[cache_key] is None:
+            uncohorted_users.append(user)
+    if not uncohorted_users or not is_course_cohorted(course_key):
+        return
+
+    for user, cohort in _bulk_assign_cohorts(course_key, uncohorted_users).iteritems():
+        cache[_cohort_cache_key(user.id, course_key)] = cohort
+
+
+def _bulk_assign_cohorts(course_key, users):
+    """
+    Assigns each of the given users, none of whom is in a cohort of the
+    course yet, to the cohort they were pre-registered in or else to a
+    random cohort, and returns a dict mapping the users to their cohorts.
+
+    The memberships are created with a query per cohort instead of a few
+    queries per user.  If another worker assigns one of the users
+    concurrently, every user is assigned by get_cohort instead.
+    """
+    users_by_email = {user.email: user for user in users}
+    cohorts_by_user = {}
+    pre_registrations = {}
+    for assignment in UnregisteredLearnerCohortAssignments.objects.filter(
+            email__in=users_by_email.keys(), course_id=course_key,
+    ).select_related('course_user_group'):
+        cohorts_by_user[users_by_email[assignment.email]] = assignment.course_user_group
+        pre_registrations[assignment.email] = assignment.id
+
+    try:
+        with transaction.atomic():
+            random_cohorts = None
+            users_by_cohort = {}
+            for user in users:
+                if user not in cohorts_by_user:
+                    if random_cohorts is None:
+                        random_cohorts = _get_random_cohorts(course_key)
+                    cohorts_by_user[user] = local_random().choice(random_cohorts)
+                users_by_cohort.setdefault(cohorts_by_user[user], []).append(user)
+
+            for cohort, cohort_users in users_by_cohort.iteritems():
+                cohort.users.add(*cohort_users)
+            CohortMembership.objects.bulk_create([
+                CohortMembership(user=user, course_user_group=cohort, course_id=course_key)
+                for user, cohort in cohorts_by_user.iteritems()
+            ])
+            if pre_registrations:
+                UnregisteredLearnerCohortAssignments.objects.filter(id__in=pre_registrations.values()).delete()
+    except IntegrityError as integrity_error:
+        log.info(
+            "HANDLING_INTEGRITY_ERROR: IntegrityError encountered while bulk assigning cohorts in course '%s': %s",
+            course_key, unicode(integrity_error)
+        )
+        return {user: get_cohort(user, course_key) for user in users}
+
+    log.info("Saved CohortMemberships for %d users in '%s'", len(cohorts_by_user), course_key)
+    return cohorts_by_user
+
 
 def get_cohort(user, course_key, assign=True, use_cached=False):
     """
@@ -280,17 +359,25 @@ def get_random_cohort(course_key):
     If there are multiple cohorts of type RANDOM in the course, one of them will be randomly selected.
     If there are no existing cohorts of type RANDOM in the course, one will be created.
     """
+    return local_random().choice(_get_random_cohorts(course_key))
+
+
+def _get_random_cohorts(course_key):
+    """
+    Returns the cohorts of type RANDOM in the course, creating the default
+    cohort if there are none.
+    """
     course = courses.get_course(course_key)
     cohorts = get_course_cohorts(course, assignment_type=CourseCohort.RANDOM)
-    if cohorts:
-        cohort = local_random().choice(cohorts)
-    else:
-        cohort = CourseCohort.create(
-            cohort_name=DEFAULT_COHORT_NAME,
-            course_id=course_key,
-            assignment_type=CourseCohort.RANDOM
-        ).course_user_group
-    return cohort
+    if not cohorts:
+        cohorts = [
+            CourseCohort.create(
+                cohort_name=DEFAULT_COHORT_NAME,
+                course_id=course_key,
+                assignment_type=CourseCohort.RANDOM
+            ).course_user_group
+        ]
+    return cohorts
 
 
 def migrate_cohort_settings(course):
@@ -514,7 +601,7 @@ def get_group_info_for_cohort(cohort, use_cached=False):
     use_cached=True to use the cached value instead of fetching from the
     database.
     """
-    cache = get_cache(u"cohorts.get_group_info_for_cohort")
+    cache = get_cache(GROUP_INFO_CACHE_NAMESPACE)
     cache_key = unicode(cohort.id)
 
     if use_cached and cache_key in cache:
@@ -531,6 +618,23 @@ def get_group_info_for_cohort(cohort, use_cached=False):
     return cache.setdefault(cache_key, (None, None))
 
 
+def bulk_cache_group_info_for_cohorts(course_key):
+    """
+    Pre-fetches and caches the partition group info of all the cohorts
+    in the course, for later fast retrieval by get_group_info_for_cohort.
+    """
+    cache = get_cache(GROUP_INFO_CACHE_NAMESPACE)
+    cohort_ids = list(CourseUserGroup.objects.filter(
+        course_id=course_key, group_type=CourseUserGroup.COHORT,
+    ).values_list('id', flat=True))
+    partition_groups = {
+        partition_group.course_user_group_id: (partition_group.group_id, partition_group.partition_id)
+        for partition_group in CourseUserGroupPartitionGroup.objects.filter(course_user_group_id__in=cohort_ids)
+    }
+    for cohort_id in cohort_ids:
+        cache[unicode(cohort_id)] = partition_groups.get(cohort_id, (None, None))
+
+
 def set_assignment_type(user_group, assignment_type):
     """
     Set assignment type for cohort.
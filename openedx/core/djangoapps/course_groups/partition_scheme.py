@@ -10,7 +10,13 @@ from courseware.masquerade import (  # pylint: disable=import-error
 )
 from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 
-from .cohorts import get_cohort, get_group_info_for_cohort
+from .cohorts import (
+    bulk_assign_cohorts,
+    bulk_cache_cohorts,
+    bulk_cache_group_info_for_cohorts,
+    get_cohort,
+    get_group_info_for_cohort
+)
 
 
 log = logging.getLogger(__name__)
@@ -91,6 +97,28 @@ class CohortPartitionScheme(object):
             # fail silently
             return None
 
+    @classmethod
+    def prefetch_groups_for_users(cls, course_key, users, user_partitions, assign=True):
+        """
+        Pre-fetches and caches the cohorts of the given users and the
+        partition groups of the course's cohorts, for later fast retrieval
+        by get_group_for_user.
+
+        If assign is True, the users who aren't in a cohort yet are
+        assigned one in bulk.
+        """
+        bulk_cache_cohorts(course_key, users, assign=assign)
+        bulk_cache_group_info_for_cohorts(course_key)
+
+    @classmethod
+    def assign_groups_for_users(cls, course_key, users, user_partitions):
+        """
+        Assigns those of the given users whose cohorts were pre-fetched by
+        prefetch_groups_for_users, and who aren't in a cohort yet, to one
+        in bulk.
+        """
+        bulk_assign_cohorts(course_key, users)
+
 
 def get_cohorted_user_partition(course):
     """
@@ -21,7 +21,7 @@ from xmodule.modulestore.tests.django_utils import TEST_DATA_MIXED_MODULESTORE,
 from xmodule.modulestore.tests.factories import ToyCourseFactory
 
 from .. import cohorts
-from ..models import CourseCohort, CourseUserGroup, CourseUserGroupPartitionGroup
+from ..models import CourseCohort, CourseUserGroup, CourseUserGroupPartitionGroup, UnregisteredLearnerCohortAssignments
 from ..tests.helpers import CohortFactory, CourseCohortFactory, config_course_cohorts, config_course_cohorts_legacy
 
 
@@ -318,6 +318,56 @@ class TestCohorts(ModuleStoreTestCase):
             "User should be assigned to the right cohort"
         )
 
+    def test_bulk_cache_cohorts_assign(self):
+        """
+        Make sure cohorts.bulk_cache_cohorts() assigns the uncohorted users to
+        the cohort they were pre-registered in, or else to a random cohort, when
+        assign is True.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, is_cohorted=True)
+        cohort2 = CohortFactory(course_id=course.id, name="PreregisteredCohort", users=[])
+        cohorts.add_user_to_cohort(cohort2, "test1@example.com")
+        cohorted_user, preregistered_user, other_user = [
+            UserFactory(username="test{}".format(index), email="test{}@example.com".format(index))
+            for index in range(3)
+        ]
+        cohort = CohortFactory(course_id=course.id, name="TestCohort", users=[cohorted_user])
+        users = [cohorted_user, preregistered_user, other_user]
+
+        cohorts.bulk_cache_cohorts(course.id, users)
+        for user in users[1:]:
+            self.assertIsNone(cohorts.get_cohort(user, course.id, use_cached=True))
+
+        cohorts.bulk_cache_cohorts(course.id, users, assign=True)
+        default_cohort = cohorts.get_cohort_by_name(course.id, cohorts.DEFAULT_COHORT_NAME)
+        expected_cohorts = [cohort, cohort2, default_cohort]
+        with self.assertNumQueries(0):
+            for user, expected_cohort in zip(users, expected_cohorts):
+                self.assertEqual(cohorts.get_cohort(user, course.id, use_cached=True), expected_cohort)
+        for user, expected_cohort in zip(users, expected_cohorts):
+            self.assertEqual(cohorts.get_cohort(user, course.id, assign=False), expected_cohort)
+            self.assertIn(user, expected_cohort.users.all())
+        self.assertFalse(UnregisteredLearnerCohortAssignments.objects.filter(course_id=course.id).exists())
+
+    def test_bulk_assign_cohorts(self):
+        """
+        Make sure cohorts.bulk_assign_cohorts() assigns only the given users
+        whose cohorts were cached by cohorts.bulk_cache_cohorts().
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, is_cohorted=True)
+        cached_user, other_cached_user, uncached_user = UserFactory.create_batch(3)
+
+        cohorts.bulk_cache_cohorts(course.id, [cached_user, other_cached_user])
+        cohorts.bulk_assign_cohorts(course.id, [cached_user, uncached_user])
+        default_cohort = cohorts.get_cohort_by_name(course.id, cohorts.DEFAULT_COHORT_NAME)
+        with self.assertNumQueries(0):
+            self.assertEqual(cohorts.get_cohort(cached_user, course.id, use_cached=True), default_cohort)
+        self.assertEqual(cohorts.get_cohort(cached_user, course.id, assign=False), default_cohort)
+        self.assertIsNone(cohorts.get_cohort(other_cached_user, course.id, assign=False))
+        self.assertIsNone(cohorts.get_cohort(uncached_user, course.id, assign=False))
+
     @ddt.data(
         (True, 2),
         (False, 6),
@@ -13,8 +13,10 @@ from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MIXED_MODULESTORE
 from xmodule.modulestore.tests.factories import ToyCourseFactory
 
+from openedx.core.djangoapps.user_api.models import UserCourseTag
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from openedx.core.djangolib.testing.utils import skip_unless_lms
+from xmodule.partitions.partitions_service import get_user_partition_groups_for_users
 from ..partition_scheme import CohortPartitionScheme, get_cohorted_user_partition
 from ..models import CourseUserGroupPartitionGroup
 from ..views import link_cohort_to_partition_group, unlink_cohort_partition_group
@@ -163,6 +165,53 @@ class TestCohortPartitionScheme(ModuleStoreTestCase):
         # call to cohorts.get_cohort.
         self.assert_student_in_group(self.groups[0])
 
+    def test_students_bulk_assigned(self):
+        """
+        Test that the groups of many students are resolved at once, and that
+        the students who have no cohort or random group yet are assigned
+        one in bulk.
+        """
+        cohort = get_course_cohorts(self.course)[0]
+        link_cohort_to_partition_group(
+            cohort,
+            self.user_partition.id,
+            self.groups[0].id,
+        )
+        random_partition = UserPartition(
+            1,
+            'Random Partition',
+            'for testing purposes',
+            self.groups,
+            scheme=RandomUserPartitionScheme
+        )
+        students = [self.student] + [UserFactory.create() for _ in range(3)]
+
+        groups_by_user = get_user_partition_groups_for_users(
+            self.course_key, [self.user_partition, random_partition], students,
+        )
+
+        self.assertItemsEqual(groups_by_user.keys(), [student.id for student in students])
+        for student in students:
+            self.assertEqual(groups_by_user[student.id][self.user_partition.id], self.groups[0])
+            self.assertIn(groups_by_user[student.id][random_partition.id], self.groups)
+        self.assertEqual(
+            UserCourseTag.objects.filter(
+                course_id=self.course_key,
+                key=RandomUserPartitionScheme.key_for_partition(random_partition),
+            ).count(),
+            len(students),
+        )
+        self.assert_student_in_group(self.groups[0])
+
+        # students aren't assigned anything when assign is False
+        new_student = UserFactory.create()
+        self.assertEqual(
+            get_user_partition_groups_for_users(
+                self.course_key, [self.user_partition, random_partition], [new_student], assign=False,
+            ),
+            {new_student.id: {self.user_partition.id: None, random_partition.id: None}},
+        )
+
     def setup_student_in_group_0(self):
         """
         Utility to set up a cohort, add our student to the cohort, and link
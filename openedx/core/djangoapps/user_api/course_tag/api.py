@@ -8,6 +8,9 @@ UserCourseTag model.
 """
 
 from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
 from openedx.core.djangoapps.request_cache import get_cache
 from ..models import UserCourseTag
 
@@ -44,6 +47,10 @@ class BulkCourseTags(object):
     def get_course_tag(cls, user_id, course_id, key):
         return get_cache(cls.CACHE_NAMESPACE)[cls._cache_key(course_id)][user_id][key]
 
+    @classmethod
+    def set_course_tag(cls, user_id, course_id, key, value):
+        get_cache(cls.CACHE_NAMESPACE)[cls._cache_key(course_id)][user_id][key] = value
+
     @classmethod
     def is_prefetched(cls, course_id):
         return cls._cache_key(course_id) in get_cache(cls.CACHE_NAMESPACE)
@@ -108,3 +115,40 @@ def set_course_tag(user, course_id, key, value):
 
     record.value = value
     record.save()
+
+
+def set_course_tags(course_id, key, values_by_user):
+    """
+    Sets the values of the course tag for the specified key in the specified
+    course_id, for many users at once.  Overwrites any previous values, and
+    updates the tags prefetched by BulkCourseTags.
+
+    Args:
+        course_id: course identifier (string)
+        key: arbitrary (<=255 char string)
+        values_by_user: dict mapping User objects to arbitrary strings
+    """
+    records = {
+        record.user_id: record
+        for record in UserCourseTag.objects.filter(user__in=values_by_user.keys(), course_id=course_id, key=key)
+    }
+    new_records = []
+    for user, value in values_by_user.iteritems():
+        record = records.get(user.id)
+        if record is None:
+            new_records.append(UserCourseTag(user=user, course_id=course_id, key=key, value=value))
+        else:
+            record.value = value
+            record.save()
+
+    try:
+        with transaction.atomic():
+            UserCourseTag.objects.bulk_create(new_records)
+    except IntegrityError:
+        # Another process tagged some of the users concurrently.
+        for record in new_records:
+            set_course_tag(record.user, course_id, key, record.value)
+
+    if BulkCourseTags.is_prefetched(course_id):
+        for user, value in values_by_user.iteritems():
+            BulkCourseTags.set_course_tag(user.id, course_id, key, value)
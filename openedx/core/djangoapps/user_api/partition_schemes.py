@@ -85,27 +85,78 @@ class RandomUserPartitionScheme(object):
             # persist the value as a course tag
             course_tag_api.set_course_tag(user, course_key, partition_key, group.id)
 
-            # emit event for analytics
-            # FYI - context is always user ID that is logged in, NOT the user id that is
-            # being operated on. If instructor can move user explicitly, then we should
-            # put in event_info the user id that is being operated on.
-            event_name = 'xmodule.partitions.assigned_user_to_partition'
-            event_info = {
-                'group_id': group.id,
-                'group_name': group.name,
-                'partition_id': user_partition.id,
-                'partition_name': user_partition.name
-            }
-            # pylint: disable=fixme
-            # TODO: Use the XBlock publish api instead
-            with tracker.get_tracker().context(event_name, {}):
-                tracker.emit(
-                    event_name,
-                    event_info,
-                )
+            cls._emit_assignment_event(user_partition, group)
 
         return group
 
+    @classmethod
+    def prefetch_groups_for_users(cls, course_key, users, user_partitions, assign=True):
+        """
+        Pre-fetches and caches the course tags of the given users, for later
+        fast retrieval by get_group_for_user.
+
+        If assign is True, the users who aren't assigned to a group of one of
+        the user_partitions yet are randomly assigned one, in bulk.
+        """
+        users = list(users)
+        course_tag_api.BulkCourseTags.prefetch(course_key, users)
+        if assign:
+            cls.assign_groups_for_users(course_key, users, user_partitions)
+
+    @classmethod
+    def assign_groups_for_users(cls, course_key, users, user_partitions):
+        """
+        Randomly assigns the given users, whose course tags were pre-fetched
+        by prefetch_groups_for_users, to a group of each of the
+        user_partitions they aren't assigned to yet, in bulk.  Users whose
+        course tags weren't pre-fetched are left for get_group_for_user to
+        assign.
+        """
+        if not course_tag_api.BulkCourseTags.is_prefetched(course_key):
+            return
+
+        for user_partition in user_partitions:
+            unassigned_users = [
+                user for user in users
+                if cls.get_group_for_user(course_key, user, user_partition, assign=False) is None
+            ]
+            if not unassigned_users:
+                continue
+            if not user_partition.groups:
+                raise UserPartitionError('Cannot assign user to an empty user partition')
+
+            groups_by_user = {user: cls.RANDOM.choice(user_partition.groups) for user in unassigned_users}
+            course_tag_api.set_course_tags(
+                course_key,
+                cls.key_for_partition(user_partition),
+                {user: group.id for user, group in groups_by_user.iteritems()},
+            )
+            for group in groups_by_user.itervalues():
+                cls._emit_assignment_event(user_partition, group)
+
+    @classmethod
+    def _emit_assignment_event(cls, user_partition, group):
+        """
+        Emits the analytics event for the assignment of a user to the group.
+        """
+        # FYI - context is always user ID that is logged in, NOT the user id that is
+        # being operated on. If instructor can move user explicitly, then we should
+        # put in event_info the user id that is being operated on.
+        event_name = 'xmodule.partitions.assigned_user_to_partition'
+        event_info = {
+            'group_id': group.id,
+            'group_name': group.name,
+            'partition_id': user_partition.id,
+            'partition_name': user_partition.name
+        }
+        # pylint: disable=fixme
+        # TODO: Use the XBlock publish api instead
+        with tracker.get_tracker().context(event_name, {}):
+            tracker.emit(
+                event_name,
+                event_info,
+            )
+
     @classmethod
     def key_for_partition(cls, user_partition):
         """
@@ -104,6 +104,14 @@ class EnrollmentTrackPartitionScheme(object):
         else:
             return None
 
+    @classmethod
+    def prefetch_groups_for_users(cls, course_key, users, user_partitions, **kwargs):  # pylint: disable=unused-argument
+        """
+        Pre-fetches and caches the enrollment states of the given users,
+        for later fast retrieval by get_group_for_user.
+        """
+        CourseEnrollment.bulk_fetch_enrollment_states(users, course_key)
+
     @classmethod
     def create_user_partition(cls, id, name, description, groups=None, parameters=None, active=True):  # pylint: disable=redefined-builtin, invalid-name, unused-argument
         """
@@ -4,6 +4,7 @@ Utilities related to caching.
 import collections
 import cPickle as pickle
 import functools
+import threading
 import zlib
 
 from xblock.core import XBlock
@@ -84,6 +85,54 @@ class memoized(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class LRUCache(object):
+    """
+    A bounded in-process cache, which discards its least recently used
+    entries when it holds more than max_size of them.
+
+    Only use it for values that are safe to share across requests and
+    threads; callers that mutate cached values must copy them.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for key, or default if there isn't one.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                return default
+            # Reinsert the entry to mark it as the most recently used.
+            self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Caches value for key, discarding the least recently used entries
+        if the cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 def hashvalue(arg):
     """
     If arg is an xblock, use its location. otherwise just turn it into a string
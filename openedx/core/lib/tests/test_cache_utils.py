@@ -6,7 +6,7 @@ from unittest import TestCase
 import ddt
 from mock import MagicMock
 
-from openedx.core.lib.cache_utils import memoize_in_request_cache
+from openedx.core.lib.cache_utils import LRUCache, memoize_in_request_cache
 
 
 @ddt.ddt
@@ -63,3 +63,32 @@ class TestMemoizeInRequestCache(TestCase):
                 func_to_memoize(*arg_list2)
 
             self.assertEquals(self.func_to_count.call_count, 2)
+
+
+class TestLRUCache(TestCase):
+    """
+    Test the LRUCache class.
+    """
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEquals(cache.get('a', 'default'), 'default')
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEquals((cache.get('a'), cache.get('b')), (1, 2))
+        cache.set('a', 3)
+        self.assertEquals(cache.get('a'), 3)
+        self.assertEquals(len(cache), 2)
+
+    def test_least_recently_used_are_discarded(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # reading 'a' makes 'b' the least recently used entry
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEquals((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+        self.assertIsNone(cache.get('a'))